@@ -1,11 +1,19 @@
-﻿import math
+﻿import argparse
+import math
+from datetime import date, datetime
+
+import numpy as np
 import pandas as pd
-from datetime import datetime
+
+from modules.csv_snapshot import load_csv
+from modules.geo_index import GeoGridIndex
+
+EARTH_RADIUS_KM = 6371.0
 
 
 def haversine(lat1, lon1, lat2, lon2):
     """Tính khoảng cách km giữa 2 tọa độ"""
-    R = 6371.0
+    R = EARTH_RADIUS_KM
     phi1 = math.radians(lat1)
     phi2 = math.radians(lat2)
     dphi = math.radians(lat2 - lat1)
@@ -14,85 +22,360 @@ def haversine(lat1, lon1, lat2, lon2):
     return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
 
 
+def haversine_matrix(lat1, lon1, lat2, lon2):
+    """Ma trận khoảng cách km (n x m) giữa n điểm và m điểm, tính một lần bằng NumPy"""
+    phi1 = np.radians(np.asarray(lat1, dtype=float))[:, None]
+    phi2 = np.radians(np.asarray(lat2, dtype=float))[None, :]
+    dphi = phi2 - phi1
+    dlambda = np.radians(np.asarray(lon2, dtype=float))[None, :] - np.radians(np.asarray(lon1, dtype=float))[:, None]
+    a = np.sin(dphi/2)**2 + np.cos(phi1)*np.cos(phi2)*np.sin(dlambda/2)**2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+
 def month_to_season(month):
     if month in (3,4,5): return 'spring'
     if month in (6,7,8): return 'summer'
     if month in (9,10,11): return 'autumn'
     return 'winter'
 
+
+def city_key(city):
+    """'Ho Chi Minh City' và 'Ho Chi Minh' được coi là cùng một thành phố"""
+    key = str(city or '').strip().lower()
+    return key[:-5] if key.endswith(' city') else key
+
 # =========================
 # 2️⃣ RULE CHO THỜI TIẾT & MÙA
 # =========================
+# điều kiện -> (tiện ích cần có, tag cần có, điểm khi khớp, điểm khi không khớp)
 weather_rules = {
-    'sunny': lambda hotel: 1.0 if ('pool_outdoor' in hotel['amenities'] or 'beach_nearby' in hotel['amenities']) else 0.3,
-    'rain':  lambda hotel: 1.0 if ('indoor' in hotel['amenities'] or 'spa' in hotel['amenities'] or 'near_center' in hotel['amenities']) else 0.3,
-    'cold':  lambda hotel: 1.0 if ('heating' in hotel['amenities'] or 'near_cafe' in hotel['amenities']) else 0.4,
-    'hot':   lambda hotel: 1.0 if ('pool_outdoor' in hotel['amenities'] or 'aircon' in hotel['amenities']) else 0.4,
-    'default': lambda hotel: 0.5
+    'sunny': ({'pool_outdoor', 'beach_nearby'}, set(), 1.0, 0.3),
+    'rain':  ({'indoor', 'spa', 'near_center'}, set(), 1.0, 0.3),
+    'cold':  ({'heating', 'near_cafe'}, set(), 1.0, 0.4),
+    'hot':   ({'pool_outdoor', 'aircon'}, set(), 1.0, 0.4),
 }
+DEFAULT_WEATHER_SCORE = 0.5
 
 season_rules = {
-    'spring': lambda hotel: 1.0 if 'garden_view' in hotel['amenities'] or 'romantic' in hotel['tags'] else 0.5,
-    'summer': lambda hotel: 1.0 if ('beach_nearby' in hotel['amenities'] or 'pool_outdoor' in hotel['amenities']) else 0.4,
-    'autumn': lambda hotel: 1.0 if 'city_view' in hotel['amenities'] or 'near_center' in hotel['amenities'] else 0.5,
-    'winter': lambda hotel: 1.0 if ('heating' in hotel['amenities'] or 'spa' in hotel['amenities']) else 0.4
+    'spring': ({'garden_view'}, {'romantic'}, 1.0, 0.5),
+    'summer': ({'beach_nearby', 'pool_outdoor'}, set(), 1.0, 0.4),
+    'autumn': ({'city_view', 'near_center'}, set(), 1.0, 0.5),
+    'winter': ({'heating', 'spa'}, set(), 1.0, 0.4),
 }
-# =============================
-# ĐỌC FILE CSV
-# =============================
-hotels_df = pd.read_csv("hotels.csv")
-events_df = pd.read_csv("events.csv")
+DEFAULT_SEASON_SCORE = 0.5
+
+# hotels.csv không có cột amenities -> suy ra từ các cột bool
+AMENITY_FROM_COLUMNS = {
+    'pool': 'pool_outdoor',
+    'sea': 'beach_nearby',
+    'view': 'city_view',
+    'spa': 'spa',
+}
+
+WEIGHTS = {'event': 0.4, 'weather': 0.3, 'season': 0.3}
+NO_EVENT_SCORE = 0.1
+
+
+def _split_tokens(value):
+    if not isinstance(value, str):
+        return set()
+    return {t.strip() for t in value.split(';') if t.strip()}
+
+
+def _is_true(value):
+    return str(value).strip().lower() in ('true', '1', '1.0', 'yes')
+
+
+def hotel_amenities(hotel_row):
+    """Tập tiện ích của một khách sạn (cột amenities hoặc suy ra từ cột bool)"""
+    amenities = _split_tokens(hotel_row.get('amenities'))
+    for col, amenity in AMENITY_FROM_COLUMNS.items():
+        if _is_true(hotel_row.get(col)):
+            amenities.add(amenity)
+    return amenities
+
+
+def _rule_score(rule, amenities, tags):
+    wanted_amenities, wanted_tags, hit, miss = rule
+    return hit if (amenities & wanted_amenities or tags & wanted_tags) else miss
+
+
+def _to_day(value):
+    if value is None:
+        value = date.today()
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return np.datetime64(pd.Timestamp(value).date(), 'D')
 
 
 # =============================
-# HÀM TÍNH ĐIỂM
+# HÀM TÍNH ĐIỂM (TỪNG KHÁCH SẠN)
 # =============================
-def score_event(hotel_row, events_df, ref_date):
-    nearest_event = None
-    min_days = None
-    for _, ev in events_df.iterrows():
-        if ev['city'] != selected_city:
-            continue
-        ev_date = datetime.fromisoformat(str(ev['date']))
-        delta_days = (ev_date - ref_date).days
-        if delta_days >= -1 and (min_days is None or delta_days < min_days):
-            nearest_event = ev
-            min_days = delta_days
-    if nearest_event is not None:
-        dist = haversine(hotel_row['lat'], hotel_row['lon'], nearest_event['lat'], nearest_event['lon'])
-        return 1 / (dist + 1)
-    return 0.1
+def score_event(hotel_row, events, ref_date, radius_km=None):
+    """
+    Điểm sự kiện: 1/(khoảng cách tới sự kiện sắp diễn ra gần nhất + 1).
+    events: EventTable dựng sẵn một lần cho cả danh sách khách sạn (ContextScorer.event_table);
+    truyền DataFrame thì phải parse lại lịch sự kiện ở mỗi lần gọi
+    """
+    table = events if isinstance(events, EventTable) else EventTable(events)
+    key = city_key(hotel_row.get('city'))
+    lat, lon = table.position(hotel_row.get('lat'), hotel_row.get('lon'), key)
+    if np.isnan(lat) or np.isnan(lon):
+        return NO_EVENT_SCORE
+
+    if radius_km is not None:
+        _, dist = table.index.nearest(lat, lon, k=1, max_km=radius_km, allowed=table.upcoming_mask(ref_date))
+        return 1 / (dist[0] + 1) if len(dist) else NO_EVENT_SCORE
+
+    row = table.next_event(key, ref_date)
+    if row is None:
+        return NO_EVENT_SCORE
+    return 1 / (haversine(lat, lon, table.lat[row], table.lon[row]) + 1)
+
 
 def score_weather(hotel_row, condition):
-    amenities = hotel_row['amenities'].split(';')
-    rule = weather_rules.get(condition, weather_rules['default'])
-    return rule(amenities)
+    rule = weather_rules.get(condition)
+    if rule is None:
+        return DEFAULT_WEATHER_SCORE
+    return _rule_score(rule, hotel_amenities(hotel_row), _split_tokens(hotel_row.get('tags')))
+
 
 def score_season(hotel_row, season_name):
-    amenities = hotel_row['amenities'].split(';')
-    tags = hotel_row['tags'].split(';')
-    rule = season_rules.get(season_name, lambda h, t: 0.5)
-    return rule(amenities, tags)
+    rule = season_rules.get(season_name)
+    if rule is None:
+        return DEFAULT_SEASON_SCORE
+    return _rule_score(rule, hotel_amenities(hotel_row), _split_tokens(hotel_row.get('tags')))
+
+
+# =============================
+# LỊCH SỰ KIỆN DÙNG CHUNG
+# =============================
+class EventTable:
+    """
+    Sự kiện parse một lần: nhóm theo thành phố và sắp theo ngày bắt đầu,
+    lưới tọa độ, tâm các sự kiện của từng thành phố (tọa độ xấp xỉ cho khách sạn thiếu lat/lon).
+    """
+
+    def __init__(self, events_df):
+        date_col = 'start_date' if 'start_date' in events_df.columns else 'date'
+        events = events_df.assign(
+            _city=[city_key(c) for c in events_df['city']],
+            _day=pd.to_datetime(events_df[date_col]).dt.normalize().values.astype('datetime64[D]'),
+        ).sort_values('_day', kind='stable')
+
+        self.events = events.reset_index(drop=True)
+        self.lat = self.events['lat'].to_numpy(dtype=float)
+        self.lon = self.events['lon'].to_numpy(dtype=float)
+        self.days = self.events['_day'].values
+        self.index = GeoGridIndex(self.lat, self.lon)
+        self.by_city = {}
+        for key, rows in self.events.groupby('_city').indices.items():
+            self.by_city[key] = (self.days[rows], rows)
+        self.centroids = self.events.groupby('_city')[['lat', 'lon']].mean()
+
+    @staticmethod
+    def _cutoff(ref_date):
+        return _to_day(ref_date) - np.timedelta64(1, 'D')
+
+    def next_event(self, key, ref_date):
+        """Row id của sự kiện sắp diễn ra gần nhất ở thành phố key (bắt đầu từ ref_date - 1 ngày)"""
+        entry = self.by_city.get(key)
+        if entry is None:
+            return None
+        days, rows = entry
+        i = np.searchsorted(days, self._cutoff(ref_date), side='left')
+        return rows[i] if i < len(days) else None
+
+    def upcoming_mask(self, ref_date):
+        return self.days >= self._cutoff(ref_date)
+
+    def position(self, lat, lon, key):
+        """Tọa độ khách sạn; thiếu thì lấy tâm các sự kiện cùng thành phố (NaN nếu không có)"""
+        lat, lon = _to_float(lat), _to_float(lon)
+        if (np.isnan(lat) or np.isnan(lon)) and key in self.centroids.index:
+            return float(self.centroids.loc[key, 'lat']), float(self.centroids.loc[key, 'lon'])
+        return lat, lon
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+# =============================
+# CHẤM ĐIỂM HÀNG LOẠT (VECTOR HÓA)
+# =============================
+class ContextScorer:
+    """
+    Chấm điểm ngữ cảnh (sự kiện × thời tiết × mùa) cho cả danh sách khách sạn.
+    Dựng sẵn một lần: mặt nạ tiện ích/tag, tọa độ, lịch sự kiện đã parse theo thành phố.
+    Mỗi lần score() chỉ còn vài phép toán mảng.
+    """
+
+    def __init__(self, hotels_df, events_df):
+        self.hotels = hotels_df.reset_index(drop=True)
+        self.size = len(self.hotels)
+        self.city_keys = np.array([city_key(c) for c in self.hotels.get('city', pd.Series([''] * self.size))])
+
+        records = self.hotels.to_dict(orient='records')
+        amenity_sets = [hotel_amenities(h) for h in records]
+        tag_sets = [_split_tokens(h.get('tags')) for h in records]
+        self.amenity_masks = self._token_masks(amenity_sets)
+        self.tag_masks = self._token_masks(tag_sets)
+
+        self.event_table = EventTable(events_df)
+        self.events = self.event_table.events
+        self.event_index = self.event_table.index
+        self.events_by_city = self.event_table.by_city
+        self.lat, self.lon = self._coordinates()
+
+    def _token_masks(self, token_sets):
+        masks = {}
+        for row_id, tokens in enumerate(token_sets):
+            for token in tokens:
+                if token not in masks:
+                    masks[token] = np.zeros(self.size, dtype=bool)
+                masks[token][row_id] = True
+        return masks
+
+    def _coordinates(self):
+        """Tọa độ khách sạn; thiếu thì lấy tâm các sự kiện cùng thành phố (xấp xỉ)"""
+        lat = pd.to_numeric(self.hotels.get('lat'), errors='coerce') if 'lat' in self.hotels else None
+        lon = pd.to_numeric(self.hotels.get('lon'), errors='coerce') if 'lon' in self.hotels else None
+        lat = np.full(self.size, np.nan) if lat is None else lat.to_numpy(dtype=float, copy=True)
+        lon = np.full(self.size, np.nan) if lon is None else lon.to_numpy(dtype=float, copy=True)
+
+        missing = np.isnan(lat) | np.isnan(lon)
+        if missing.any():
+            centroids = self.event_table.centroids
+            for key in np.unique(self.city_keys[missing]):
+                if key in centroids.index:
+                    rows = missing & (self.city_keys == key)
+                    lat[rows], lon[rows] = centroids.loc[key, 'lat'], centroids.loc[key, 'lon']
+        return lat, lon
+
+    def _mask(self, masks, tokens):
+        out = np.zeros(self.size, dtype=bool)
+        for token in tokens:
+            if token in masks:
+                out |= masks[token]
+        return out
+
+    def rule_scores(self, rules, name, default):
+        rule = rules.get(name)
+        if rule is None:
+            return np.full(self.size, default)
+        wanted_amenities, wanted_tags, hit, miss = rule
+        matched = self._mask(self.amenity_masks, wanted_amenities) | self._mask(self.tag_masks, wanted_tags)
+        return np.where(matched, hit, miss)
+
+    def upcoming_events(self, ref_date):
+        """Thành phố -> row id của sự kiện sắp diễn ra gần nhất (bắt đầu từ ref_date - 1 ngày)"""
+        chosen = {}
+        for key in self.events_by_city:
+            row = self.event_table.next_event(key, ref_date)
+            if row is not None:
+                chosen[key] = row
+        return chosen
+
+    def events_near(self, lat, lon, radius_km, ref_date=None):
+        """Các sự kiện (sắp diễn ra nếu có ref_date) trong bán kính radius_km, gần nhất trước"""
+        allowed = self.event_table.upcoming_mask(ref_date) if ref_date is not None else None
+        rows, dist = self.event_index.within_radius(lat, lon, radius_km, allowed=allowed)
+        return self.events.iloc[rows].assign(distance_km=dist)
+
+    def event_scores(self, ref_date, radius_km=None):
+        """
+        Mặc định: sự kiện sắp diễn ra gần nhất (theo ngày) trong cùng thành phố.
+        Có radius_km: sự kiện sắp diễn ra gần nhất (theo khoảng cách) trong bán kính, qua lưới tọa độ.
+        """
+        if radius_km is not None:
+            return self._nearby_event_scores(ref_date, radius_km)
+
+        chosen = self.upcoming_events(ref_date)
+        scores = np.full(self.size, NO_EVENT_SCORE)
+        if not chosen:
+            return scores
+
+        keys = list(chosen)
+        event_rows = np.array([chosen[k] for k in keys])
+        # ma trận khoảng cách khách sạn x sự kiện được chọn, tính một lượt
+        dist = haversine_matrix(self.lat, self.lon,
+                                self.event_table.lat[event_rows],
+                                self.event_table.lon[event_rows])
+
+        column = {k: j for j, k in enumerate(keys)}
+        cols = np.array([column.get(k, -1) for k in self.city_keys])
+        has_event = cols >= 0
+        picked = dist[np.arange(self.size)[has_event], cols[has_event]]
+        scores[has_event] = np.where(np.isnan(picked), NO_EVENT_SCORE, 1 / (picked + 1))
+        return scores
+
+    def _nearby_event_scores(self, ref_date, radius_km):
+        upcoming = self.event_table.upcoming_mask(ref_date)
+        scores = np.full(self.size, NO_EVENT_SCORE)
+        for i in np.flatnonzero(~(np.isnan(self.lat) | np.isnan(self.lon))):
+            _, dist = self.event_index.nearest(self.lat[i], self.lon[i], k=1,
+                                               max_km=radius_km, allowed=upcoming)
+            if len(dist):
+                scores[i] = 1 / (dist[0] + 1)
+        return scores
+
+    def score(self, reference_date=None, weather='default', season=None, city=None, top_k=5,
+              radius_km=None):
+        """Trả về DataFrame top_k khách sạn (toàn bộ nếu top_k=None) theo Total_Score"""
+        ref_day = _to_day(reference_date)
+        if season is None:
+            season = month_to_season(int(str(ref_day)[5:7]))
+
+        s_event = self.event_scores(ref_day, radius_km)
+        s_weather = self.rule_scores(weather_rules, weather, DEFAULT_WEATHER_SCORE)
+        s_season = self.rule_scores(season_rules, season, DEFAULT_SEASON_SCORE)
+        total = WEIGHTS['event']*s_event + WEIGHTS['weather']*s_weather + WEIGHTS['season']*s_season
+
+        rows = np.arange(self.size)
+        if city:
+            rows = rows[self.city_keys == city_key(city)]
+        # điểm bằng nhau giữ thứ tự dòng: kết quả không đổi giữa các lần chạy
+        rows = rows[np.lexsort((rows, -total[rows]))][:top_k]
+
+        return pd.DataFrame({
+            'Hotel': self.hotels['name'].values[rows],
+            'Price': self.hotels['price'].values[rows],
+            'Stars': self.hotels['stars'].values[rows],
+            'Score_Event': s_event[rows].round(3),
+            'Score_Weather': s_weather[rows].round(3),
+            'Score_Season': s_season[rows].round(3),
+            'Total_Score': total[rows].round(3),
+        })
+
+
+def score_hotels(hotels_df, events_df, reference_date=None, weather='default',
+                 season=None, city=None, top_k=5, radius_km=None):
+    return ContextScorer(hotels_df, events_df).score(reference_date, weather, season, city, top_k, radius_km)
+
 
 # =============================
 # TÍNH TOÁN & XUẤT KẾT QUẢ
 # =============================
-results = []
-for _, h in hotels_df.iterrows():
-    s_event = score_event(h, events_df, reference_date)
-    s_weather = score_weather(h, current_weather['condition'])
-    s_season = score_season(h, season)
-    total = 0.4*s_event + 0.3*s_weather + 0.3*s_season
-    results.append({
-        'Hotel': h['name'],
-        'Price': h['price'],
-        'Stars': h['stars'],
-        'Score_Event': round(s_event,3),
-        'Score_Weather': round(s_weather,3),
-        'Score_Season': round(s_season,3),
-        'Total_Score': round(total,3)
-    })
-
-df_result = pd.DataFrame(results).sort_values(by='Total_Score', ascending=False)
-print("🔹 Goi y khach san (Top 5):")
-print(df_result.head(5).to_string(index=False))
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gợi ý khách sạn theo sự kiện, thời tiết và mùa")
+    parser.add_argument('--hotels', default='hotels.csv')
+    parser.add_argument('--events', default='events.csv')
+    parser.add_argument('--city', default=None)
+    parser.add_argument('--date', default=None, help="ngày tham chiếu YYYY-MM-DD (mặc định hôm nay)")
+    parser.add_argument('--weather', default='sunny', choices=sorted(weather_rules) + ['default'])
+    parser.add_argument('--top', type=int, default=5)
+    parser.add_argument('--radius-km', type=float, default=None,
+                        help="chấm điểm theo sự kiện gần nhất trong bán kính thay vì cùng thành phố")
+    args = parser.parse_args()
+
+    hotels_df = load_csv(args.hotels)
+    events_df = load_csv(args.events)
+
+    df_result = score_hotels(hotels_df, events_df, args.date, args.weather,
+                             city=args.city, top_k=args.top, radius_km=args.radius_km)
+    print(f"🔹 Goi y khach san (Top {args.top}):")
+    print(df_result.to_string(index=False))
@@ -1,15 +1,50 @@
-from flask import Flask, render_template, request, redirect, url_for
+from flask import (
+    Flask, Response, flash, g, jsonify, render_template, request, redirect, stream_template, url_for,
+)
+from markupsafe import Markup
 import pandas as pd
+import io
+import json
 import os
 import re
 from datetime import datetime
+from modules.hotel_data import HOTEL_FIELDS, HotelCatalog, hotel_summary, normalize_city
+from modules.catalog_manager import CatalogManager
+from modules.csv_snapshot import load_csv
+from modules.render_cache import LRUCache
+from modules.http_cache import ConditionalResponder, make_etag, signature_mtime
+from modules.review_store import ReviewStore
+from modules.hotel_db import BookingEngine, RoomUnavailableError
+from modules.availability import MAX_NIGHTS, ROOM_TYPES, stay_nights
+from modules.pricing import DynamicPricer
+from modules.text_search import HotelTextSearch, query_words
+from modules.metrics import MetricsRegistry, RequestProfiler
+from modules.recommendation_service import RecommendationService
+from modules.secret_key import load_secret_key
+from AI import city_key
 
 app = Flask(__name__)
+app.secret_key = load_secret_key()  # session / flash; cùng khóa với chat_asgi.py
+app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # trang khác không gửi kèm cookie phiên khi POST sang
 
 # === FILE PATHS ===
 HOTELS_CSV = "hotels.csv"
 REVIEWS_CSV = "reviews.csv"
-BOOKINGS_CSV = "bookings.csv"
+BOOKINGS_CSV = "bookings.csv"  # dữ liệu cũ, được chuyển vào hotel.db lần đầu chạy
+EVENTS_CSV = "events.csv"
+USERS_CSV = "data/users.csv"
+HOTEL_DB = "hotel.db"
+
+# === ĐO HIỆU NĂNG ===
+# histogram theo route / bước xử lý, bộ đếm; xuất ở /metrics (Prometheus)
+metrics = MetricsRegistry()
+metrics.describe('request_seconds', 'histogram', 'Thời gian xử lý request theo route, method, status')
+metrics.describe('stage_seconds', 'histogram', 'Thời gian từng bước (lọc, tìm văn bản, render, ghi...) theo route')
+metrics.describe('rows_scanned_total', 'counter', 'Số dòng danh mục được quét khi lọc / tìm kiếm')
+metrics.describe('rows_returned_total', 'counter', 'Số dòng khớp truy vấn')
+# cProfile theo request: gửi header "X-Profile: <PROFILE_TOKEN>"; không đặt PROFILE_TOKEN thì tắt
+profiler = RequestProfiler(os.environ.get("PROFILE_TOKEN"), os.environ.get("PROFILE_DIR", ".profiles"))
+SLOW_REQUEST_SECONDS = float(os.environ.get("SLOW_REQUEST_SECONDS", "1.0"))  # in ra các bước của request chậm
 
 # === ĐẢM BẢO FILE TỒN TẠI ===
 if not os.path.exists(HOTELS_CSV):
@@ -20,19 +55,16 @@ if not os.path.exists(REVIEWS_CSV):
         REVIEWS_CSV, index=False, encoding="utf-8-sig"
     )
 
-if not os.path.exists(BOOKINGS_CSV):
-    pd.DataFrame(columns=[
-        "hotel_name", "room_type", "price", "user_name", "phone", "email",
-        "num_adults", "num_children", "checkin_date", "nights", "special_requests", "booking_time"
-    ]).to_csv(BOOKINGS_CSV, index=False, encoding="utf-8-sig")
-
 
 # === HÀM ĐỌC CSV AN TOÀN VÀ CHUẨN HÓA DỮ LIỆU SỐ ===
 def read_csv_safe(file_path):
+    # đọc file một lần, chỉ thử giải mã bytes theo từng encoding rồi parse một lượt
+    with open(file_path, "rb") as f:
+        raw = f.read()
     encodings = ["utf-8-sig", "utf-8", "cp1252"]
     for enc in encodings:
         try:
-            df = pd.read_csv(file_path, encoding=enc, dtype=str)
+            df = pd.read_csv(io.StringIO(raw.decode(enc)), dtype=str)
             df.columns = df.columns.str.strip()  # loại bỏ khoảng trắng ở tên cột
 
             # Tự động convert các cột số nếu tồn tại
@@ -52,17 +84,62 @@ def read_csv_safe(file_path):
 
 
 # === LOAD DỮ LIỆU ===
-hotels = read_csv_safe(HOTELS_CSV)
-reviews_df = read_csv_safe(REVIEWS_CSV)
+review_store = ReviewStore(REVIEWS_CSV)  # kiểm tra cột 'hotel_name' khi nạp
+text_search = HotelTextSearch(review_store)  # BM25 trên mô tả + bình luận, cập nhật theo đánh giá mới
 
-if 'name' not in hotels.columns:
-    if 'Name' in hotels.columns:
-        hotels = hotels.rename(columns={'Name': 'name'})
-    else:
-        raise KeyError("❌ hotels.csv không có cột 'name'. Vui lòng kiểm tra header CSV!")
+# Đặt phòng trên SQLite (WAL), kho phòng lấy từ danh mục
+booking_engine = BookingEngine(HOTEL_DB, legacy_csv=BOOKINGS_CSV, users_csv=USERS_CSV)
+
+
+def load_hotels(path=HOTELS_CSV):
+    # snapshot nhị phân theo hash file: chỉ parse lại CSV khi nội dung đổi
+    hotels = load_csv(path, read_csv_safe, variant="safe")
+    if 'name' not in hotels.columns:
+        if 'Name' in hotels.columns:
+            hotels = hotels.rename(columns={'Name': 'name'})
+        else:
+            raise KeyError("❌ hotels.csv không có cột 'name'. Vui lòng kiểm tra header CSV!")
+    return hotels
+
+
+def build_catalog():
+    """Đọc hotels.csv, đồng bộ kho phòng rồi dựng danh mục (tra theo tên O(1), chỉ mục lọc)"""
+    with metrics.span('csv_read'):
+        hotels = load_hotels()
+    with metrics.span('inventory_sync'):
+        booking_engine.sync_hotels(hotels)
+    with metrics.span('catalog_build'):  # map_hotel_row + chỉ mục lọc / tọa độ
+        return HotelCatalog(hotels)
+
+
+# Danh mục tự nạp lại khi hotels.csv (file duy nhất load_hotels đọc) đổi; mỗi request lấy một bản cố định
+catalog_manager = CatalogManager([HOTELS_CSV], build_catalog)
+
+# Sự kiện + lưới tọa độ cho tìm kiếm "gần sự kiện"
+events_df = (
+    pd.read_csv(EVENTS_CSV, encoding="utf-8-sig")
+    if os.path.exists(EVENTS_CSV)
+    else pd.DataFrame(columns=["event_id", "event_name", "city", "lat", "lon", "start_date", "end_date", "season"])
+)
+events_by_id = {str(e['event_id']): e for e in events_df.to_dict(orient='records')}
+
+# Giá động theo loại phòng x mùa x sự kiện x tỷ lệ lấp đầy
+pricer = DynamicPricer(booking_engine.calendar, events_df)
+
+# Gợi ý theo sở thích (cùng dịch vụ với chatbot), nhớ kết quả theo sở thích đã chuẩn hóa
+recommendation_service = RecommendationService(lambda: catalog_manager.current)
+
+# HTML đã render: thẻ khách sạn, trang /recommend theo truy vấn chuẩn hóa, trang chi tiết
+card_cache = LRUCache(max_entries=4096)
+recommend_cache = LRUCache(max_entries=512)
+detail_cache = LRUCache(max_entries=1024)
 
-if 'hotel_name' not in reviews_df.columns:
-    raise KeyError("❌ reviews.csv không có cột 'hotel_name'.")
+# ETag / 304 / nén gzip (br nếu có) cho các trang danh mục
+responder = ConditionalResponder()
+TEMPLATE_DIR = os.path.join(app.root_path, app.template_folder)
+TEMPLATE_VERSION = max(
+    (os.stat(os.path.join(TEMPLATE_DIR, f)).st_mtime_ns for f in os.listdir(TEMPLATE_DIR)), default=0
+)
 
 
 # === HÀM PHỤ TRỢ ===
@@ -70,90 +147,436 @@ def yes_no_icon(val):
     return "✅" if str(val).lower() in ("true", "1", "yes") else "❌"
 
 
-def map_hotel_row(row):
-    h = dict(row)
-    h["image"] = h.get("image_url", h.get("image", ""))
-    html_desc = h.get("review") or h.get("description") or ""
-    h["full_desc"] = html_desc  # để dùng chi tiết
-    # tạo short_desc cho danh sách
-    import re
-    clean = re.sub(r'<[^>]*>', '', html_desc)  # loại bỏ tag
-    h["short_desc"] = clean[:150] + ("..." if len(clean) > 150 else "")
-    
-    h["gym"] = h.get("gym", False)
-    h["spa"] = h.get("spa", False)
-    h["sea_view"] = h.get("sea") if "sea" in h else h.get("sea_view", False)
-    return h
+def render_card(catalog, row_id):
+    """Thẻ khách sạn trong danh sách, render một lần cho mỗi phiên bản danh mục"""
+    return card_cache.get_or_render(
+        (catalog.version, row_id),
+        lambda: Markup(render_template('_hotel_card.html', hotel=catalog.records[row_id]))
+    )
+
+
+def near_event_bits(catalog, event_id, radius_km):
+    """Mặt nạ khách sạn trong bán kính quanh sự kiện; thiếu tọa độ thì lấy cùng thành phố"""
+    index = catalog.filter_index
+    bits = index.empty_bits()
+    event = events_by_id.get(str(event_id))
+    if event is None:
+        return bits
+
+    if catalog.geo_index is not None and len(catalog.geo_index):
+        rows, _ = catalog.geo_index.within_radius(float(event['lat']), float(event['lon']), radius_km)
+        bits[rows] = True
+        return bits
+
+    for city, city_bits in index.city_bits.items():
+        if city_key(city) == city_key(event['city']):
+            bits |= city_bits
+    return bits
+
+
+@app.before_request
+def start_request_metrics():
+    metrics.begin_request(request.url_rule.rule if request.url_rule else 'unmatched')
+    if profiler.wanted(request.headers):
+        g.profile = profiler.start()
+
+
+@app.before_request
+def refresh_catalog():
+    catalog_manager.check()  # chỉ stat file, việc dựng lại chạy nền
+
+
+def _finish_request(status, response=None):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        path = profiler.stop(profile, request.path)
+        if response is not None:
+            response.headers['X-Profile-File'] = path
+    trace = metrics.end_request(request.method, status)
+    if trace is None:
+        return
+    if response is not None and trace.spans:
+        response.headers['Server-Timing'] = trace.server_timing()
+    if trace.elapsed >= SLOW_REQUEST_SECONDS:
+        print(f"🐢 Request chậm {request.method} {request.full_path} -> {status}: "
+              f"{trace.elapsed * 1000:.0f}ms [{trace.server_timing()}]")
+
+
+@app.after_request
+def finish_request_metrics(response):
+    # response dạng stream: chỉ đo tới lúc gửi byte đầu tiên
+    _finish_request(response.status_code, response)
+    return response
+
+
+@app.teardown_request
+def abort_request_metrics(exc):
+    if metrics.current() is not None:  # lỗi chưa bắt: after_request không chạy
+        _finish_request(500)
 
 
 # === TRANG CHỦ ===
 @app.route('/')
 def home():
-    cities = sorted(hotels['city'].dropna().unique())
-    return render_template('index.html', cities=cities), 200, {'Content-Type': 'text/html; charset=utf-8'}
+    catalog = catalog_manager.current
+    return responder.respond(
+        make_etag('home', catalog.signature, TEMPLATE_VERSION),
+        lambda: render_template('index.html', cities=catalog.cities),
+        last_modified=signature_mtime(catalog.signature)
+    )
+
+
+# === TÌM KIẾM (dùng chung cho trang HTML và JSON) ===
+PER_PAGE = 30
+MAX_PER_PAGE = 200
+
+
+def _to_number(value, cast, default=None):
+    try:
+        return cast(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_stay(args):
+    """(checkin ISO, số đêm) từ tham số checkin / nights; thiếu hoặc sai ngày -> ('', 1)"""
+    nights = min(max(_to_number(args.get('nights'), int, 1), 1), MAX_NIGHTS)
+    try:
+        return stay_nights(args.get('checkin', ''), nights)[0], nights
+    except ValueError:
+        return '', 1
+
+
+def parse_search(args):
+    """Chuẩn hóa tham số tìm kiếm thành dict (dùng làm khóa cache / ETag)"""
+    near_event = str(args.get('near_event', '') or '')
+    checkin, nights = parse_stay(args)
+    return {
+        'city': normalize_city(args.get('location', '')),
+        'max_price': _to_number(args.get('budget'), float),
+        'min_stars': _to_number(args.get('stars'), int),
+        'amenities': tuple(col for col in ['buffet', 'pool', 'sea', 'view'] if args.get(col)),
+        'sort': args.get('sort', '') if args.get('sort') in ('asc', 'desc') else '',
+        'near_event': near_event,
+        'radius_km': _to_number(args.get('radius_km'), float, 5.0) if near_event else None,
+        'checkin': checkin,
+        'nights': nights if checkin else None,
+        'q': ' '.join(query_words(args.get('q', ''))),  # đã bỏ dấu: "Yên tĩnh" ~ "yen tinh"
+    }
+
+
+def spec_version(spec):
+    """
+    Phần kết quả không nằm trong danh mục: lọc theo ngày đổi theo lịch phòng,
+    tìm theo q đổi theo đánh giá mới -> đưa các phiên bản này vào khóa cache / ETag.
+    Chỉ dùng giá trị giống nhau giữa các worker: phiên bản lịch lưu trong hotel.db,
+    chữ ký (inode, mtime, size) của reviews.csv.
+    """
+    calendar = booking_engine.calendar.version() if spec['checkin'] else None
+    if spec['q']:
+        review_store.refresh()
+        return calendar, review_store.signature
+    return calendar, None
+
+
+def search_last_modified(catalog, specs):
+    """
+    Last-Modified của kết quả tìm kiếm: lúc sửa danh mục, và reviews.csv nếu có q.
+    Lọc theo ngày phụ thuộc lịch phòng / giá, không có mốc thời gian -> None (chỉ dùng ETag)
+    """
+    if any(spec['checkin'] for spec in specs):
+        return None
+    modified = [signature_mtime(catalog.signature)]
+    if any(spec['q'] for spec in specs):
+        modified.append(review_store.last_modified)
+    return max(filter(None, modified), default=None)
+
+
+def search_page(catalog, spec, offset=0, limit=None, cursor=None):
+    """(row id, tổng, vị trí bắt đầu, cursor sau); có q mà không chọn sort thì xếp theo BM25"""
+    with metrics.span('filter'):
+        bits = search_bits(catalog, spec)
+    metrics.inc('rows_scanned_total', catalog.filter_index.size, stage='filter')
+    order = None
+    if spec['q']:
+        with metrics.span('text_search'):
+            ranked = text_search.search(catalog, spec['q'])
+            matched = catalog.filter_index.empty_bits()
+            matched[ranked] = True
+            bits &= matched
+        metrics.inc('rows_scanned_total', len(ranked), stage='text_search')
+        if not spec['sort']:
+            order = ranked
+    with metrics.span('page'):
+        result = catalog.filter_index.page(bits, spec['sort'], offset=offset, limit=limit, after=cursor, order=order)
+    metrics.inc('rows_returned_total', result[1])
+    return result
+
+
+def search_bits(catalog, spec):
+    index = catalog.filter_index
+    bits = index.query(
+        city=spec['city'],
+        max_price=spec['max_price'],
+        min_stars=spec['min_stars'],
+        amenities=spec['amenities']
+    )
+    if spec['near_event']:
+        bits &= near_event_bits(catalog, spec['near_event'], spec['radius_km'])
+    if spec['checkin']:
+        # một truy vấn cho cả danh sách: bỏ các khách sạn đã kín phòng trong kỳ lưu trú
+        for name in booking_engine.calendar.full_hotels(spec['checkin'], spec['nights']):
+            bits[catalog.name_postings.get(name, [])] = False
+    return bits
+
+
+def parse_paging(args, default_limit=PER_PAGE):
+    """(offset, limit, cursor): cursor (vị trí trong thứ tự sắp xếp) được ưu tiên hơn page"""
+    limit = _to_number(args.get('per_page'), int, default_limit)
+    if limit is not None:
+        limit = min(max(limit, 1), MAX_PER_PAGE)
+    page = max(_to_number(args.get('page'), int, 1), 1)
+    cursor = _to_number(args.get('cursor'), int)
+    return (page - 1) * (limit or 0), limit, cursor
+
+
+def parse_fields(value):
+    """fields=name,price -> chỉ trả các trường này trong JSON (mặc định: mọi trường rút gọn)"""
+    if isinstance(value, str):
+        value = value.split(',')
+    fields = tuple(str(f).strip() for f in value or () if str(f).strip() in HOTEL_FIELDS)
+    return fields or HOTEL_FIELDS
+
+
+def search_result(catalog, args, default_limit=PER_PAGE):
+    """Chạy một truy vấn trên chỉ mục dùng chung, trả dict JSON một trang kết quả"""
+    spec = parse_search(args)
+    offset, limit, cursor = parse_paging(args, default_limit)
+    fields = parse_fields(args.get('fields'))
+    rows, total, start, next_cursor = search_page(catalog, spec, offset, limit, cursor)
+    rows = rows.tolist()
+    hotels = []
+    for i in rows:
+        summary = hotel_summary(catalog.records[i])
+        hotels.append({f: summary[f] for f in fields})
+    if spec['checkin'] and rows:
+        # giá cả kỳ lưu trú cho cả trang: một lần lấy chỉ số trên bảng giá
+        totals = pricer.stay_totals(catalog, rows, spec['checkin'], spec['nights'])
+        for hotel, row_totals in zip(hotels, totals.tolist()):
+            hotel['stay_prices'] = dict(zip(ROOM_TYPES, (int(t) for t in row_totals)))
+    return {
+        'total': total,
+        'offset': start,
+        'count': len(hotels),
+        'next_cursor': next_cursor,
+        'hotels': hotels,
+    }
+
+
+def search_key(args):
+    """Khóa chuẩn hóa của một truy vấn (cho ETag)"""
+    spec = parse_search(args)
+    return (tuple(spec.values()), spec_version(spec), parse_paging(args), parse_fields(args.get('fields')))
+
+
+def page_url(args, **changes):
+    params = {k: v for k, v in args.items() if k not in ('page', 'cursor')}
+    params.update(changes)
+    return url_for('recommend', **params)
 
 
 # === TRANG GỢI Ý ===
 @app.route('/recommend', methods=['POST', 'GET'])
 def recommend():
-    filtered = hotels.copy()
+    args = request.form if request.method == 'POST' else request.args
+    spec = parse_search(args)
+    stream = bool(args.get('stream'))
+    # chế độ stream mặc định gửi toàn bộ danh sách, từng thẻ một
+    offset, limit, cursor = parse_paging(args, None if stream else PER_PAGE)
+
+    if args.get('format') == 'json':
+        return json_response(search_key(args), lambda catalog: search_result(catalog, args), [spec])
+
+    catalog = catalog_manager.current
+    card_cache.bind(catalog.version)
+    recommend_cache.bind(catalog.version)
+
+    def page():
+        rows, total, start, next_cursor = search_page(catalog, spec, offset, limit, cursor)
+        return rows.tolist(), total, start, next_cursor
+
+    def context():
+        rows, total, start, next_cursor = page()
+        return {
+            'hotels': [catalog.records[i] for i in rows],
+            'total': total,
+            'start': start,
+            'next_url': page_url(args, cursor=next_cursor) if next_cursor is not None else None,
+            'prev_url': page_url(args, page=offset // limit) if limit and offset and cursor is None else None,
+        }, rows
+
+    if stream:
+        # byte đầu tiên đi ngay, thẻ được render dần trong lúc gửi
+        ctx, rows = context()
+        cards = (render_card(catalog, i) for i in rows)
+        return Response(
+            stream_template('result.html', cards=cards, **ctx),
+            content_type='text/html; charset=utf-8'
+        )
+
+    # cùng một truy vấn (sau chuẩn hóa) + cùng trang -> trả lại trang đã render
+    query = (tuple(spec.values()), spec_version(spec), offset, limit, cursor)
+
+    def render():
+        key = (catalog.version,) + query
+        html = recommend_cache.get(key)
+        if html is None:
+            ctx, rows = context()
+            with metrics.span('render'):
+                cards = [render_card(catalog, i) for i in rows]
+                html = recommend_cache.put(key, render_template('result.html', cards=cards, **ctx))
+        return html
+
+    return responder.respond(
+        make_etag('recommend', catalog.signature, TEMPLATE_VERSION, query),
+        render,
+        last_modified=search_last_modified(catalog, [spec])
+    )
 
-    if request.method == 'POST':
-        city = request.form.get('location', '').lower()
-        budget = request.form.get('budget', '')
-        stars = request.form.get('stars', '')
-    else:
-        city = request.args.get('location', '').lower()
-        budget = request.args.get('budget', '')
-        stars = request.args.get('stars', '')
 
-    if city:
-        filtered = filtered[filtered['city'].str.lower() == city]
+# === API JSON ===
+MAX_BATCH = 200
 
-    if budget:
-        try:
-            budget = float(budget)
-            filtered = filtered[filtered['price'] <= budget]
-        except ValueError:
-            pass
 
-    if stars:
-        try:
-            stars = int(stars)
-            filtered = filtered[filtered['stars'] >= stars]
-        except ValueError:
-            pass
+def json_response(etag_parts, render, specs=()):
+    """specs: các truy vấn (parse_search) của response, để tính Last-Modified"""
+    catalog = catalog_manager.current
+    def body():
+        result = render(catalog)
+        with metrics.span('serialize'):
+            return json.dumps(result, ensure_ascii=False, separators=(',', ':'))
 
-    for col in ['buffet', 'pool', 'sea', 'view']:
-        if request.args.get(col):
-            filtered = filtered[filtered[col] == True]
+    return responder.respond(
+        make_etag('api', catalog.signature, *etag_parts),
+        body,
+        last_modified=search_last_modified(catalog, specs),
+        content_type='application/json'
+    )
 
-    sort = request.args.get('sort', '')
-    if sort == 'asc':
-        filtered = filtered.sort_values(by='price')
-    elif sort == 'desc':
-        filtered = filtered.sort_values(by='price', ascending=False)
 
-    results = [map_hotel_row(r) for r in filtered.to_dict(orient='records')]
-    return render_template('result.html', hotels=results), 200, {'Content-Type': 'text/html; charset=utf-8'}
+@app.route('/api/search', methods=['GET'])
+def api_search():
+    """Cùng tham số với /recommend (location, budget, stars, sort, page/per_page/cursor...) + fields"""
+    args = request.args
+    return json_response(search_key(args), lambda catalog: search_result(catalog, args), [parse_search(args)])
+
+
+@app.route('/api/search/batch', methods=['POST'])
+def api_search_batch():
+    """
+    Body: {"queries": [{...tham số như /api/search...}, ...]} hoặc một list truy vấn.
+    Mọi truy vấn chạy trên cùng một bản danh mục; truy vấn trùng nhau chỉ chạy một lần.
+    """
+    payload = request.get_json(silent=True)
+    queries = payload.get('queries') if isinstance(payload, dict) else payload
+    if not isinstance(queries, list) or not all(isinstance(q, dict) for q in queries):
+        return jsonify({'error': 'Body phải là {"queries": [{...}, ...]}'}), 400
+    if len(queries) > MAX_BATCH:
+        return jsonify({'error': f'Tối đa {MAX_BATCH} truy vấn mỗi lần'}), 400
+
+    keys = [search_key(q) for q in queries]
+
+    def render(catalog):
+        done = {}
+        results = []
+        for key, query in zip(keys, queries):
+            if key not in done:
+                done[key] = search_result(catalog, query)
+            results.append(done[key])
+        return {'results': results}
+
+    return json_response(keys, render, [parse_search(q) for q in queries])
+
+
+@app.route('/api/recommend', methods=['POST'])
+def api_recommend():
+    """
+    Body: {"location", "budget", "min_stars", "pool", "buffet", ..., "text", "top_k"}
+    -> các khách sạn điểm cao nhất (calculate_scores_and_explain) + lời giải thích
+    """
+    prefs = request.get_json(silent=True)
+    if not isinstance(prefs, dict):
+        return jsonify({'error': 'Body phải là một object sở thích'}), 400
+    top_k = min(max(_to_number(prefs.get('top_k'), int, 3), 1), MAX_PER_PAGE)
+    catalog = catalog_manager.current
+    ranked, explanation = recommendation_service.recommend(prefs, top_k=top_k)
+    hotels = []
+    for h in ranked:
+        score = h.get('recommend_score')
+        hotels.append(dict(hotel_summary(catalog.get(h.get('name')) or h), score=score if score == score else None))
+    return jsonify({'hotels': hotels, 'explanation': explanation})
+
+
+@app.route('/api/availability/<name>', methods=['GET'])
+def api_availability(name):
+    """Số phòng trống từng loại cho ?checkin=YYYY-MM-DD&nights=N (null = không giới hạn)"""
+    checkin, nights = parse_stay(request.args)
+    if not checkin:
+        return jsonify({'error': 'Thiếu hoặc sai tham số checkin (YYYY-MM-DD)'}), 400
+    if catalog_manager.current.get(name) is None:
+        return jsonify({'error': 'Không tìm thấy khách sạn'}), 404
+    return jsonify({
+        'hotel': name,
+        'checkin': checkin,
+        'nights': nights,
+        'rooms': booking_engine.calendar.hotel_availability(name, checkin, nights),
+    })
 
 
 # === TRANG CHI TIẾT KHÁCH SẠN ===
 @app.route('/hotel/<name>')
 def hotel_detail(name):
-    hotel_data = hotels[hotels['name'] == name]
-    if hotel_data.empty:
+    catalog = catalog_manager.current
+    hotel = catalog.get(name)
+    if hotel is None:
         return "<h3>Không tìm thấy khách sạn!</h3>", 404, {'Content-Type': 'text/html; charset=utf-8'}
 
-    hotel = map_hotel_row(hotel_data.iloc[0].to_dict())
-    reviews_df_local = read_csv_safe(REVIEWS_CSV)
-    hotel_reviews = reviews_df_local[reviews_df_local['hotel_name'] == name].to_dict(orient='records')
-
-    avg_rating = (
-        round(sum(int(r['rating']) for r in hotel_reviews) / len(hotel_reviews), 1)
-        if hotel_reviews else hotel.get('rating', 'Chưa có')
+    with metrics.span('reviews_refresh'):
+        review_store.refresh()  # chỉ đọc phần mới nếu file đổi
+    prices = pricer.version()  # giá phòng đổi theo ngày và lịch phòng
+    versions = (catalog.version, review_store.version, prices)
+    detail_cache.bind(versions)
+
+    def render():
+        html = detail_cache.get((versions, name))
+        if html is None:
+            with metrics.span('render'):
+                html = detail_cache.put((versions, name), render_detail(catalog, hotel, name))
+        return html
+
+    # không gửi Last-Modified: giá phòng đổi theo ngày và lịch phòng, không có mốc thời gian sửa
+    return responder.respond(
+        make_etag('hotel', catalog.signature, review_store.signature, prices, TEMPLATE_VERSION, name),
+        render
     )
 
+
+def room_offers(catalog, name, checkin=None, nights=1):
+    """Ba loại phòng kèm giá mỗi đêm (giá động) cho trang chi tiết / chọn phòng"""
+    prices = pricer.room_prices(catalog, name, checkin, nights)
+    return [
+        {"type": room_type, "price": prices.get(room_type, 0), "desc": ROOM_DESCRIPTIONS[room_type]}
+        for room_type in ROOM_TYPES
+    ]
+
+
+def render_detail(catalog, hotel, name):
+    hotel_reviews = review_store.for_hotel(name)
+
+    avg_rating = review_store.avg_rating(name)
+    if avg_rating is None:
+        avg_rating = hotel.get('rating', 'Chưa có')
+
     features = {
         "Buffet": yes_no_icon(hotel.get("buffet")),
         "Bể bơi": yes_no_icon(hotel.get("pool")),
@@ -161,20 +584,14 @@ def hotel_detail(name):
         "View biển": yes_no_icon(hotel.get("view")),
     }
 
-    rooms = [
-        {"type": "Phòng nhỏ", "price": round(float(hotel.get('price', 0)) * 1.0)},
-        {"type": "Phòng đôi", "price": round(float(hotel.get('price', 0)) * 1.5)},
-        {"type": "Phòng tổng thống", "price": round(float(hotel.get('price', 0)) * 2.5)},
-    ]
-
     return render_template(
         'detail.html',
         hotel=hotel,
         features=features,
-        rooms=rooms,
+        rooms=room_offers(catalog, name),
         reviews=hotel_reviews,
         avg_rating=avg_rating
-    ), 200, {'Content-Type': 'text/html; charset=utf-8'}
+    )
 
 
 # === GỬI ĐÁNH GIÁ ===
@@ -184,77 +601,190 @@ def add_review(name):
     rating = int(request.form.get('rating', 0))
     comment = request.form.get('comment', '').strip()
 
-    new_review = pd.DataFrame([{
-        "hotel_name": name,
-        "user": user,
-        "rating": rating,
-        "comment": comment
-    }])
-
-    df = read_csv_safe(REVIEWS_CSV)
-    df = pd.concat([df, new_review], ignore_index=True)
-    df.to_csv(REVIEWS_CSV, index=False, encoding="utf-8-sig")
+    with metrics.span('review_append'):
+        review_store.add(name, user, rating, comment)
 
     return redirect(url_for('hotel_detail', name=name))
 
 
 # === TRANG CHỌN LOẠI PHÒNG ===
+ROOM_DESCRIPTIONS = {
+    "Phòng nhỏ": "Phòng nhỏ gọn, tiện nghi, phù hợp 1 người.",
+    "Phòng đôi": "Phòng đôi, view đẹp, phù hợp cặp đôi.",
+    "Phòng tổng thống": "Phòng sang trọng, có hồ bơi riêng, dịch vụ cao cấp.",
+}
+
+
 @app.route('/book/<name>')
 def book_page(name):
-    hotel_data = hotels[hotels['name'] == name]
-    if hotel_data.empty:
+    catalog = catalog_manager.current
+    hotel = catalog.get(name)
+    if hotel is None:
         return "<h3>Không tìm thấy khách sạn!</h3>", 404, {'Content-Type': 'text/html; charset=utf-8'}
 
-    hotel = map_hotel_row(hotel_data.iloc[0].to_dict())
-
-    rooms = [
-        {"type": "Phòng nhỏ", "price": float(hotel.get("price", 0)), "desc": "Phòng nhỏ gọn, tiện nghi, phù hợp 1 người."},
-        {"type": "Phòng đôi", "price": float(hotel.get("price", 0)) * 1.5, "desc": "Phòng đôi, view đẹp, phù hợp cặp đôi."},
-        {"type": "Phòng tổng thống", "price": float(hotel.get("price", 0)) * 3, "desc": "Phòng sang trọng, có hồ bơi riêng, dịch vụ cao cấp."}
-    ]
+    checkin, nights = parse_stay(request.args)  # không có ngày -> giá đêm nay
+    rooms = room_offers(catalog, name, checkin or None, nights)
     return render_template('book.html', hotel=hotel, rooms=rooms), 200, {'Content-Type': 'text/html; charset=utf-8'}
 
 
 # === TRANG ĐẶT PHÒNG ===
 @app.route('/booking/<name>/<room_type>', methods=['GET', 'POST'])
 def booking(name, room_type):
-    hotel_data = hotels[hotels['name'] == name]
-    if hotel_data.empty:
+    catalog = catalog_manager.current
+    hotel = catalog.get(name)
+    if hotel is None:
         return "<h3>Không tìm thấy khách sạn!</h3>", 404, {'Content-Type': 'text/html; charset=utf-8'}
-
-    hotel = map_hotel_row(hotel_data.iloc[0].to_dict())
+    if room_type not in ROOM_TYPES:
+        return "<h3>Không có loại phòng này!</h3>", 404, {'Content-Type': 'text/html; charset=utf-8'}
 
     if request.method == 'POST':
+        nights = _to_number(request.form.get('nights'), int, 1)
+        try:
+            # giá mỗi đêm (trung bình cả kỳ) tính ở server, không lấy từ form
+            with metrics.span('pricing'):
+                price = pricer.room_prices(catalog, name, request.form['checkin'], nights)[room_type]
+        except ValueError as e:
+            return f"<h3>Ngày nhận phòng / số đêm không hợp lệ: {e}</h3>", 400, {'Content-Type': 'text/html; charset=utf-8'}
         info = {
             "hotel_name": name,
             "room_type": room_type,
-            "price": float(request.form.get('price', hotel.get('price', 0))),
+            "price": float(price),
             "user_name": request.form['fullname'],
             "phone": request.form['phone'],
             "email": request.form.get('email', ''),
             "num_adults": int(request.form.get('adults', 1)),
             "num_children": int(request.form.get('children', 0)),
             "checkin_date": request.form['checkin'],
-            "nights": 1,
+            "nights": nights,
             "special_requests": request.form.get('note', ''),
-            "booking_time": datetime.now().isoformat()
+            "booking_time": datetime.now().isoformat(),
+            # email trùng tài khoản trong users.csv: cộng vào chi tiêu của tài khoản đó
+            "username": booking_engine.account_for(request.form.get('email', '')),
         }
 
-        df = pd.read_csv(BOOKINGS_CSV, encoding="utf-8-sig")
-        df = pd.concat([df, pd.DataFrame([info])], ignore_index=True)
-        df.to_csv(BOOKINGS_CSV, index=False, encoding="utf-8-sig")
+        try:
+            with metrics.span('reserve'):
+                info = booking_engine.reserve_room(info)
+        except RoomUnavailableError:
+            return "<h3>Khách sạn đã hết phòng trong thời gian này!</h3>", 409, {'Content-Type': 'text/html; charset=utf-8'}
+        except ValueError as e:
+            return f"<h3>Ngày nhận phòng / số đêm không hợp lệ: {e}</h3>", 400, {'Content-Type': 'text/html; charset=utf-8'}
 
         return render_template('success.html', info=info), 200, {'Content-Type': 'text/html; charset=utf-8'}
 
     return render_template('booking.html', hotel=hotel, room_type=room_type), 200, {'Content-Type': 'text/html; charset=utf-8'}
 
 
+# === LỊCH SỬ ĐẶT PHÒNG ===
+@app.route('/history')
+def history():
+    """
+    Khách phải nhập đúng cặp mã đặt phòng + số điện thoại / email; khi đó chỉ thấy các booking
+    cùng thông tin liên hệ đã xác minh, và không bao giờ thấy mã đặt phòng.
+    Mọi tra cứu đi thẳng vào chỉ mục trong hotel.db, không đọc cả bảng.
+    """
+    args = request.args
+    code, contact = args.get('code', '').strip(), args.get('contact', '').strip()
+
+    if find_checkin_booking(code, contact) is not None:
+        by_email = '@' in contact
+        bookings = booking_engine.find_bookings(
+            email=contact if by_email else None,
+            phone=None if by_email else contact,
+        )
+    else:
+        bookings = []
+
+    return render_template(
+        'history.html', bookings=bookings, code=code, contact=contact, user=None
+    ), 200, {'Content-Type': 'text/html; charset=utf-8'}
+
+
+# === NHẬN PHÒNG ===
+CHECKED_IN_STATUS = "Đã nhận phòng"
+
+
+def find_checkin_booking(code, contact):
+    """Booking theo mã (tra khóa duy nhất) nếu số điện thoại / email khớp, ngược lại None"""
+    booking = booking_engine.get_booking(code.strip()) if code and contact else None
+    if booking is None:
+        return None
+    contact = contact.strip().lower()
+    owners = {str(booking.get(k) or '').strip().lower() for k in ('phone', 'email', 'user_email')}
+    return booking if contact in owners else None
+
+
+@app.route('/checkin', methods=['GET', 'POST'])
+def checkin():
+    values = request.form if request.method == 'POST' else request.args
+    code, contact = values.get('code', ''), values.get('contact', '')
+    booking = find_checkin_booking(code, contact)
+
+    if request.method == 'POST':
+        if booking is None:
+            flash("Không tìm thấy đặt phòng khớp mã và thông tin liên hệ!", "danger")
+        else:
+            try:
+                booking_engine.set_status(booking['booking_code'], CHECKED_IN_STATUS)
+            except RoomUnavailableError:  # booking đã hủy, phòng trong kỳ lưu trú đã kín
+                flash("Khách sạn đã hết phòng trong thời gian của booking này!", "danger")
+            else:
+                flash(f"Đã nhận phòng cho booking {booking['booking_code']}.", "success")
+        return redirect(url_for('checkin', code=code, contact=contact))
+
+    return render_template(
+        'checkin.html', booking=booking, code=code, contact=contact, checked_in_status=CHECKED_IN_STATUS
+    ), 200, {'Content-Type': 'text/html; charset=utf-8'}
+
+
+# === SỐ LIỆU HIỆU NĂNG (Prometheus) ===
+def scrape_metrics():
+    """Số liệu đọc lúc scrape: thống kê các cache, danh mục hiện hành"""
+    caches = {
+        'card': card_cache,
+        'recommend': recommend_cache,
+        'detail': detail_cache,
+        'http': responder.cache,
+        'occupancy': pricer.occupancy_cache,
+        'recommendation': recommendation_service.cache,
+    }
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    catalog = catalog_manager.current
+
+    def per_cache(field):
+        return [({'cache': name}, s[field]) for name, s in stats.items()]
+
+    return [
+        ('cache_hits_total', 'counter', 'Số lần trúng cache', per_cache('hits')),
+        ('cache_misses_total', 'counter', 'Số lần trượt cache', per_cache('misses')),
+        ('cache_evictions_total', 'counter', 'Số mục bị đẩy khỏi cache', per_cache('evictions')),
+        ('cache_entries', 'gauge', 'Số mục đang giữ trong cache', per_cache('entries')),
+        ('catalog_rows', 'gauge', 'Số khách sạn trong danh mục hiện hành', [({}, len(catalog.records))]),
+        ('catalog_version', 'gauge', 'Phiên bản danh mục (tăng mỗi lần nạp lại)', [({}, catalog.version)]),
+    ]
+
+
+metrics.add_collector(scrape_metrics)
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 # === TRANG GIỚI THIỆU ===
 @app.route('/about')
 def about_page():
     return render_template('about.html'), 200, {'Content-Type': 'text/html; charset=utf-8'}
 
 
+# === CHATBOT ===
+@app.route('/chatbot')
+def chatbot_page():
+    """Giao diện chat; tin nhắn đi qua /api/chat/stream (chat_asgi.py, reverse proxy chuyển sang)"""
+    return render_template('chatbot.html'), 200, {'Content-Type': 'text/html; charset=utf-8'}
+
+
 # === KHỞI ĐỘNG ===
 if __name__ == '__main__':
     app.run(debug=True)
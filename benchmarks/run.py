@@ -0,0 +1,360 @@
+# benchmarks/run.py
+"""
+Benchmark tái lập được trên dữ liệu giả lập (benchmarks/synthetic_data.py).
+
+    python -m benchmarks.run --rows 1000 10000 100000 --out bench.json
+    python -m benchmarks.run --compare bench-truoc.json bench.json
+
+Mỗi cỡ dữ liệu chạy trong một tiến trình riêng (thư mục tạm làm thư mục làm việc của app),
+nên bộ nhớ đỉnh / cache của cỡ này không lẫn sang cỡ khác.
+Kết quả JSON: thời gian khởi động, và với từng phép đo: số lượt, lượt/giây,
+độ trễ p50 / p90 / p99 / max (ms), bộ nhớ Python cấp phát thêm tối đa (tracemalloc, MB).
+cold_start: nạp hotels.csv trong tiến trình mới — parse CSV, snapshot lần đầu (parse + ghi),
+snapshot đã có — kèm RSS tăng thêm và phần RSS là trang file dùng chung (vùng mmap, chỉ Linux).
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MIN_TIME = 1.0       # giây đo tối thiểu cho mỗi phép đo
+MIN_ITERATIONS = 5
+MAX_ITERATIONS = 2000
+MEMORY_ITERATIONS = 3  # số lượt chạy lại dưới tracemalloc (chậm) để lấy bộ nhớ đỉnh
+REGRESSION_THRESHOLD = 0.2
+COLD_START_MODES = ("parse", "snapshot_miss", "snapshot_hit")  # chạy theo thứ tự này
+COLD_SNAPSHOT_DIR = ".snapshots-cold"  # riêng cho phép đo, không dùng chung snapshot app đã ghi
+
+# truy vấn xoay vòng: lượt i dùng phần tử i % len
+SEARCH_QUERIES = [
+    "location=Hanoi",
+    "location=Da Nang&budget=1500000&pool=1",
+    "stars=4&sort=asc",
+    "location=Nha Trang&sea=1&sort=desc",
+    "budget=800000&buffet=1&view=1",
+    "",
+]
+TEXT_QUERIES = ["yen tinh", "sạch sẽ", "gần biển", "nhân viên thân thiện", "buffet"]
+CHAT_MESSAGES = [
+    "Tôi muốn tìm khách sạn yên tĩnh gần biển ở Nha Trang cho gia đình",
+    "Mình đang buồn, muốn đi đâu đó thư giãn cuối tuần",
+    "Cần khách sạn giá rẻ gần trung tâm Hà Nội để đi công tác",
+    "Đi trăng mật ở Đà Lạt, có view đẹp và lãng mạn",
+    "Khách sạn có hồ bơi và buffet sáng cho trẻ em",
+]
+SCORE_PREFS = [
+    {"pool": True, "text": "yên tĩnh gần biển"},
+    {"buffet": True, "min_stars": 3, "text": "giá rẻ"},
+    {"view": True, "text_query": "dịch vụ thân thiện, đánh giá tốt"},
+    {"sea": True, "pool": True, "text": "biển"},
+]
+WEATHERS = ["sunny", "rain", "cold", "default"]
+
+
+# === ĐO ===
+def percentile_ms(samples_ns, q):
+    return float(np.percentile(samples_ns, q)) / 1e6
+
+
+def measure(fn, min_time=MIN_TIME, max_iterations=MAX_ITERATIONS):
+    """Gọi fn(i) tới khi đủ min_time giây (tối thiểu MIN_ITERATIONS lượt), rồi đo bộ nhớ riêng"""
+    fn(0)  # làm nóng: import muộn, dựng chỉ mục dùng chung
+    samples = []
+    started = time.perf_counter_ns()
+    deadline = started + int(min_time * 1e9)
+    i = 1
+    while i <= max_iterations and (len(samples) < MIN_ITERATIONS or time.perf_counter_ns() < deadline):
+        t = time.perf_counter_ns()
+        fn(i)
+        samples.append(time.perf_counter_ns() - t)
+        i += 1
+    total = sum(samples)
+
+    # tracemalloc làm chậm mọi lần cấp phát nên không bật trong lúc đo thời gian
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for k in range(MEMORY_ITERATIONS):
+        fn(i + k)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    return {
+        "iterations": len(samples),
+        "total_s": round(total / 1e9, 4),
+        "ops_per_s": round(len(samples) / (total / 1e9), 2) if total else None,
+        "mean_ms": round(total / len(samples) / 1e6, 4),
+        "p50_ms": round(percentile_ms(samples, 50), 4),
+        "p90_ms": round(percentile_ms(samples, 90), 4),
+        "p99_ms": round(percentile_ms(samples, 99), 4),
+        "max_ms": round(max(samples) / 1e6, 4),
+        "peak_mem_mb": round(max(peak, 0) / 2**20, 3),
+    }
+
+
+def max_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (2**20 if sys.platform == "darwin" else 2**10), 1)  # macOS: byte, Linux: KB
+
+
+def current_rss_mb():
+    """(RSS, phần RSS là trang file dùng chung được giữa các tiến trình) hiện tại, MB; ngoài Linux -> (None, None)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident, shared = (int(v) for v in f.read().split()[1:3])
+    except (OSError, ValueError):
+        return None, None
+    page_mb = os.sysconf("SC_PAGE_SIZE") / 2**20
+    return round(resident * page_mb, 1), round(shared * page_mb, 1)
+
+
+def _delta(after, before):
+    return round(after - before, 1) if after is not None and before is not None else None
+
+
+def run_cold_start(data_dir, mode):
+    """
+    Nạp hotels.csv một lần trong tiến trình mới (mode: parse / snapshot_miss / snapshot_hit).
+    Sau khi nạp, băm mọi cột để các trang mmap thực sự vào RSS rồi mới đo bộ nhớ.
+    """
+    os.chdir(data_dir)
+    sys.path.insert(0, REPO_ROOT)
+    import pandas as pd
+    from modules.csv_snapshot import load_csv, read_csv_utf8  # import trước khi đo
+
+    if mode == "snapshot_miss":
+        shutil.rmtree(COLD_SNAPSHOT_DIR, ignore_errors=True)
+
+    rss_before, shared_before = current_rss_mb()
+    started = time.perf_counter()
+    if mode == "parse":
+        df = read_csv_utf8("hotels.csv")
+    else:
+        df = load_csv("hotels.csv", snapshot_dir=COLD_SNAPSHOT_DIR)
+    seconds = time.perf_counter() - started
+    pd.util.hash_pandas_object(df, index=False).sum()
+    rss, shared = current_rss_mb()
+    return {
+        "seconds": round(seconds, 3),
+        "rss_mb": _delta(rss, rss_before),
+        "shared_mb": _delta(shared, shared_before),
+    }
+
+
+# === CÁC PHÉP ĐO (chạy trong tiến trình con, thư mục làm việc = thư mục dữ liệu) ===
+def build_cases(app_module):
+    """tên -> hàm fn(i); import ở đây vì app đọc file theo thư mục làm việc ngay khi import"""
+    import AI
+    from modules.ai_chatbot_engine import AIChatbotEngine
+    from modules.recommend import calculate_scores_and_explain
+
+    app = app_module.app
+    client = app.test_client()
+    catalog = app_module.catalog_manager.current
+    names = [h.get("name") for h in catalog.records]
+    step = max(len(names) // 997, 1)  # rải đều trên danh mục, không chỉ đầu file
+    events_df = app_module.events_df
+    scorer = AI.ContextScorer(catalog.df, events_df)
+    chatbot = AIChatbotEngine()
+
+    def get(url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} -> {response.status_code}")
+        return response
+
+    def quiet(fn):
+        # calculate_scores_and_explain in log mỗi lượt: bỏ đi để không đo thời gian ghi terminal
+        def run(i):
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                return fn(i)
+        return run
+
+    return {
+        "read_csv_safe": lambda i: app_module.read_csv_safe("hotels.csv"),
+        "calculate_scores_and_explain": quiet(
+            lambda i: calculate_scores_and_explain(
+                catalog.df, SCORE_PREFS[i % len(SCORE_PREFS)], top_k=10, scorer=catalog.scorer
+            )
+        ),
+        "ai_context_scorer_build": lambda i: AI.ContextScorer(catalog.df, events_df),
+        "ai_score": lambda i: scorer.score(None, WEATHERS[i % len(WEATHERS)], None, None, 10, None),
+        "chatbot_process_user_message": lambda i: chatbot.process_user_message(
+            f"user-{i % 50}", CHAT_MESSAGES[i % len(CHAT_MESSAGES)]
+        ),
+        # xoay vòng 42 tổ hợp truy vấn x trang: lượt đầu render thật, sau đó trúng cache / ETag
+        "http_recommend": lambda i: get(
+            f"/recommend?{SEARCH_QUERIES[i % len(SEARCH_QUERIES)]}&page={i % 7 + 1}"
+        ),
+        "http_recommend_cached": lambda i: get("/recommend?location=Hanoi"),
+        "http_api_search": lambda i: get(
+            f"/api/search?{SEARCH_QUERIES[i % len(SEARCH_QUERIES)]}&page={i % 7 + 1}"
+        ),
+        "http_api_search_text": lambda i: get(
+            f"/api/search?q={TEXT_QUERIES[i % len(TEXT_QUERIES)]}&page={i % 3 + 1}"
+        ),
+        "http_hotel_detail": lambda i: get(f"/hotel/{names[(i * step) % len(names)]}"),
+    }
+
+
+def run_worker(data_dir, only=None, min_time=MIN_TIME):
+    os.chdir(data_dir)
+    sys.path.insert(0, REPO_ROOT)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        import app as app_module
+    result = {
+        "startup": {"seconds": round(time.perf_counter() - started, 3), "max_rss_mb": max_rss_mb()},
+        "cases": {},
+    }
+    cases = build_cases(app_module)
+    for name, fn in cases.items():
+        if only and name not in only:
+            continue
+        print(f"  - {name}", file=sys.stderr)
+        result["cases"][name] = measure(fn, min_time)
+    result["max_rss_mb"] = max_rss_mb()
+    return result
+
+
+# === ĐIỀU PHỐI ===
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(rows, seed, today, only, min_time, keep_dir=None):
+    from benchmarks.synthetic_data import generate
+
+    with tempfile.TemporaryDirectory(prefix=f"hotel-bench-{rows}-") as tmp:
+        data_dir = os.path.join(keep_dir, str(rows)) if keep_dir else tmp
+        started = time.perf_counter()
+        files = generate(data_dir, hotels=rows, seed=seed, today=today)
+        generate_s = round(time.perf_counter() - started, 3)
+
+        out = os.path.join(tmp, "result.json")
+        cmd = [sys.executable, "-m", "benchmarks.run", "--worker", data_dir, "--result", out,
+               "--min-time", str(min_time)]
+        if only:
+            cmd += ["--only", *only]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+        subprocess.run(cmd, cwd=REPO_ROOT, env=env, check=True)
+        with open(out, encoding="utf-8") as f:
+            result = json.load(f)
+
+        if not only or "cold_start" in only:
+            result["cold_start"] = {}
+            for mode in COLD_START_MODES:
+                subprocess.run(
+                    [sys.executable, "-m", "benchmarks.run", "--worker", data_dir, "--result", out,
+                     "--cold-start", mode],
+                    cwd=REPO_ROOT, env=env, check=True
+                )
+                with open(out, encoding="utf-8") as f:
+                    result["cold_start"][mode] = json.load(f)
+    return {"rows": rows, "files": files, "generate_s": generate_s, **result}
+
+
+def run_suite(sizes, seed=0, today=None, only=None, min_time=MIN_TIME, keep_dir=None):
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": __import__("pandas").__version__,
+            "seed": seed,
+            "today": today,
+        },
+        "runs": [],
+    }
+    for rows in sizes:
+        print(f"▶ {rows} dòng", file=sys.stderr)
+        report["runs"].append(run_size(rows, seed, today, only, min_time, keep_dir))
+    return report
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """
+    So sánh p50 của hai báo cáo theo (số dòng, phép đo).
+    Trả về danh sách dòng chậm đi quá threshold (0.2 = chậm hơn 20%).
+    """
+    old_cases = {(r["rows"], name): c for r in old["runs"] for name, c in r["cases"].items()}
+    regressions = []
+    print(f"{'rows':>8}  {'case':<32} {'p50 cũ':>10} {'p50 mới':>10} {'thay đổi':>9}")
+    for run in new["runs"]:
+        for name, case in run["cases"].items():
+            before = old_cases.get((run["rows"], name))
+            if not before or not before["p50_ms"]:
+                continue
+            change = case["p50_ms"] / before["p50_ms"] - 1
+            flag = " ⚠️" if change > threshold else ""
+            print(f"{run['rows']:>8}  {name:<32} {before['p50_ms']:>10.3f} {case['p50_ms']:>10.3f} {change:>+8.1%}{flag}")
+            if change > threshold:
+                regressions.append((run["rows"], name, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark danh mục / gợi ý / chatbot trên dữ liệu giả lập")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000],
+                        help="số khách sạn (= số đánh giá = số booking) mỗi lượt, ví dụ 1000 10000 1000000")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--today", default=None, help="ngày mốc của dữ liệu YYYY-MM-DD (mặc định hôm nay)")
+    parser.add_argument("--only", nargs="+", default=None, help="chỉ chạy các phép đo này")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="số giây đo tối thiểu mỗi phép đo")
+    parser.add_argument("--out", default=None, help="ghi báo cáo JSON ra file (mặc định: stdout)")
+    parser.add_argument("--keep-data", default=None, help="sinh dữ liệu vào thư mục này và giữ lại")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="so sánh hai báo cáo JSON")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    parser.add_argument("--cold-start", choices=COLD_START_MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        if args.cold_start:
+            result = run_cold_start(args.worker, args.cold_start)
+        else:
+            result = run_worker(args.worker, args.only, args.min_time)
+        with open(args.result, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return 0
+
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path, encoding="utf-8") as f:
+                reports.append(json.load(f))
+        regressions = compare(*reports, threshold=args.threshold)
+        return 1 if regressions else 0
+
+    report = run_suite(args.rows, args.seed, args.today, args.only, args.min_time, args.keep_data)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+# benchmarks/synthetic_data.py
+import argparse
+import os
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from modules.availability import ROOM_TYPES
+from modules.pricing import ROOM_MULTIPLIERS
+
+# thành phố -> (tên tiếng Việt, vĩ độ, kinh độ); khóa trùng cột city của hotels.csv thật
+CITIES = {
+    "Hanoi": ("Hà Nội", 21.03, 105.85),
+    "Da Nang": ("Đà Nẵng", 16.06, 108.22),
+    "Nha Trang": ("Nha Trang", 12.24, 109.19),
+    "Ho Chi Minh": ("TP. Hồ Chí Minh", 10.78, 106.70),
+    "Hue": ("Huế", 16.46, 107.59),
+    "Hoi An": ("Hội An", 15.88, 108.33),
+    "Da Lat": ("Đà Lạt", 11.94, 108.44),
+    "Phu Quoc": ("Phú Quốc", 10.22, 103.96),
+    "Vung Tau": ("Vũng Tàu", 10.35, 107.08),
+    "Sa Pa": ("Sa Pa", 22.34, 103.84),
+}
+
+NAME_PREFIXES = ["Golden", "Lotus", "Pearl", "Sunrise", "Riverside", "Royal", "Ocean", "Bamboo",
+                 "Silk", "Jade", "Saigon", "Lagoon", "Paradise", "Green", "Blue Sky", "Moonlight"]
+NAME_KINDS = ["Hotel", "Resort", "Homestay", "Boutique Hotel", "Villa", "Motel", "Suites", "Inn"]
+
+# câu mô tả ghép ngẫu nhiên: đủ từ khóa cho HotelScorer / tìm kiếm toàn văn (yên tĩnh, sạch sẽ, biển...)
+DESC_SENTENCES = [
+    "Khách sạn {name}, một khách sạn {stars} sao nằm tại trung tâm {city}, Việt Nam.",
+    "Vị trí cách trung tâm thành phố {km} km, thuận tiện di chuyển tới các điểm tham quan nổi tiếng.",
+    "Phòng ốc rộng rãi, sạch sẽ, trang bị đầy đủ tiện nghi hiện đại.",
+    "Không gian yên tĩnh, thích hợp cho gia đình và các cặp đôi muốn nghỉ dưỡng.",
+    "Nhân viên thân thiện, phục vụ chu đáo, hỗ trợ khách 24/7.",
+    "Bữa sáng buffet phong phú với nhiều món ăn Việt Nam và quốc tế.",
+    "Hồ bơi ngoài trời với tầm nhìn ra biển tuyệt đẹp.",
+    "Gần chợ đêm và phố đi bộ, dễ dàng khám phá ẩm thực địa phương.",
+    "Giá cả hợp lý, phù hợp cho khách du lịch bụi và công tác.",
+    "Có phòng gym, spa và dịch vụ đưa đón sân bay.",
+    "Ban công nhìn ra thành phố, đặc biệt lung linh vào buổi tối.",
+    "Khu vực hơi ồn vào cuối tuần nhưng cách âm tốt.",
+]
+
+REVIEW_COMMENTS = [
+    "khách sạn ok", "phòng sạch sẽ, nhân viên thân thiện", "vị trí đẹp, gần biển",
+    "yên tĩnh, ngủ rất ngon", "giá hơi mắc so với chất lượng", "bữa sáng ngon, nhiều món",
+    "wifi yếu, phòng hơi nhỏ", "view đẹp, sẽ quay lại", "dịch vụ tốt, check-in nhanh",
+    "hồ bơi sạch, rộng", "ồn ào vào ban đêm", "rất đáng tiền", "phòng cũ, cần sửa chữa",
+    "tuyệt vời, phù hợp cho gia đình", "nhân viên hỗ trợ nhiệt tình",
+]
+REVIEW_USERS = ["Huy", "Lan", "Minh", "Trang", "Nam", "Thảo", "Tuấn", "Ngọc", "Phương", "Quân", ""]
+
+LAST_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Vũ", "Đặng", "Bùi", "Đỗ", "Hồ"]
+FIRST_NAMES = ["Văn An", "Thị Bình", "Minh Châu", "Quốc Dũng", "Thu Hà", "Gia Huy", "Khánh Linh", "Đức Thành"]
+SPECIAL_REQUESTS = ["", "", "", "Phòng tầng cao", "Nhận phòng sớm", "Giường phụ cho trẻ em", "Không hút thuốc"]
+
+EVENT_NAMES = ["Lễ hội âm nhạc", "Lễ hội pháo hoa", "Hội chợ ẩm thực", "Giải chạy marathon",
+               "Lễ hội hoa", "Triển lãm nghệ thuật", "Lễ hội đèn lồng", "Beach Party"]
+SEASONS = {12: "winter", 1: "winter", 2: "winter", 3: "spring", 4: "spring", 5: "spring",
+           6: "summer", 7: "summer", 8: "summer", 9: "autumn", 10: "autumn", 11: "autumn"}
+
+
+def _pick(rng, values, n):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
+
+
+def hotel_names(n):
+    """Tên duy nhất, tất định theo n (bookings / reviews tham chiếu lại được)"""
+    return [
+        f"{NAME_PREFIXES[i % len(NAME_PREFIXES)]} {NAME_KINDS[(i // len(NAME_PREFIXES)) % len(NAME_KINDS)]} {i}"
+        for i in range(n)
+    ]
+
+
+def make_hotels(n, rng):
+    names = hotel_names(n)
+    cities = _pick(rng, list(CITIES), n)
+    stars = rng.integers(1, 6, n)
+    price = (rng.integers(3, 60, n) * 50_000 * (0.6 + 0.3 * stars)).round(-4)
+    rating = np.round(rng.uniform(2.5, 5.0, n), 1)
+
+    reviews = []
+    picks = rng.integers(0, len(DESC_SENTENCES), (n, 4))
+    kms = np.round(rng.uniform(0.1, 15, n), 1)
+    for i in range(n):
+        vn_city = CITIES[cities[i]][0]
+        body = " ".join(
+            DESC_SENTENCES[j].format(name=names[i], stars=f"{stars[i]}.0", city=vn_city, km=kms[i])
+            for j in dict.fromkeys([0, *picks[i].tolist()])
+        )
+        reviews.append(
+            f"\n<p style='font-size:18px; line-height:1.8; font-weight:bold; text-indent: 2em;'>\n{body}\n</p>\n"
+        )
+
+    flags = rng.random((n, 4)) < [0.5, 0.4, 0.3, 0.45]
+    return pd.DataFrame({
+        "name": names,
+        "city": cities,
+        "price": price.astype(int),
+        "stars": stars,
+        "rating": rating,
+        "image_url": [f"https://example.com/hotels/{i}.jpg" for i in range(n)],
+        "buffet": flags[:, 0],
+        "pool": flags[:, 1],
+        "sea": flags[:, 2],
+        "view": flags[:, 3],
+        "review": reviews,
+    })
+
+
+def make_reviews(n, hotels, rng):
+    rows = rng.integers(0, len(hotels), n)
+    ratings = rng.integers(1, 6, n).astype(float)
+    comments = _pick(rng, REVIEW_COMMENTS, n)
+    extra = _pick(rng, REVIEW_COMMENTS, n)
+    both = rng.random(n) < 0.3
+    return pd.DataFrame({
+        "hotel_name": hotels["name"].to_numpy()[rows],
+        "user": _pick(rng, REVIEW_USERS, n),
+        "rating": ratings,
+        "comment": np.where(both, comments + ", " + extra, comments),
+    })
+
+
+def make_bookings(n, hotels, rng, today=None):
+    today = today or date.today()
+    rows = rng.integers(0, len(hotels), n)
+    room = rng.integers(0, len(ROOM_TYPES), n)
+    price = hotels["price"].to_numpy(dtype=float)[rows] * ROOM_MULTIPLIERS[room]
+    names = [f"{a} {b}" for a, b in zip(_pick(rng, LAST_NAMES, n), _pick(rng, FIRST_NAMES, n))]
+    users = rng.integers(0, max(n // 5, 1), n)
+    checkin = [(today + timedelta(days=int(d))).isoformat() for d in rng.integers(-60, 180, n)]
+    booked_at = [
+        (datetime.combine(today, datetime.min.time()) - timedelta(minutes=int(m))).isoformat()
+        for m in rng.integers(0, 60 * 24 * 365, n)
+    ]
+    return pd.DataFrame({
+        "hotel_name": hotels["name"].to_numpy()[rows],
+        "room_type": np.asarray(ROOM_TYPES, dtype=object)[room],
+        "price": price,
+        "user_name": names,
+        "phone": [f"09{u:08d}" for u in users],
+        "email": [f"khach{u}@example.com" for u in users],
+        "num_adults": rng.integers(1, 4, n),
+        "num_children": rng.integers(0, 3, n),
+        "checkin_date": checkin,
+        "nights": rng.integers(1, 6, n),
+        "special_requests": _pick(rng, SPECIAL_REQUESTS, n),
+        "booking_time": booked_at,
+    })
+
+
+def make_events(n, rng, today=None):
+    today = today or date.today()
+    cities = _pick(rng, list(CITIES), n)
+    start = [today + timedelta(days=int(d)) for d in rng.integers(-30, 365, n)]
+    end = [d + timedelta(days=int(k)) for d, k in zip(start, rng.integers(0, 5, n))]
+    return pd.DataFrame({
+        "event_id": np.arange(1, n + 1),
+        "event_name": _pick(rng, EVENT_NAMES, n),
+        "city": cities,
+        "lat": [CITIES[c][1] for c in cities] + rng.normal(0, 0.02, n),
+        "lon": [CITIES[c][2] for c in cities] + rng.normal(0, 0.02, n),
+        "start_date": [d.isoformat() for d in start],
+        "end_date": [d.isoformat() for d in end],
+        "season": [SEASONS[d.month] for d in start],
+    })
+
+
+def generate(out_dir, hotels=1000, reviews=None, bookings=None, events=None, seed=0, today=None):
+    """
+    Ghi hotels.csv, reviews.csv, bookings.csv, events.csv (cùng cột với file thật) vào out_dir.
+    Mặc định reviews = bookings = hotels, events = hotels / 100 (tối thiểu 10).
+    Ngày nhận phòng / sự kiện tính quanh `today` (mặc định hôm nay);
+    cùng seed + cùng today -> cùng dữ liệu, để hai lần đo so sánh được với nhau.
+    Trả về dict số dòng từng file.
+    """
+    rng = np.random.default_rng(seed)
+    today = date.fromisoformat(today) if isinstance(today, str) else (today or date.today())
+    reviews = hotels if reviews is None else reviews
+    bookings = hotels if bookings is None else bookings
+    events = max(hotels // 100, 10) if events is None else events
+    os.makedirs(out_dir, exist_ok=True)
+
+    hotels_df = make_hotels(hotels, rng)
+    frames = {
+        "hotels.csv": hotels_df,
+        "reviews.csv": make_reviews(reviews, hotels_df, rng),
+        "bookings.csv": make_bookings(bookings, hotels_df, rng, today),
+        "events.csv": make_events(events, rng, today),
+    }
+    for filename, df in frames.items():
+        df.to_csv(os.path.join(out_dir, filename), index=False, encoding="utf-8-sig")
+    return {filename: len(df) for filename, df in frames.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sinh dữ liệu khách sạn giả lập cho benchmark")
+    parser.add_argument("out_dir")
+    parser.add_argument("--hotels", type=int, default=1000)
+    parser.add_argument("--reviews", type=int, default=None)
+    parser.add_argument("--bookings", type=int, default=None)
+    parser.add_argument("--events", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--today", default=None, help="ngày mốc YYYY-MM-DD (mặc định hôm nay)")
+    args = parser.parse_args()
+    print(generate(args.out_dir, args.hotels, args.reviews, args.bookings, args.events, args.seed, args.today))
@@ -0,0 +1,161 @@
+"""
+API chat bất đồng bộ (ASGI) cho AIChatbotEngine, chạy riêng với app Flask:
+
+    uvicorn chat_asgi:app --port 8001
+
+- POST /api/chat         {"message": "...", "user_token": "..."} -> JSON: response + insights rút gọn
+- POST /api/chat/stream  cùng body -> text/event-stream: `insights`, từng đoạn phản hồi `part`, `done`
+- GET  /api/chat/stats   số lô / số tin nhắn đã phân tích
+
+Danh tính người chat là user_token do server cấp (`<id>.<HMAC-SHA256(khóa bí mật, id)>`), trả về trong
+header `x-chat-token` và gửi lại trong body `user_token`; token thiếu / sai chữ ký thì cấp id mới, nên
+client không thể tự đặt user_id để đọc / ghi lịch sử hội thoại của người khác.
+
+Mỗi kết nối là một coroutine trên cùng event loop: client đọc chậm chỉ làm `await send` của nó
+chờ, không giữ luồng worker nào; phân tích chạy theo lô trong thread pool (modules/chat_service.py).
+Reverse proxy chuyển /api/chat* sang server này, các đường dẫn khác sang gunicorn (app.py).
+Trang /chatbot (templates/chatbot.html, phục vụ bởi app.py) đọc luồng /api/chat/stream bằng fetch.
+"""
+import hashlib
+import hmac
+import json
+import os
+import secrets
+
+from modules.ai_chatbot_engine import AIChatbotEngine
+from modules.chat_service import AsyncChatService
+from modules.conversation_memory import SQLiteConversationMemory
+from modules.secret_key import load_secret_key
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_MESSAGE_CHARS = 2000
+# cùng nguồn khóa với app Flask (SECRET_KEY hoặc file .secret_key chung)
+SECRET_KEY = load_secret_key().encode('utf-8')
+
+# CHAT_MEMORY_DB: dùng chung lịch sử hội thoại giữa các tiến trình (mặc định giữ trong bộ nhớ)
+_memory_db = os.environ.get("CHAT_MEMORY_DB")
+engine = AIChatbotEngine(memory=SQLiteConversationMemory(_memory_db) if _memory_db else None)
+chat = AsyncChatService(engine)
+
+
+class BadRequest(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        event = await receive()
+        if event['type'] == 'http.disconnect':
+            raise BadRequest('Client đã ngắt kết nối', 499)
+        body += event.get('body', b'')
+        if len(body) > MAX_BODY_BYTES:
+            raise BadRequest('Body quá lớn', 413)
+        if not event.get('more_body'):
+            return body
+
+
+def sign_user_id(user_id):
+    digest = hmac.new(SECRET_KEY, user_id.encode('utf-8'), hashlib.sha256).hexdigest()
+    return f"{user_id}.{digest}"
+
+
+def verify_user_token(token):
+    """user_id nếu token đúng chữ ký, ngược lại None"""
+    if not isinstance(token, str) or '.' not in token:
+        return None
+    user_id = token.rsplit('.', 1)[0]
+    return user_id if hmac.compare_digest(sign_user_id(user_id), token) else None
+
+
+async def read_message(scope, receive):
+    """(user_token, user_id, tin nhắn) từ body JSON; token không hợp lệ thì cấp user_id mới"""
+    try:
+        payload = json.loads(await read_body(receive) or b'{}')
+    except ValueError:
+        raise BadRequest('Body phải là JSON')
+    if not isinstance(payload, dict):
+        raise BadRequest('Body phải là một object')
+    message = str(payload.get('message') or '').strip()
+    if not message:
+        raise BadRequest('Thiếu message')
+    if len(message) > MAX_MESSAGE_CHARS:
+        raise BadRequest(f'Tin nhắn tối đa {MAX_MESSAGE_CHARS} ký tự')
+    token = payload.get('user_token')
+    user_id = verify_user_token(token)
+    if user_id is None:
+        user_id = secrets.token_urlsafe(12)
+        token = sign_user_id(user_id)
+    return token, user_id, message
+
+
+def token_header(token):
+    return [(b'x-chat-token', token.encode('ascii'))] if token else []
+
+
+async def send_json(send, data, status=200, token=None):
+    body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json; charset=utf-8'),
+                    (b'content-length', str(len(body)).encode())] + token_header(token),
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8')
+
+
+async def stream_reply(send, token, user_id, message):
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'text/event-stream; charset=utf-8'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no')] + token_header(token),  # nginx: không gom buffer
+    })
+    try:
+        async for event, data in chat.stream(user_id, message):
+            await send({'type': 'http.response.body', 'body': sse_event(event, data), 'more_body': True})
+    except Exception as e:  # header đã gửi: báo lỗi bằng một sự kiện
+        await send({'type': 'http.response.body', 'body': sse_event('error', {'error': str(e)}), 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def lifespan(receive, send):
+    while True:
+        event = await receive()
+        if event['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif event['type'] == 'lifespan.shutdown':
+            chat.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    path, method = scope['path'].rstrip('/'), scope['method']
+    try:
+        if path == '/api/chat/stats' and method == 'GET':
+            return await send_json(send, chat.stats())
+        if path not in ('/api/chat', '/api/chat/stream'):
+            return await send_json(send, {'error': 'Không tìm thấy'}, 404)
+        if method != 'POST':
+            return await send_json(send, {'error': 'Chỉ hỗ trợ POST'}, 405)
+
+        token, user_id, message = await read_message(scope, receive)
+        if path == '/api/chat/stream':
+            return await stream_reply(send, token, user_id, message)
+        return await send_json(send, dict(await chat.reply(user_id, message), user_token=token), token=token)
+    except BadRequest as e:
+        if e.status != 499:
+            await send_json(send, {'error': str(e)}, e.status)
@@ -1,55 +1,135 @@
+import argparse
+import time
+
 import pandas as pd
-import sqlite3
-
-# ---- ??c d? li?u CSV ----
-csv_file = "hotels.csv"   # ??t file CSV c?a b?n cng th? m?c v?i file Python
-df = pd.read_csv(csv_file)
-
-# ---- K?t n?i / t?o database ----
-conn = sqlite3.connect("hotel.db")
-cursor = conn.cursor()
-
-# ---- T?o b?ng (n?u ch?a c) ----
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS hotels (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT,
-    city TEXT,
-    price REAL,
-    stars INTEGER,
-    rating REAL,
-    image_url TEXT,
-    buffet BOOLEAN,
-    pool BOOLEAN,
-    sea BOOLEAN,
-    view BOOLEAN,
-    review TEXT
+
+from modules.availability import sync_capacity
+from modules.hotel_db import (
+    DEFAULT_ROOMS_AVAILABLE, HOTEL_COLUMNS, HOTEL_TYPES, ensure_schema, get_connection, hotel_values, transaction,
 )
-""")
-
-# ---- Xa d? li?u c? ----
-cursor.execute("DELETE FROM hotels")
-
-# ---- Chn d? li?u t? CSV vo database ----
-for _, row in df.iterrows():
-    cursor.execute("""
-        INSERT INTO hotels (name, city, price, stars, rating, image_url, buffet, pool, sea, view, review)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        row["name"],
-        row["city"],
-        float(row["price"]),
-        int(row["stars"]),
-        float(row["rating"]),
-        row["image_url"],
-        bool(row["buffet"]),
-        bool(row["pool"]),
-        bool(row["sea"]),
-        bool(row["view"]),
-        row["review"]
-    ))
-
-conn.commit()
-conn.close()
-
-print(f" ? nh?p {len(df)} khach san tu '{csv_file}' vao database 'hotel.db'")
+
+CHUNK_SIZE = 50_000
+
+# Cột không ghi đè khi upsert: tồn phòng đang được trừ bởi BookingEngine
+KEEP_ON_UPDATE = {"rooms_available"}
+
+HOTEL_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_hotels_city ON hotels(city);
+CREATE INDEX IF NOT EXISTS idx_hotels_price ON hotels(price);
+CREATE INDEX IF NOT EXISTS idx_hotels_stars ON hotels(stars);
+"""
+
+
+def build_upsert(reset_inventory=False, present=None):
+    """
+    INSERT ... ON CONFLICT(name): chỉ UPDATE khi có cột thực sự thay đổi.
+    present: các cột có trong CSV; cột thiếu chỉ nhận NULL khi chèn mới,
+    không ghi đè giá trị đang có (None = mọi cột)
+    """
+    cols = ", ".join(HOTEL_COLUMNS)
+    marks = ", ".join("?" for _ in HOTEL_COLUMNS)
+    update_cols = [
+        c for c in HOTEL_COLUMNS
+        if c != "name" and (reset_inventory or c not in KEEP_ON_UPDATE)
+        and (present is None or c in present)
+    ]
+    if not update_cols:
+        return f"INSERT INTO hotels ({cols}) VALUES ({marks}) ON CONFLICT(name) DO NOTHING"
+    assignments = ", ".join(f"{c} = excluded.{c}" for c in update_cols)
+    changed = " OR ".join(f"hotels.{c} IS NOT excluded.{c}" for c in update_cols)
+    return (
+        f"INSERT INTO hotels ({cols}) VALUES ({marks}) "
+        f"ON CONFLICT(name) DO UPDATE SET {assignments} WHERE {changed}"
+    )
+
+
+def import_hotels(csv_file, db_path="hotel.db", chunk_size=CHUNK_SIZE,
+                  reset_inventory=False, prune=False):
+    """
+    Nạp CSV vào bảng hotels theo từng chunk (executemany) trong một giao dịch.
+    Trả về dict thống kê: rows, inserted, updated, unchanged, pruned, seconds.
+    """
+    started = time.perf_counter()
+    conn = get_connection(db_path)
+    ensure_schema(conn)
+    conn.execute("PRAGMA cache_size=-262144")  # 256MB cho lượt nạp lớn
+    upsert = None
+
+    rows = inserted = updated = pruned = 0
+    with transaction(conn):
+        before = conn.execute("SELECT COUNT(*) FROM hotels").fetchone()[0]
+        if prune:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS import_names (name TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM import_names")
+
+        # cột chữ đọc dạng str, cột số/bool để parser C tự nhận kiểu
+        text_cols = {c: str for c in HOTEL_COLUMNS if c not in HOTEL_TYPES}
+        reader = pd.read_csv(csv_file, encoding="utf-8-sig", dtype=text_cols, chunksize=chunk_size)
+        for chunk in reader:
+            chunk.columns = chunk.columns.str.strip()
+            if "name" not in chunk.columns and "Name" in chunk.columns:
+                chunk = chunk.rename(columns={"Name": "name"})
+            chunk = chunk.dropna(subset=["name"]).drop_duplicates(subset=["name"], keep="last")
+            if upsert is None:
+                upsert = build_upsert(reset_inventory, present=set(chunk.columns))
+
+            values = hotel_values(chunk)
+            changes = conn.total_changes
+            conn.executemany(upsert, values)
+            updated += conn.total_changes - changes
+            rows += len(values)
+
+            if prune:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO import_names (name) VALUES (?)",
+                    ((v[0],) for v in values)
+                )
+
+        if prune:
+            pruned = conn.execute(
+                "DELETE FROM hotels WHERE name NOT IN (SELECT name FROM import_names)"
+            ).rowcount
+
+        inserted = conn.execute("SELECT COUNT(*) FROM hotels").fetchone()[0] - before + pruned
+        updated -= inserted
+        # CSV không có rooms_available: khách sạn mới nhận sức chứa mặc định, không phải "không giới hạn"
+        sync_capacity(conn, (), DEFAULT_ROOMS_AVAILABLE)
+        for statement in HOTEL_INDEXES.strip().split(";"):
+            if statement.strip():
+                conn.execute(statement)
+
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": rows - inserted - updated,
+        "pruned": pruned,
+        "seconds": seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nhập danh sách khách sạn từ CSV vào hotel.db")
+    parser.add_argument("csv_file", nargs="?", default="hotels.csv")
+    parser.add_argument("--db", default="hotel.db")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--reset-inventory", action="store_true",
+                        help="ghi đè rooms_available theo CSV cho khách sạn đã có")
+    parser.add_argument("--prune", action="store_true",
+                        help="xóa khách sạn không còn trong CSV")
+    args = parser.parse_args()
+
+    stats = import_hotels(args.csv_file, args.db, args.chunk_size,
+                          reset_inventory=args.reset_inventory, prune=args.prune)
+    rate = stats["rows"] / stats["seconds"] if stats["seconds"] else 0
+    print(
+        f"✅ Đã nhập {stats['rows']} khách sạn từ '{args.csv_file}' vào '{args.db}': "
+        f"{stats['inserted']} mới, {stats['updated']} cập nhật, "
+        f"{stats['unchanged']} không đổi, {stats['pruned']} đã xóa "
+        f"— {stats['seconds']:.2f}s ({rate:,.0f} dòng/giây)"
+    )
+
+
+if __name__ == "__main__":
+    main()
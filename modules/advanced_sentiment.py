@@ -1,6 +1,86 @@
 import re
 from collections import Counter
 
+from modules.keyword_matcher import KeywordMatcher
+
+# === BẢNG TỪ KHÓA (dùng chung với automaton của AIChatbotEngine) ===
+SENTIMENT_KEYWORDS = {
+    'positive': ['vui', 'tốt', 'tuyệt', 'thích', 'happy', 'good', 'cám ơn', 'thanks'],
+    'negative': ['buồn', 'tệ', 'xấu', 'ghét', 'sad', 'bad', 'huhu', 'tiếc', 'không thích']
+}
+
+EMOTION_KEYWORDS = {
+    'sadness': ['buồn', 'huhu', 'khóc', 'thất vọng', 'chia tay', 'mất'],
+    'joy': ['vui', 'happy', 'phấn khích', 'tuyệt vời', 'thích'],
+    'anger': ['tức', 'giận', 'bực', 'khó chịu', 'tức giận'],
+    'fear': ['sợ', 'lo', 'hoảng', 'bất an', 'lo lắng'],
+    'surprise': ['ôi', 'wow', 'bất ngờ', 'ngạc nhiên']
+}
+
+URGENCY_KEYWORDS = {
+    'high': ['gấp', 'ngay', 'khẩn cấp', 'cần ngay', 'nhanh', 'lập tức'],
+    'medium': ['sớm', 'tuần sau', 'tháng sau', 'kế hoạch', 'dự định'],
+    'low': ['lúc nào cũng được', 'không vội', 'tương lai', 'khi nào rảnh']
+}
+
+NEED_PATTERNS = {
+    'relaxation': ['thư giãn', 'nghỉ ngơi', 'xả stress', 'mệt mỏi', 'căng thẳng'],
+    'celebration': ['kỷ niệm', 'sinh nhật', 'cưới', 'thành công', 'ăn mừng'],
+    'business': ['công tác', 'meeting', 'đối tác', 'dự án', 'work'],
+    'adventure': ['khám phá', 'trải nghiệm', 'mạo hiểm', 'mới lạ', 'phiêu lưu'],
+    'healing': ['chữa lành', 'tĩnh tâm', 'thiền', 'suy nghĩ', 'chia tay'],
+    'family': ['gia đình', 'con nhỏ', 'trẻ em', 'bố mẹ', 'ông bà'],
+    'romance': ['lãng mạn', 'người yêu', 'cặp đôi', 'tình nhân', 'anniversary']
+}
+
+SPECIAL_SCENARIOS = {
+    'room_unavailable': ['hết phòng', 'hết chỗ', 'full phòng', 'đầy phòng', 'không còn phòng', 'mất tiu'],
+    'price_concern': ['đắt quá', 'mắc quá', 'giá cao', 'over budget', 'đắt đỏ'],
+    'quality_concern': ['sạch không', 'vệ sinh', 'bẩn', 'dơ', 'đảm bảo', 'cam kết'],
+    'safety_concern': ['an toàn không', 'có an ninh', 'nguy hiểm', 'safe', 'security'],
+    'urgent_booking': ['gấp lắm', 'ngay bây giờ', 'khẩn cấp', 'cần ngay', 'lập tức']
+}
+
+QUALITY_CONCERNS = {
+    'cleanliness': {
+        'keywords': ['sạch không', 'vệ sinh', 'bẩn', 'dơ', 'clean', 'hygiene'],
+        'focus': 'housekeeping_standards',
+        'urgency': 'medium'
+    },
+    'safety': {
+        'keywords': ['an toàn không', 'có an ninh', 'nguy hiểm', 'safe', 'security'],
+        'focus': 'safety_measures', 
+        'urgency': 'high'
+    },
+    'service_quality': {
+        'keywords': ['nhân viên tốt không', 'dịch vụ', 'phục vụ', 'service', 'staff'],
+        'focus': 'service_standards',
+        'urgency': 'medium'
+    },
+    'facility_condition': {
+        'keywords': ['hồ bơi sạch', 'phòng cũ', 'thiết bị', 'facility', 'condition'],
+        'focus': 'maintenance',
+        'urgency': 'medium'
+    },
+    'direct_guarantee': {
+        'keywords': ['có đảm bảo không', 'bạn đảm bảo', 'cam kết', 'chắc chắn không'],
+        'focus': 'accountability',
+        'urgency': 'high'
+    }
+}
+
+SENTIMENT_TABLES = [
+    ('sentiment', SENTIMENT_KEYWORDS, False),
+    ('emotion', EMOTION_KEYWORDS, False),
+    ('urgency', URGENCY_KEYWORDS, False),
+    ('need', NEED_PATTERNS, False),
+    ('scenario', SPECIAL_SCENARIOS, False),
+    ('quality', {k: v['keywords'] for k, v in QUALITY_CONCERNS.items()}, False),
+]
+
+_matcher = KeywordMatcher(SENTIMENT_TABLES)
+
+
 class AdvancedSentimentAnalyzer:
     def __init__(self):
         self.sentiment_analyzer = None
@@ -10,20 +90,19 @@ class AdvancedSentimentAnalyzer:
         # Chỉ sử dụng phân tích đơn giản
         print("Using simple sentiment analysis for production")
     
-    def analyze_user_state(self, user_message):
+    def analyze_user_state(self, user_message, hits=None):
         """Phân tích cảm xúc và trạng thái người dùng - Production version"""
-        return self._simple_analysis(user_message)
+        return self._simple_analysis(user_message, hits)
     
-    def _simple_analysis(self, text):
+    def _simple_analysis(self, text, hits=None):
         """Phân tích đơn giản khi không có model"""
-        text_lower = text.lower()
+        # Quét từ khóa một lượt cho mọi bảng (hoặc dùng kết quả quét có sẵn)
+        if hits is None:
+            hits = _matcher.scan(text)
         
         # Basic sentiment detection
-        positive_words = ['vui', 'tốt', 'tuyệt', 'thích', 'happy', 'good', 'cám ơn', 'thanks']
-        negative_words = ['buồn', 'tệ', 'xấu', 'ghét', 'sad', 'bad', 'huhu', 'tiếc', 'không thích']
-        
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        positive_count = hits.distinct(('sentiment', 'positive'))
+        negative_count = hits.distinct(('sentiment', 'negative'))
         
         if positive_count > negative_count:
             sentiment = "positive"
@@ -35,116 +114,45 @@ class AdvancedSentimentAnalyzer:
         return {
             'sentiment': sentiment,
             'sentiment_score': 0.8,
-            'emotion': self._detect_emotion_simple(text_lower),
+            'emotion': self._detect_emotion_simple(text, hits),
             'emotion_score': 0.7,
-            'urgency': self._detect_urgency(text_lower),
-            'needs': self._extract_needs(text_lower),
-            'special_scenario': self._detect_special_scenario(text_lower)
+            'urgency': self._detect_urgency(text, hits),
+            'needs': self._extract_needs(text, hits),
+            'special_scenario': self._detect_special_scenario(text, hits)
         }
     
-    def _detect_emotion_simple(self, text_lower):
+    def _detect_emotion_simple(self, text, hits=None):
         """Phát hiện cảm xúc đơn giản"""
-        emotion_keywords = {
-            'sadness': ['buồn', 'huhu', 'khóc', 'thất vọng', 'chia tay', 'mất'],
-            'joy': ['vui', 'happy', 'phấn khích', 'tuyệt vời', 'thích'],
-            'anger': ['tức', 'giận', 'bực', 'khó chịu', 'tức giận'],
-            'fear': ['sợ', 'lo', 'hoảng', 'bất an', 'lo lắng'],
-            'surprise': ['ôi', 'wow', 'bất ngờ', 'ngạc nhiên']
-        }
-        
-        for emotion, keywords in emotion_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return emotion
-        return 'neutral'
+        if hits is None:
+            hits = _matcher.scan(text)
+        return hits.first('emotion', EMOTION_KEYWORDS) or 'neutral'
     
-    def _detect_urgency(self, text):
+    def _detect_urgency(self, text, hits=None):
         """Phát hiện mức độ khẩn cấp"""
-        text_lower = text.lower()
-        urgency_keywords = {
-            'high': ['gấp', 'ngay', 'khẩn cấp', 'cần ngay', 'nhanh', 'lập tức'],
-            'medium': ['sớm', 'tuần sau', 'tháng sau', 'kế hoạch', 'dự định'],
-            'low': ['lúc nào cũng được', 'không vội', 'tương lai', 'khi nào rảnh']
-        }
-        
-        for level, keywords in urgency_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return level
-        return 'medium'
+        if hits is None:
+            hits = _matcher.scan(text)
+        return hits.first('urgency', URGENCY_KEYWORDS) or 'medium'
     
-    def _extract_needs(self, text):
+    def _extract_needs(self, text, hits=None):
         """Trích xuất nhu cầu ẩn"""
-        text_lower = text.lower()
-        needs = []
-        
-        need_patterns = {
-            'relaxation': ['thư giãn', 'nghỉ ngơi', 'xả stress', 'mệt mỏi', 'căng thẳng'],
-            'celebration': ['kỷ niệm', 'sinh nhật', 'cưới', 'thành công', 'ăn mừng'],
-            'business': ['công tác', 'meeting', 'đối tác', 'dự án', 'work'],
-            'adventure': ['khám phá', 'trải nghiệm', 'mạo hiểm', 'mới lạ', 'phiêu lưu'],
-            'healing': ['chữa lành', 'tĩnh tâm', 'thiền', 'suy nghĩ', 'chia tay'],
-            'family': ['gia đình', 'con nhỏ', 'trẻ em', 'bố mẹ', 'ông bà'],
-            'romance': ['lãng mạn', 'người yêu', 'cặp đôi', 'tình nhân', 'anniversary']
-        }
-        
-        for need, patterns in need_patterns.items():
-            if any(pattern in text_lower for pattern in patterns):
-                needs.append(need)
-                
+        if hits is None:
+            hits = _matcher.scan(text)
+        needs = [need for need in NEED_PATTERNS if hits.has(('need', need))]
         return needs if needs else ['general_travel']
     
-    def _detect_special_scenario(self, text):
+    def _detect_special_scenario(self, text, hits=None):
         """Phát hiện các tình huống đặc biệt cần xử lý"""
-        text_lower = text.lower()
-        
-        special_scenarios = {
-            'room_unavailable': ['hết phòng', 'hết chỗ', 'full phòng', 'đầy phòng', 'không còn phòng', 'mất tiu'],
-            'price_concern': ['đắt quá', 'mắc quá', 'giá cao', 'over budget', 'đắt đỏ'],
-            'quality_concern': ['sạch không', 'vệ sinh', 'bẩn', 'dơ', 'đảm bảo', 'cam kết'],
-            'safety_concern': ['an toàn không', 'có an ninh', 'nguy hiểm', 'safe', 'security'],
-            'urgent_booking': ['gấp lắm', 'ngay bây giờ', 'khẩn cấp', 'cần ngay', 'lập tức']
-        }
-        
-        for scenario, keywords in special_scenarios.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return scenario
-        
-        return None
+        if hits is None:
+            hits = _matcher.scan(text)
+        return hits.first('scenario', SPECIAL_SCENARIOS)
     
-    def analyze_quality_concerns(self, user_message):
+    def analyze_quality_concerns(self, user_message, hits=None):
         """Phân tích các lo lắng về chất lượng dịch vụ"""
-        text_lower = user_message.lower()
-        
-        quality_concerns = {
-            'cleanliness': {
-                'keywords': ['sạch không', 'vệ sinh', 'bẩn', 'dơ', 'clean', 'hygiene'],
-                'focus': 'housekeeping_standards',
-                'urgency': 'medium'
-            },
-            'safety': {
-                'keywords': ['an toàn không', 'có an ninh', 'nguy hiểm', 'safe', 'security'],
-                'focus': 'safety_measures', 
-                'urgency': 'high'
-            },
-            'service_quality': {
-                'keywords': ['nhân viên tốt không', 'dịch vụ', 'phục vụ', 'service', 'staff'],
-                'focus': 'service_standards',
-                'urgency': 'medium'
-            },
-            'facility_condition': {
-                'keywords': ['hồ bơi sạch', 'phòng cũ', 'thiết bị', 'facility', 'condition'],
-                'focus': 'maintenance',
-                'urgency': 'medium'
-            },
-            'direct_guarantee': {
-                'keywords': ['có đảm bảo không', 'bạn đảm bảo', 'cam kết', 'chắc chắn không'],
-                'focus': 'accountability',
-                'urgency': 'high'
-            }
-        }
-        
-        for concern, data in quality_concerns.items():
-            if any(keyword in text_lower for keyword in data['keywords']):
-                return concern, data
+        if hits is None:
+            hits = _matcher.scan(user_message)
         
-        return None, None
+        concern = hits.first('quality', QUALITY_CONCERNS)
+        if concern is None:
+            return None, None
+        return concern, QUALITY_CONCERNS[concern]
 
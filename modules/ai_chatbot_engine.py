@@ -2,36 +2,31 @@
 from datetime import datetime
 
 class AIChatbotEngine:
-    def __init__(self):
-        from modules.advanced_sentiment import AdvancedSentimentAnalyzer
-        from modules.context_aware_recommender import ContextAwareRecommender
-        from modules.personality_analyzer import PersonalityAnalyzer
+    def __init__(self, memory=None):
+        """memory: ConversationMemory (mặc định) hoặc SQLiteConversationMemory để các worker dùng chung"""
+        from modules.advanced_sentiment import AdvancedSentimentAnalyzer, SENTIMENT_TABLES
+        from modules.context_aware_recommender import ContextAwareRecommender, CONTEXT_TABLES
+        from modules.personality_analyzer import PersonalityAnalyzer, PERSONALITY_TABLES
+        from modules.filter import FEATURE_TABLES
+        from modules.keyword_matcher import KeywordMatcher
+        from modules.conversation_memory import ConversationMemory
         
         self.sentiment_analyzer = AdvancedSentimentAnalyzer()
         self.context_recommender = ContextAwareRecommender()
         self.personality_analyzer = PersonalityAnalyzer()
-        self.conversation_memory = {}
+        self.conversation_memory = memory if memory is not None else ConversationMemory()
+        
+        # Một automaton cho mọi bảng từ khóa: mỗi tin nhắn chỉ quét một lượt
+        self.keyword_matcher = KeywordMatcher(
+            SENTIMENT_TABLES + CONTEXT_TABLES + PERSONALITY_TABLES + FEATURE_TABLES
+        )
     
     def process_user_message(self, user_id, message, conversation_history=None):
         """Xử lý tin nhắn với AI nâng cao"""
-        # Phân tích đa chiều
-        sentiment_analysis = self.sentiment_analyzer.analyze_user_state(message)
-        context_prediction = self.context_recommender.predict_travel_context(message)
-        personality_profile = self.personality_analyzer.analyze_personality_from_text(message)
-        
-        # Tổng hợp insights
-        user_insights = {
-            'sentiment': sentiment_analysis,
-            'context': context_prediction,
-            'personality': personality_profile,
-            'timestamp': datetime.now(),
-            'special_scenario': sentiment_analysis.get('special_scenario')
-        }
+        user_insights = self.analyze_message(message)
         
-        # Lưu vào memory
-        if user_id not in self.conversation_memory:
-            self.conversation_memory[user_id] = []
-        self.conversation_memory[user_id].append(user_insights)
+        # Lưu vào memory (ring buffer theo user, tự xóa user cũ)
+        self.conversation_memory.append(user_id, user_insights)
         
         # Tạo phản hồi thông minh
         response = self._generate_ai_response(user_insights, message)
@@ -42,8 +37,42 @@ class AIChatbotEngine:
             'recommendation_strategy': self._get_recommendation_strategy(user_insights)
         }
     
+    def analyze_message(self, message):
+        """Phân tích đa chiều một tin nhắn (chưa ghi memory)"""
+        from modules.filter import parse_features_from_text
+        
+        # Mọi bộ phân tích dùng chung một kết quả quét từ khóa
+        hits = self.keyword_matcher.scan(message)
+        sentiment_analysis = self.sentiment_analyzer.analyze_user_state(message, hits=hits)
+        context_prediction = self.context_recommender.predict_travel_context(message, hits=hits)
+        personality_profile = self.personality_analyzer.analyze_personality_from_text(message, hits=hits)
+        
+        # Tổng hợp insights
+        return {
+            'sentiment': sentiment_analysis,
+            'context': context_prediction,
+            'personality': personality_profile,
+            'features': parse_features_from_text(message, hits=hits),
+            'timestamp': datetime.now(),
+            'special_scenario': sentiment_analysis.get('special_scenario')
+        }
+    
+    def analyze_batch(self, messages):
+        """Phân tích một lô tin nhắn đến cùng lúc; tin nhắn trùng nhau chỉ phân tích một lần"""
+        done = {}
+        results = []
+        for message in messages:
+            if message not in done:
+                done[message] = self.analyze_message(message)
+            results.append(dict(done[message]))  # mỗi tin nhắn một dict riêng để ghi memory
+        return results
+    
     def _generate_ai_response(self, insights, original_message):
         """Tạo phản hồi AI thông minh"""
+        return "\n\n".join(self.iter_response_parts(insights))
+    
+    def iter_response_parts(self, insights):
+        """Từng đoạn của phản hồi theo thứ tự (để gửi dần cho client)"""
         sentiment = insights['sentiment']['sentiment']
         emotion = insights['sentiment']['emotion']
         primary_context = insights['context']['primary_context']
@@ -68,24 +97,20 @@ class AIChatbotEngine:
         }
         
         # Build intelligent response
-        response_parts = []
-        
         # Emotional empathy
         if emotion in emotional_responses:
-            response_parts.append(emotional_responses[emotion])
+            yield emotional_responses[emotion]
         
         # Context understanding
         if primary_context in context_suggestions:
-            response_parts.append(context_suggestions[primary_context])
+            yield context_suggestions[primary_context]
         
         # Personality-based suggestion
         personality_type = insights['personality']['personality_type']
-        response_parts.append(f"Với phong cách {personality_type}, mình nghĩ bạn sẽ thích:")
+        yield f"Với phong cách {personality_type}, mình nghĩ bạn sẽ thích:"
         
         # Add specific recommendations based on AI analysis
-        response_parts.extend(self._get_personalized_suggestions(insights))
-        
-        return "\n\n".join(response_parts)
+        yield from self._get_personalized_suggestions(insights)
     
     def _get_personalized_suggestions(self, insights):
         """Đề xuất cá nhân hóa dựa trên phân tích AI"""
@@ -0,0 +1,259 @@
+# modules/availability.py
+from datetime import date, timedelta
+
+import numpy as np
+
+# Ba loại phòng của trang chọn phòng (book_page); mỗi loại có lịch riêng
+ROOM_TYPES = ("Phòng nhỏ", "Phòng đôi", "Phòng tổng thống")
+MAX_NIGHTS = 30
+
+CALENDAR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS room_nights (
+    hotel_name TEXT NOT NULL,
+    room_type TEXT NOT NULL,
+    night TEXT NOT NULL,
+    booked INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (hotel_name, room_type, night)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_room_nights_night ON room_nights(night);
+CREATE TABLE IF NOT EXISTS calendar_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO calendar_state (id, version) VALUES (1, 0);
+"""
+
+
+def stay_nights(checkin, nights=1):
+    """
+    Các đêm của kỳ lưu trú [checkin, checkin + nights) dạng 'YYYY-MM-DD'.
+    Ném ValueError nếu ngày sai định dạng hoặc số đêm ngoài 1..MAX_NIGHTS.
+    """
+    start = checkin if isinstance(checkin, date) else date.fromisoformat(str(checkin).strip()[:10])
+    nights = int(nights)
+    if not 1 <= nights <= MAX_NIGHTS:
+        raise ValueError(f"Số đêm phải từ 1 đến {MAX_NIGHTS}")
+    return [(start + timedelta(days=i)).isoformat() for i in range(nights)]
+
+
+def _capacity(conn, hotel_name):
+    """Số phòng mỗi loại (hotels.rooms_available); None = chưa quản lý tồn phòng (không giới hạn)"""
+    row = conn.execute("SELECT rooms_available FROM hotels WHERE name = ?", (hotel_name,)).fetchone()
+    return row[0] if row else None
+
+
+def _max_booked(conn, hotel_name, room_type, nights):
+    # quét đúng đoạn [đêm đầu, đêm cuối] của khóa chính (hotel, loại, đêm): O(log n + số đêm)
+    row = conn.execute(
+        "SELECT MAX(booked) FROM room_nights "
+        "WHERE hotel_name = ? AND room_type = ? AND night >= ? AND night <= ?",
+        (hotel_name, room_type, nights[0], nights[-1])
+    ).fetchone()
+    return row[0] or 0
+
+
+def _bump_version(conn):
+    conn.execute("UPDATE calendar_state SET version = version + 1 WHERE id = 1")
+
+
+# === GHI (gọi trong giao dịch BEGIN IMMEDIATE của BookingEngine) ===
+def hold_rooms(conn, hotel_name, room_type, checkin, nights=1, rooms=1):
+    """
+    Giữ `rooms` phòng cho mọi đêm của kỳ lưu trú, tất cả hoặc không.
+    Trả về False (không ghi gì) nếu có đêm đã kín; hotel chưa có trong kho phòng cũng trả False.
+    """
+    stay = stay_nights(checkin, nights)
+    row = conn.execute("SELECT rooms_available FROM hotels WHERE name = ?", (hotel_name,)).fetchone()
+    if row is None:
+        return False
+    capacity = row[0]
+    if capacity is not None and _max_booked(conn, hotel_name, room_type, stay) + rooms > capacity:
+        return False
+    conn.executemany(
+        "INSERT INTO room_nights (hotel_name, room_type, night, booked) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(hotel_name, room_type, night) DO UPDATE SET booked = booked + excluded.booked",
+        [(hotel_name, room_type, night, rooms) for night in stay]
+    )
+    _bump_version(conn)
+    return True
+
+
+def release_rooms(conn, hotel_name, room_type, checkin, nights=1, rooms=1):
+    """Trả phòng đã giữ (booking bị hủy / xóa); đêm về 0 thì xóa dòng cho bảng gọn"""
+    stay = stay_nights(checkin, nights)
+    conn.executemany(
+        "UPDATE room_nights SET booked = MAX(booked - ?, 0) "
+        "WHERE hotel_name = ? AND room_type = ? AND night = ?",
+        [(rooms, hotel_name, room_type, night) for night in stay]
+    )
+    conn.execute(
+        "DELETE FROM room_nights WHERE hotel_name = ? AND room_type = ? "
+        "AND night >= ? AND night <= ? AND booked <= 0",
+        (hotel_name, room_type, stay[0], stay[-1])
+    )
+    _bump_version(conn)
+
+
+def booking_stay(booking):
+    """(loại phòng, checkin, số đêm) của một booking; None nếu dữ liệu cũ không có ngày hợp lệ"""
+    try:
+        nights = min(max(int(float(booking.get("nights") or 1)), 1), MAX_NIGHTS)
+        stay_nights(booking.get("checkin_date"), nights)
+    except (TypeError, ValueError):
+        return None
+    return booking.get("room_type") or ROOM_TYPES[0], booking.get("checkin_date"), nights
+
+
+def rebuild_calendar(conn, skip_statuses=()):
+    """Dựng lại lịch từ các booking không ở trạng thái skip_statuses (gọi trong giao dịch)"""
+    conn.execute("DELETE FROM room_nights")
+    skip = sorted(skip_statuses)
+    sql = "SELECT hotel_name, room_type, checkin_date, nights FROM bookings"
+    if skip:
+        sql += f" WHERE status IS NULL OR status NOT IN ({', '.join('?' for _ in skip)})"
+    rows = conn.execute(sql, skip).fetchall()
+    counts = {}
+    for row in rows:
+        stay = booking_stay(dict(row))
+        if stay is None:
+            continue
+        room_type, checkin, nights = stay
+        for night in stay_nights(checkin, nights):
+            key = (row["hotel_name"], room_type, night)
+            counts[key] = counts.get(key, 0) + 1
+    conn.executemany(
+        "INSERT INTO room_nights (hotel_name, room_type, night, booked) VALUES (?, ?, ?, ?)",
+        [key + (n,) for key, n in counts.items()]
+    )
+    _bump_version(conn)
+
+
+def sync_capacity(conn, capacities, default):
+    """
+    Sức chứa mỗi loại phòng theo dữ liệu nguồn: capacities = [(tên, số phòng)] ghi đè giá trị đang có;
+    khách sạn còn NULL (nguồn không có cột rooms_available) nhận `default`, không để "không giới hạn".
+    Tăng version nếu có dòng đổi. Trả về số dòng đổi.
+    """
+    changed = 0
+    for name, rooms in capacities:
+        changed += conn.execute(
+            "UPDATE hotels SET rooms_available = ? WHERE name = ? AND rooms_available IS NOT ?",
+            (rooms, name, rooms)
+        ).rowcount
+    changed += conn.execute(
+        "UPDATE hotels SET rooms_available = ? WHERE rooms_available IS NULL", (default,)
+    ).rowcount
+    if changed:
+        _bump_version(conn)
+    return changed
+
+
+# === ĐỌC ===
+class AvailabilityCalendar:
+    """
+    Lịch phòng theo đêm cho từng (khách sạn, loại phòng) trong hotel.db.
+    - room_nights chỉ có dòng cho các đêm đã có người đặt; khóa chính (hotel, loại, đêm)
+      nên "còn mấy phòng từ ngày X, N đêm" là một lần tìm B-tree + quét N dòng.
+    - Sức chứa mỗi loại = hotels.rooms_available (sync_capacity điền mặc định khi nguồn không có;
+      NULL chỉ còn ở DB dựng tay và vẫn được hiểu là không giới hạn).
+    - version tăng sau mỗi lần giữ / trả phòng, dùng làm khóa cache cho trang lọc theo ngày.
+    """
+
+    def __init__(self, connect):
+        self.connect = connect
+
+    def version(self):
+        return self.connect().execute("SELECT version FROM calendar_state WHERE id = 1").fetchone()[0]
+
+    def free_rooms(self, hotel_name, room_type, checkin, nights=1):
+        """Số phòng trống trong cả kỳ lưu trú; None = không giới hạn"""
+        conn = self.connect()
+        stay = stay_nights(checkin, nights)
+        capacity = _capacity(conn, hotel_name)
+        if capacity is None:
+            return None
+        return max(capacity - _max_booked(conn, hotel_name, room_type, stay), 0)
+
+    def hotel_availability(self, hotel_name, checkin, nights=1):
+        """loại phòng -> số phòng trống (None = không giới hạn)"""
+        return self.batch([hotel_name], checkin, nights).get(hotel_name, {})
+
+    def batch(self, hotel_names, checkin, nights=1, chunk=500):
+        """
+        Tình trạng phòng của cả danh sách khách sạn trong một vài truy vấn:
+        {tên: {loại phòng: số phòng trống | None}}. Khách sạn không có trong kho phòng bị bỏ qua.
+        """
+        conn = self.connect()
+        stay = stay_nights(checkin, nights)
+        names = list(dict.fromkeys(hotel_names))
+        result = {}
+        for i in range(0, len(names), chunk):
+            part = names[i:i + chunk]
+            marks = ", ".join("?" for _ in part)
+            for name, capacity in conn.execute(
+                f"SELECT name, rooms_available FROM hotels WHERE name IN ({marks})", part
+            ):
+                result[name] = {t: capacity for t in ROOM_TYPES}
+            for name, room_type, booked in conn.execute(
+                f"SELECT hotel_name, room_type, MAX(booked) FROM room_nights "
+                f"WHERE hotel_name IN ({marks}) AND night >= ? AND night <= ? "
+                f"GROUP BY hotel_name, room_type",
+                part + [stay[0], stay[-1]]
+            ):
+                rooms = result.get(name)
+                if rooms is not None and rooms.get(room_type) is not None:
+                    rooms[room_type] = max(rooms[room_type] - booked, 0)
+        return result
+
+    def occupancy(self, hotel_names, checkin, nights=1):
+        """
+        Mảng (số khách sạn, số loại phòng, số đêm) tỷ lệ phòng đã đặt 0..1 theo thứ tự hotel_names;
+        khách sạn không giới hạn phòng / chưa có trong kho phòng -> 0.
+        """
+        conn = self.connect()
+        stay = stay_nights(checkin, nights)
+        names = list(hotel_names)
+        out = np.zeros((len(names), len(ROOM_TYPES), len(stay)))
+        if not names:
+            return out
+        positions = {}
+        for i, name in enumerate(names):
+            positions.setdefault(name, []).append(i)
+        type_pos = {t: j for j, t in enumerate(ROOM_TYPES)}
+        night_pos = {night: k for k, night in enumerate(stay)}
+        unique = list(positions)
+        for start in range(0, len(unique), 500):
+            part = unique[start:start + 500]
+            for name, room_type, night, booked, capacity in conn.execute(
+                f"SELECT r.hotel_name, r.room_type, r.night, r.booked, h.rooms_available "
+                f"FROM room_nights r JOIN hotels h ON h.name = r.hotel_name "
+                f"WHERE r.hotel_name IN ({', '.join('?' for _ in part)}) AND r.night >= ? AND r.night <= ?",
+                part + [stay[0], stay[-1]]
+            ):
+                j = type_pos.get(room_type)
+                if j is None or not capacity or capacity <= 0:
+                    continue
+                out[positions[name], j, night_pos[night]] = min(booked / capacity, 1.0)
+        return out
+
+    def full_hotels(self, checkin, nights=1, room_type=None):
+        """
+        Tên các khách sạn không còn phòng (loại room_type, hoặc mọi loại) trong kỳ lưu trú.
+        Chỉ đọc các đêm trong khoảng (chỉ mục theo đêm) + khách sạn có sức chứa 0,
+        nên chi phí theo số phòng đã đặt trong kỳ chứ không theo cỡ danh mục.
+        """
+        conn = self.connect()
+        stay = stay_nights(checkin, nights)
+        types = (room_type,) if room_type else ROOM_TYPES
+        full = {name for (name,) in conn.execute("SELECT name FROM hotels WHERE rooms_available <= 0")}
+        booked_out = {}
+        for name, rtype in conn.execute(
+            "SELECT r.hotel_name, r.room_type FROM room_nights r JOIN hotels h ON h.name = r.hotel_name "
+            "WHERE r.night >= ? AND r.night <= ? AND h.rooms_available IS NOT NULL "
+            "GROUP BY r.hotel_name, r.room_type HAVING MAX(r.booked) >= MAX(h.rooms_available)",
+            (stay[0], stay[-1])
+        ):
+            if rtype in types:
+                booked_out.setdefault(name, set()).add(rtype)
+        full.update(name for name, rtypes in booked_out.items() if len(rtypes) == len(types))
+        return full
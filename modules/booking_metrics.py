@@ -0,0 +1,220 @@
+# modules/booking_metrics.py
+import os
+
+import pandas as pd
+
+METRICS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS booking_metrics (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    bookings INTEGER NOT NULL DEFAULT 0,
+    revenue REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope, key)
+) WITHOUT ROWID;
+"""
+
+# scope của bộ đếm: tổng, theo khách sạn, theo thành phố, theo trạng thái, theo tài khoản
+TOTAL, HOTEL, CITY, STATUS, USER = "total", "hotel", "city", "status", "user"
+BUILT_MARKER = ("meta", "built")
+
+# booking ở các trạng thái này vẫn được đếm nhưng không tính doanh thu / chi tiêu
+CANCELLED_STATUSES = frozenset({"Đã hủy"})
+_CANCELLED = sorted(CANCELLED_STATUSES)
+
+# cùng công thức với booking_amount(), dùng khi tính trên bảng bookings (bí danh b)
+AMOUNT_SQL = "COALESCE(b.price, 0) * MAX(COALESCE(CAST(b.nights AS INTEGER), 1), 1)"
+PAID_SQL = f"CASE WHEN b.status IN ({', '.join('?' for _ in _CANCELLED)}) THEN 0 ELSE {AMOUNT_SQL} END"
+
+
+def booking_amount(booking):
+    """Tiền của một booking = giá x số đêm (thiếu số đêm -> 1)"""
+    try:
+        price = float(booking.get("price") or 0)
+    except (TypeError, ValueError):
+        price = 0.0
+    try:
+        nights = max(int(float(booking.get("nights") or 1)), 1)
+    except (TypeError, ValueError):
+        nights = 1
+    return price * nights
+
+
+def _counts_revenue(status):
+    return status not in CANCELLED_STATUSES
+
+
+def _bump(conn, changes):
+    """changes: [(scope, key, d_bookings, d_revenue)]"""
+    conn.executemany(
+        "INSERT INTO booking_metrics (scope, key, bookings, revenue) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(scope, key) DO UPDATE SET bookings = bookings + excluded.bookings, "
+        "revenue = revenue + excluded.revenue",
+        [(scope, str(key), n, r) for scope, key, n, r in changes if key is not None]
+    )
+
+
+def _hotel_city(conn, hotel_name):
+    row = conn.execute("SELECT city FROM hotels WHERE name = ?", (hotel_name,)).fetchone()
+    return row[0] if row and row[0] else None
+
+
+# === CẬP NHẬT TĂNG DẦN (gọi trong giao dịch ghi booking) ===
+def record_booking(conn, booking, sign=1):
+    """Cộng (sign=1) hoặc trừ (sign=-1) một booking vào mọi bộ đếm liên quan"""
+    amount = booking_amount(booking)
+    status = booking.get("status")
+    revenue = sign * amount if _counts_revenue(status) else 0.0
+    _bump(conn, [
+        (TOTAL, "", sign, revenue),
+        (HOTEL, booking.get("hotel_name"), sign, revenue),
+        (CITY, _hotel_city(conn, booking.get("hotel_name")), sign, revenue),
+        (STATUS, status, sign, sign * amount),
+        (USER, booking.get("username"), sign, revenue),
+    ])
+
+
+def record_status_change(conn, booking, old_status, new_status):
+    """Chuyển booking giữa hai trạng thái; doanh thu chỉ đổi khi vào/ra trạng thái hủy"""
+    if old_status == new_status:
+        return
+    amount = booking_amount(booking)
+    changes = [(STATUS, old_status, -1, -amount), (STATUS, new_status, 1, amount)]
+    was, now = _counts_revenue(old_status), _counts_revenue(new_status)
+    if was != now:
+        delta = amount if now else -amount
+        changes += [
+            (TOTAL, "", 0, delta),
+            (HOTEL, booking.get("hotel_name"), 0, delta),
+            (CITY, _hotel_city(conn, booking.get("hotel_name")), 0, delta),
+            (USER, booking.get("username"), 0, delta),
+        ]
+    _bump(conn, changes)
+
+
+def record_hotel_cities(conn, hotel_names):
+    """
+    Khách sạn vừa được thêm vào bảng hotels: các booking có sẵn của chúng trước đó
+    chưa biết thành phố, nay cộng vào bộ đếm theo thành phố
+    """
+    for name in hotel_names:
+        conn.execute(
+            f"INSERT INTO booking_metrics (scope, key, bookings, revenue) "
+            f"SELECT ?, h.city, COUNT(*), COALESCE(SUM({PAID_SQL}), 0) "
+            f"FROM bookings b JOIN hotels h ON h.name = b.hotel_name "
+            f"WHERE b.hotel_name = ? AND h.city IS NOT NULL GROUP BY h.city "
+            f"ON CONFLICT(scope, key) DO UPDATE SET bookings = bookings + excluded.bookings, "
+            f"revenue = revenue + excluded.revenue",
+            [CITY] + _CANCELLED + [name]
+        )
+
+
+# === DỰNG LẠI TOÀN BỘ (một lần, hoặc khi cần đối soát) ===
+def rebuild_metrics(conn, users_csv=None):
+    """
+    Tính lại bộ đếm từ bảng bookings bằng GROUP BY (gọi trong giao dịch).
+    Chi tiêu theo tài khoản cộng từ các booking; tài khoản chưa có booking nào trong hotel.db
+    lấy total_spent trong users.csv (số liệu từ trước khi chuyển sang SQLite) làm mốc.
+    """
+    conn.execute("DELETE FROM booking_metrics")
+    groups = [  # (scope, cột nhóm, có bỏ doanh thu của booking đã hủy)
+        (TOTAL, "''", True),
+        (HOTEL, "b.hotel_name", True),
+        (CITY, "h.city", True),
+        (STATUS, "b.status", False),
+        (USER, "b.username", True),
+    ]
+    for scope, key, skip_cancelled in groups:
+        conn.execute(
+            f"INSERT INTO booking_metrics (scope, key, bookings, revenue) "
+            f"SELECT ?, {key}, COUNT(*), COALESCE(SUM({PAID_SQL if skip_cancelled else AMOUNT_SQL}), 0) "
+            f"FROM bookings b LEFT JOIN hotels h ON h.name = b.hotel_name "
+            f"WHERE {key} IS NOT NULL GROUP BY {key}",
+            [scope] + (_CANCELLED if skip_cancelled else [])
+        )
+
+    for username, spent in read_total_spent(users_csv).items():
+        conn.execute(
+            "INSERT INTO booking_metrics (scope, key, bookings, revenue) VALUES (?, ?, 0, ?) "
+            "ON CONFLICT(scope, key) DO NOTHING",
+            (USER, username, spent)
+        )
+    conn.execute(
+        "INSERT OR REPLACE INTO booking_metrics (scope, key, bookings, revenue) VALUES (?, ?, 1, 0)",
+        BUILT_MARKER
+    )
+
+
+def is_built(conn):
+    return conn.execute(
+        "SELECT 1 FROM booking_metrics WHERE scope = ? AND key = ?", BUILT_MARKER
+    ).fetchone() is not None
+
+
+# === users.csv ===
+def read_total_spent(users_csv):
+    """username -> total_spent trong users.csv (file thiếu -> {})"""
+    if not users_csv or not os.path.exists(users_csv):
+        return {}
+    df = pd.read_csv(users_csv, encoding="utf-8-sig", dtype=str)
+    if "username" not in df.columns or "total_spent" not in df.columns:
+        return {}
+    spent = pd.to_numeric(df["total_spent"], errors="coerce").fillna(0.0)
+    return dict(zip(df["username"].tolist(), spent.tolist()))
+
+
+def read_accounts(users_csv):
+    """email (chữ thường) -> username của các tài khoản trong users.csv (file thiếu -> {})"""
+    if not users_csv or not os.path.exists(users_csv):
+        return {}
+    df = pd.read_csv(users_csv, encoding="utf-8-sig", dtype=str)
+    if "username" not in df.columns or "email" not in df.columns:
+        return {}
+    df = df.dropna(subset=["username", "email"])
+    return dict(zip(df["email"].str.strip().str.lower(), df["username"]))
+
+
+# === ĐỌC ===
+class BookingMetrics:
+    """
+    Bộ đếm dashboard quản trị lưu trong bảng booking_metrics của hotel.db,
+    được BookingEngine cập nhật trong cùng giao dịch với mỗi lượt đặt / đổi trạng thái / xóa.
+    Đọc tổng là một lần tra khóa chính; đọc theo nhóm chỉ quét số nhóm (khách sạn,
+    thành phố...), không quét bảng bookings. Mọi worker dùng chung một bộ đếm.
+    """
+
+    def __init__(self, connect):
+        self.connect = connect  # hàm trả về kết nối SQLite của luồng hiện tại
+
+    def _row(self, scope, key):
+        row = self.connect().execute(
+            "SELECT bookings, revenue FROM booking_metrics WHERE scope = ? AND key = ?", (scope, str(key))
+        ).fetchone()
+        return (row[0], row[1]) if row else (0, 0.0)
+
+    def totals(self):
+        bookings, revenue = self._row(TOTAL, "")
+        return {"bookings": bookings, "revenue": revenue}
+
+    def total_spent(self, username):
+        """Tổng chi tiêu của tài khoản (thay cho cột total_spent của users.csv): một lần tra khóa chính"""
+        return self._row(USER, username)[1]
+
+    def by(self, scope):
+        """key -> {"bookings", "revenue"} của một scope (hotel / city / status / user)"""
+        return {
+            key: {"bookings": bookings, "revenue": revenue}
+            for key, bookings, revenue in self.connect().execute(
+                "SELECT key, bookings, revenue FROM booking_metrics "
+                "WHERE scope = ? AND (bookings != 0 OR revenue != 0) ORDER BY revenue DESC, key",
+                (scope,)
+            )
+        }
+
+    def status_counts(self):
+        return {key: v["bookings"] for key, v in self.by(STATUS).items() if v["bookings"]}
+
+    def snapshot(self):
+        data = {"totals": self.totals()}
+        for scope in (HOTEL, CITY, STATUS, USER):
+            data[scope] = self.by(scope)
+        return data
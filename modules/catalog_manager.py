@@ -0,0 +1,87 @@
+# modules/catalog_manager.py
+import os
+import threading
+import time
+
+
+def file_signature(paths):
+    """(mtime_ns, size) của từng file; file chưa có -> None"""
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            signature.append(None)
+        else:
+            signature.append((st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+class CatalogManager:
+    """
+    Giữ danh mục hiện hành và tự nạp lại khi file nguồn đổi (mtime / size).
+    - Bản mới được dựng hoàn chỉnh ở luồng nền, xong mới gán vào self.current
+      (copy-on-write): request đang chạy vẫn dùng bản cũ, không thấy bản dở dang.
+    - Người đọc chỉ đọc một thuộc tính, không bao giờ chờ khóa.
+    - Dựng lỗi (ví dụ file đang ghi dở) thì giữ bản cũ, chờ file đổi tiếp.
+    """
+
+    def __init__(self, paths, loader, interval=2.0):
+        self.paths = list(paths)
+        self.loader = loader
+        self.interval = interval
+        self.version = 0
+        self.last_error = None
+        self._build_lock = threading.Lock()  # chỉ một lượt dựng tại một thời điểm
+        self._next_check = 0.0
+
+        self._signature = file_signature(self.paths)
+        self._publish(loader(), self._signature)  # lần đầu dựng đồng bộ: lỗi thì báo ngay khi khởi động
+
+    def check(self):
+        """Gọi đầu mỗi request: tối đa một lần stat mỗi `interval` giây, không chặn"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.interval
+
+        signature = file_signature(self.paths)
+        if signature == self._signature:
+            return False
+        if not self._build_lock.acquire(blocking=False):
+            return False  # đang có luồng dựng
+
+        self._signature = signature
+        threading.Thread(target=self._rebuild, name="catalog-reload", daemon=True).start()
+        return True
+
+    def reload(self):
+        """Dựng lại ngay trong luồng hiện tại (dùng cho script / kiểm thử)"""
+        with self._build_lock:
+            self._signature = file_signature(self.paths)
+            self._swap()
+
+    def _rebuild(self):
+        try:
+            self._swap()
+        finally:
+            self._build_lock.release()
+
+    def _swap(self):
+        signature = self._signature
+        try:
+            catalog = self.loader()
+        except Exception as e:
+            self.last_error = e
+            print(f"⚠️ Không nạp lại được danh mục, giữ bản cũ: {e}")
+            return
+        self.last_error = None
+        self._publish(catalog, signature)
+
+    def _publish(self, catalog, signature):
+        # phiên bản + chữ ký file gắn vào chính catalog để người đọc lấy cùng một lần đọc;
+        # chữ ký giống nhau giữa các worker nên dùng được cho ETag
+        catalog.version = self.version + 1
+        catalog.signature = signature
+        self.current = catalog  # gán tham chiếu là nguyên tử
+        self.version = catalog.version
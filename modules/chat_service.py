@@ -0,0 +1,101 @@
+# modules/chat_service.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+BATCH_WINDOW = 0.005  # giây chờ gom các tin nhắn đến cùng lúc
+MAX_BATCH = 64
+
+
+class AsyncChatService:
+    """
+    Lớp bất đồng bộ bọc AIChatbotEngine cho nhiều cuộc hội thoại cùng lúc trên một event loop.
+    - Tin nhắn đến trong cùng cửa sổ BATCH_WINDOW được gom thành một lô, phân tích bằng
+      engine.analyze_batch trong thread pool (một lần chuyển luồng cho cả lô, tin nhắn trùng
+      chỉ phân tích một lần); event loop không bao giờ bị chặn bởi việc phân tích.
+    - stream() trả từng đoạn phản hồi ngay khi iter_response_parts tạo ra.
+    """
+
+    def __init__(self, engine, window=BATCH_WINDOW, max_batch=MAX_BATCH, executor=None):
+        self.engine = engine
+        self.window = window
+        self.max_batch = max_batch
+        self.executor = executor or ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-analyze")
+        self.batches = self.messages = 0
+        self._pending = []  # [(tin nhắn, future)]
+        self._timer = None
+
+    # --- Gom lô ---
+    async def analyze(self, message):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((message, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.messages += len(batch)
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(self.executor, self.engine.analyze_batch, [m for m, _ in batch])
+        job.add_done_callback(lambda done: self._resolve(batch, done))
+
+    @staticmethod
+    def _resolve(batch, done):
+        error = done.exception()
+        results = done.result() if error is None else [None] * len(batch)
+        for (_, future), insights in zip(batch, results):
+            if future.done():  # client đã hủy
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(insights)
+
+    # --- Phản hồi ---
+    async def _remember(self, user_id, insights):
+        # memory có thể là SQLiteConversationMemory (ghi đĩa): không chạy trên event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.engine.conversation_memory.append, user_id, insights)
+
+    def summary(self, insights):
+        """Phần insights gửi cho client (không kèm điểm số thô)"""
+        return {
+            'sentiment': insights['sentiment'].get('sentiment'),
+            'emotion': insights['sentiment'].get('emotion'),
+            'context': insights['context'].get('primary_context'),
+            'personality': insights['personality'].get('personality_type'),
+            'features': sorted(insights.get('features') or ()),
+            'recommendation_strategy': self.engine._get_recommendation_strategy(insights),
+        }
+
+    async def reply(self, user_id, message):
+        """Toàn bộ phản hồi một lần (giống process_user_message)"""
+        insights = await self.analyze(message)
+        await self._remember(user_id, insights)
+        return dict(self.summary(insights), response=self.engine._generate_ai_response(insights, message))
+
+    async def stream(self, user_id, message):
+        """Async generator (sự kiện, dữ liệu): 'insights', mỗi đoạn phản hồi 'part', rồi 'done'"""
+        insights = await self.analyze(message)
+        await self._remember(user_id, insights)
+        yield 'insights', self.summary(insights)
+        count = 0
+        for part in self.engine.iter_response_parts(insights):
+            yield 'part', {'index': count, 'text': part}
+            count += 1
+        yield 'done', {'parts': count}
+
+    def stats(self):
+        return {'batches': self.batches, 'messages': self.messages, 'pending': len(self._pending)}
+
+    def close(self):
+        self.executor.shutdown(wait=False)
@@ -1,8 +1,19 @@
+import os
+import re
+import sys
+
 import streamlit as st
-import pandas as pd
-import re 
-from filter import filter_by_location, filter_by_budget
-from recommend import calculate_scores_and_explain
+
+# `streamlit run modules/chatbox_app.py` chỉ thêm thư mục modules vào sys.path:
+# thêm thư mục gốc để import theo gói modules.*, cùng module (và trạng thái) với app Flask
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from modules.catalog_manager import CatalogManager
+from modules.csv_snapshot import load_csv
+from modules.hotel_data import HotelCatalog
+from modules.recommendation_service import RecommendationService
 
 
 
@@ -35,17 +46,21 @@ def parse_bool(text):
     """Kiểm tra người dùng nói 'yes'/'có'"""
     return "yes" in text.lower() or "có" in text.lower() or "ừ" in text.lower()
 
-# --- Tải Dữ liệu ---
-@st.cache_data
-def load_data(csv_path):
+# --- Dịch vụ gợi ý dùng chung ---
+@st.cache_resource
+def load_service(csv_path):
+    """
+    Một danh mục + một dịch vụ gợi ý cho cả tiến trình Streamlit: mọi phiên chat dùng chung
+    chỉ mục lọc và cache kết quả theo sở thích đã chuẩn hóa (tự nạp lại khi CSV đổi)
+    """
     try:
-        df = pd.read_csv(csv_path)
-        return df
+        manager = CatalogManager([csv_path], lambda: HotelCatalog(load_csv(csv_path)))
     except FileNotFoundError:
         st.error(f"LỖI: Không tìm thấy file {csv_path}.")
-        return None
+        return None, None
+    return manager, RecommendationService(lambda: manager.current)
 
-base_data = load_data("hotels.csv")
+catalog_manager, recommender = load_service("hotels.csv")
 
 # --- Giao diện Chatbot ---
 st.title("Chatbot Gợi ý Khách sạn")
@@ -144,26 +159,20 @@ if prompt := st.chat_input("Nhập câu trả lời của bạn..."):
             st.markdown(response)
 
         # GỌI HỆ THỐNG GỢI Ý 
-        if base_data is not None:
+        if recommender is not None:
             with st.spinner("Đang phân tích và xếp hạng..."):
                 prefs = st.session_state.user_prefs
-                
-                # 1. Lọc (Code TV3)
-                filtered_data = filter_by_location(base_data, prefs.get("location"))
-                filtered_data = filter_by_budget(filtered_data, prefs.get("budget"))
+                catalog_manager.check()
 
-                # 2. Xếp hạng AI (Code TV4)
-                final_results_sorted, explanation = calculate_scores_and_explain(
-                    filtered_data.copy(), 
-                    prefs
-                )
+                # 1 + 2. Lọc + xếp hạng AI qua dịch vụ dùng chung: cùng sở thích -> trả lại kết quả đã tính
+                top_3, explanation = recommender.recommend(prefs, top_k=3)
 
                 # 3. Trả kết quả ra Chat
                 st.session_state.messages.append({"role": "assistant", "content": f"💡 **Giải thích của AI:** {explanation}"})
                 with st.chat_message("assistant"):
                     st.info(f"💡 **Giải thích của AI:** {explanation}")
                 
-                if final_results_sorted.empty:
+                if not top_3:
                     response = "Rất tiếc, không tìm thấy khách sạn nào phù hợp với tất cả tiêu chí của bạn."
                     st.session_state.messages.append({"role": "assistant", "content": response})
                     with st.chat_message("assistant"):
@@ -173,9 +182,8 @@ if prompt := st.chat_input("Nhập câu trả lời của bạn..."):
                     st.session_state.messages.append({"role": "assistant", "content": response})
                     with st.chat_message("assistant"):
                         st.success(response)
-                        
-                        top_3 = final_results_sorted.head(3)
-                        for index, row in top_3.iterrows():
+
+                        for row in top_3:
                             # Hiển thị kết quả chi tiết
                             st.markdown(f"### 🥇 {row['name']} ({row['stars']} sao)")
                             st.image(row['image_url'], width=300, caption=row['name'])
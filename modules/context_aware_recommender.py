@@ -2,6 +2,22 @@ import numpy as np
 import pandas as pd
 from collections import Counter
 
+from modules.keyword_matcher import KeywordMatcher
+
+CONTEXT_KEYWORDS = {
+    'heartbreak_recovery': ['chia tay', 'buồn', 'thất tình', 'cô đơn', 'tình cảm'],
+    'business_trip': ['công tác', 'meeting', 'đối tác', 'work', 'business'],
+    'family_vacation': ['gia đình', 'con nhỏ', 'trẻ em', 'bố mẹ'],
+    'romantic_getaway': ['lãng mạn', 'người yêu', 'cặp đôi', 'tình nhân'],
+    'solo_adventure': ['một mình', 'solo', 'đi riêng', 'cá nhân'],
+    'workation': ['làm việc', 'wifi', 'yên tĩnh', 'remote work']
+}
+
+CONTEXT_TABLES = [('context', CONTEXT_KEYWORDS, False)]
+
+_matcher = KeywordMatcher(CONTEXT_TABLES)
+
+
 class ContextAwareRecommender:
     def __init__(self):
         self.sentence_model = None  # Không dùng model trên production
@@ -23,29 +39,17 @@ class ContextAwareRecommender:
         }
         return contexts
     
-    def predict_travel_context(self, user_message, user_history=None):
+    def predict_travel_context(self, user_message, user_history=None, hits=None):
         """Dự đoán ngữ cảnh du lịch - Production version"""
-        return self._simple_context_prediction(user_message)
+        return self._simple_context_prediction(user_message, hits)
     
-    def _simple_context_prediction(self, user_message):
+    def _simple_context_prediction(self, user_message, hits=None):
         """Dự đoán ngữ cảnh đơn giản"""
-        text_lower = user_message.lower()
-        
-        context_keywords = {
-            'heartbreak_recovery': ['chia tay', 'buồn', 'thất tình', 'cô đơn', 'tình cảm'],
-            'business_trip': ['công tác', 'meeting', 'đối tác', 'work', 'business'],
-            'family_vacation': ['gia đình', 'con nhỏ', 'trẻ em', 'bố mẹ'],
-            'romantic_getaway': ['lãng mạn', 'người yêu', 'cặp đôi', 'tình nhân'],
-            'solo_adventure': ['một mình', 'solo', 'đi riêng', 'cá nhân'],
-            'workation': ['làm việc', 'wifi', 'yên tĩnh', 'remote work']
-        }
-        
-        scores = {context: 0 for context in context_keywords.keys()}
+        if hits is None:
+            hits = _matcher.scan(user_message)
         
-        for context, keywords in context_keywords.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    scores[context] += 1
+        # mỗi từ khóa xuất hiện được tính 1 điểm cho ngữ cảnh của nó
+        scores = {context: hits.distinct(('context', context)) for context in CONTEXT_KEYWORDS}
         
         if max(scores.values()) > 0:
             primary_context = max(scores.items(), key=lambda x: x[1])[0]
@@ -0,0 +1,291 @@
+# modules/conversation_memory.py
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+
+from modules.hotel_db import get_connection, transaction
+
+MAX_TURNS = 20              # số lượt giữ lại cho mỗi user
+MAX_USERS = 10_000
+TTL_SECONDS = 6 * 3600      # user im lặng quá lâu thì bị xóa
+MAX_BYTES = 64 * 1024 * 1024
+
+COUNTER_NAMES = ("appended", "turns_dropped", "users_evicted", "users_expired")
+
+
+def _encode(entry):
+    """JSON gọn của một lượt hội thoại (datetime -> chuỗi)"""
+    return json.dumps(entry, default=str, ensure_ascii=False, separators=(",", ":"))
+
+
+def _entry_size(entry):
+    return len(_encode(entry).encode("utf-8"))
+
+
+class _UserSlot:
+    __slots__ = ("last_seen", "turns", "sizes", "bytes")
+
+    def __init__(self, max_turns):
+        self.last_seen = 0.0
+        self.turns = deque(maxlen=max_turns)
+        self.sizes = deque(maxlen=max_turns)
+        self.bytes = 0
+
+
+class ConversationMemory:
+    """
+    Bộ nhớ hội thoại trong tiến trình, có giới hạn:
+    - mỗi user một ring buffer tối đa max_turns lượt
+    - user sắp theo lần dùng cuối (LRU); im lặng quá ttl_seconds thì bị xóa
+    - vượt max_users hoặc max_bytes (kích thước JSON ước lượng) -> xóa user cũ nhất
+    """
+
+    def __init__(self, max_turns=MAX_TURNS, max_users=MAX_USERS,
+                 ttl_seconds=TTL_SECONDS, max_bytes=MAX_BYTES, clock=time.time):
+        self.max_turns = max_turns
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.bytes_in_use = 0
+        self.counters = dict.fromkeys(COUNTER_NAMES, 0)
+        self._users = OrderedDict()  # user_id -> _UserSlot, cũ nhất ở đầu
+        self._lock = threading.Lock()
+
+    def append(self, user_id, entry):
+        size = _entry_size(entry)
+        with self._lock:
+            now = self.clock()
+            slot = self._touch(user_id, now)
+            if slot is None:
+                slot = self._users[user_id] = _UserSlot(self.max_turns)
+                slot.last_seen = now
+
+            if len(slot.turns) == self.max_turns:
+                slot.bytes -= slot.sizes[0]
+                self.bytes_in_use -= slot.sizes[0]
+                self.counters["turns_dropped"] += 1
+            slot.turns.append(entry)
+            slot.sizes.append(size)
+            slot.bytes += size
+            self.bytes_in_use += size
+            self.counters["appended"] += 1
+
+            self._expire(now)
+            while len(self._users) > 1 and (
+                len(self._users) > self.max_users or self.bytes_in_use > self.max_bytes
+            ):
+                self._drop(next(iter(self._users)), "users_evicted")
+
+    def history(self, user_id):
+        """Các lượt của user, cũ trước mới sau"""
+        with self._lock:
+            slot = self._touch(user_id, self.clock())
+            return list(slot.turns) if slot is not None else []
+
+    def clear(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._users.clear()
+                self.bytes_in_use = 0
+            elif user_id in self._users:
+                self.bytes_in_use -= self._users.pop(user_id).bytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "turns": sum(len(s.turns) for s in self._users.values()),
+                "bytes_in_use": self.bytes_in_use,
+                **self.counters,
+            }
+
+    def __contains__(self, user_id):
+        return user_id in self._users
+
+    def __len__(self):
+        return len(self._users)
+
+    # --- nội bộ (gọi khi đang giữ khóa) ---
+    def _touch(self, user_id, now):
+        slot = self._users.get(user_id)
+        if slot is None:
+            return None
+        if now - slot.last_seen > self.ttl_seconds:
+            self._drop(user_id, "users_expired")
+            return None
+        slot.last_seen = now
+        self._users.move_to_end(user_id)
+        return slot
+
+    def _expire(self, now):
+        # OrderedDict xếp theo lần dùng cuối: chỉ cần xét từ đầu danh sách
+        cutoff = now - self.ttl_seconds
+        while self._users:
+            user_id, slot = next(iter(self._users.items()))
+            if slot.last_seen >= cutoff:
+                break
+            self._drop(user_id, "users_expired")
+
+    def _drop(self, user_id, counter):
+        self.bytes_in_use -= self._users.pop(user_id).bytes
+        self.counters[counter] += 1
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversation_turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_turns_user ON conversation_turns(user_id, id);
+CREATE TABLE IF NOT EXISTS conversation_users (
+    user_id TEXT PRIMARY KEY,
+    last_seen REAL NOT NULL,
+    bytes INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_conversation_users_seen ON conversation_users(last_seen);
+CREATE TABLE IF NOT EXISTS conversation_counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class SQLiteConversationMemory:
+    """
+    Cùng giao diện với ConversationMemory nhưng lưu trong SQLite (WAL),
+    để mọi worker gunicorn thấy chung lịch sử. Lượt hội thoại lưu dạng JSON,
+    nên datetime đọc lại là chuỗi ISO.
+    """
+
+    def __init__(self, db_path, max_turns=MAX_TURNS, max_users=MAX_USERS,
+                 ttl_seconds=TTL_SECONDS, max_bytes=MAX_BYTES, clock=time.time):
+        self.db_path = db_path
+        self.max_turns = max_turns
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.clock = clock
+        conn = self.connection()
+        conn.executescript(SQLITE_SCHEMA)
+        conn.executemany(
+            "INSERT OR IGNORE INTO conversation_counters (name, value) VALUES (?, 0)",
+            [(name,) for name in COUNTER_NAMES + ("bytes_in_use",)]
+        )
+
+    def connection(self):
+        return get_connection(self.db_path)
+
+    def append(self, user_id, entry):
+        user_id = str(user_id)
+        payload = _encode(entry)
+        size = len(payload.encode("utf-8"))
+        now = self.clock()
+        with transaction(self.connection()) as conn:
+            self._expire(conn, now)
+            conn.execute(
+                "INSERT INTO conversation_turns (user_id, size, payload) VALUES (?, ?, ?)",
+                (user_id, size, payload)
+            )
+            # ring buffer: bỏ các lượt cũ hơn max_turns lượt mới nhất
+            old = conn.execute(
+                "SELECT id, size FROM conversation_turns WHERE user_id = ? "
+                "ORDER BY id DESC LIMIT -1 OFFSET ?",
+                (user_id, self.max_turns)
+            ).fetchall()
+            dropped = sum(row[1] for row in old)
+            if old:
+                conn.executemany("DELETE FROM conversation_turns WHERE id = ?", [(row[0],) for row in old])
+
+            conn.execute(
+                "INSERT INTO conversation_users (user_id, last_seen, bytes) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET last_seen = excluded.last_seen, "
+                "bytes = bytes + excluded.bytes",
+                (user_id, now, size - dropped)
+            )
+            self._bump(conn, appended=1, turns_dropped=len(old), bytes_in_use=size - dropped)
+
+            while True:
+                users, used = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM conversation_users"
+                ).fetchone()
+                if users <= 1 or (users <= self.max_users and used <= self.max_bytes):
+                    break
+                victims = conn.execute(
+                    "SELECT user_id FROM conversation_users WHERE user_id != ? "
+                    "ORDER BY last_seen LIMIT ?",
+                    (user_id, max(users - self.max_users, 1))
+                ).fetchall()
+                self._drop(conn, [row[0] for row in victims], "users_evicted")
+
+    def history(self, user_id):
+        user_id = str(user_id)
+        conn = self.connection()
+        row = conn.execute(
+            "SELECT last_seen FROM conversation_users WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None or self.clock() - row[0] > self.ttl_seconds:
+            return []
+        return [
+            json.loads(payload) for (payload,) in conn.execute(
+                "SELECT payload FROM conversation_turns WHERE user_id = ? ORDER BY id", (user_id,)
+            )
+        ]
+
+    def clear(self, user_id=None):
+        with transaction(self.connection()) as conn:
+            if user_id is None:
+                conn.execute("DELETE FROM conversation_turns")
+                conn.execute("DELETE FROM conversation_users")
+                conn.execute("UPDATE conversation_counters SET value = 0 WHERE name = 'bytes_in_use'")
+            else:
+                self._drop(conn, [str(user_id)], None)
+
+    def stats(self):
+        conn = self.connection()
+        stats = {name: value for name, value in conn.execute("SELECT name, value FROM conversation_counters")}
+        stats["users"] = conn.execute("SELECT COUNT(*) FROM conversation_users").fetchone()[0]
+        stats["turns"] = conn.execute("SELECT COUNT(*) FROM conversation_turns").fetchone()[0]
+        return stats
+
+    def __contains__(self, user_id):
+        return self.connection().execute(
+            "SELECT 1 FROM conversation_users WHERE user_id = ?", (str(user_id),)
+        ).fetchone() is not None
+
+    def __len__(self):
+        return self.connection().execute("SELECT COUNT(*) FROM conversation_users").fetchone()[0]
+
+    # --- nội bộ (gọi trong giao dịch) ---
+    def _expire(self, conn, now):
+        expired = conn.execute(
+            "SELECT user_id FROM conversation_users WHERE last_seen < ?", (now - self.ttl_seconds,)
+        ).fetchall()
+        self._drop(conn, [row[0] for row in expired], "users_expired")
+
+    def _drop(self, conn, user_ids, counter):
+        if not user_ids:
+            return
+        freed = 0
+        for user_id in user_ids:
+            row = conn.execute(
+                "SELECT bytes FROM conversation_users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is not None:
+                freed += row[0]
+            conn.execute("DELETE FROM conversation_users WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM conversation_turns WHERE user_id = ?", (user_id,))
+        changes = {"bytes_in_use": -freed}
+        if counter:
+            changes[counter] = len(user_ids)
+        self._bump(conn, **changes)
+
+    @staticmethod
+    def _bump(conn, **changes):
+        conn.executemany(
+            "UPDATE conversation_counters SET value = value + ? WHERE name = ?",
+            [(delta, name) for name, delta in changes.items() if delta]
+        )
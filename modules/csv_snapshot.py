@@ -0,0 +1,133 @@
+# modules/csv_snapshot.py
+import glob
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_DIR = ".snapshots"
+
+
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def snapshot_path(csv_path, variant, digest, snapshot_dir=None):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    root = snapshot_dir or os.path.join(os.path.dirname(csv_path) or ".", SNAPSHOT_DIR)
+    return os.path.join(root, f"{stem}-{variant}-{digest}-v{SNAPSHOT_VERSION}")
+
+
+# === GHI ===
+def _write_text(folder, i, series):
+    """Cột chữ: các chuỗi UTF-8 nối bằng ký tự NUL + mặt nạ giá trị thiếu"""
+    missing = series.isna().to_numpy()
+    values = ["" if m else str(v) for v, m in zip(series.tolist(), missing)]
+    text = "\0".join(values)
+    if text.count("\0") != max(len(values) - 1, 0):
+        raise ValueError("chuỗi chứa ký tự NUL")
+    with open(os.path.join(folder, f"{i}.txt"), "wb") as f:
+        f.write(text.encode("utf-8"))
+    np.save(os.path.join(folder, f"{i}.missing.npy"), missing)
+
+
+def write_snapshot(df, path):
+    """Ghi DataFrame thành thư mục các cột .npy; ghi vào thư mục tạm rồi đổi tên (nguyên tử)"""
+    tmp = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    try:
+        columns = []
+        for i, col in enumerate(df.columns):
+            series = df[col]
+            if series.dtype.kind in "biuf":
+                np.save(os.path.join(tmp, f"{i}.npy"), series.to_numpy())
+                columns.append({"name": col, "kind": "array"})
+            else:
+                _write_text(tmp, i, series)
+                columns.append({"name": col, "kind": "text", "dtype": str(series.dtype)})
+
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": SNAPSHOT_VERSION, "rows": len(df), "columns": columns}, f, ensure_ascii=False)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    try:
+        os.rename(tmp, path)
+    except OSError:  # worker khác vừa ghi xong cùng snapshot
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# === ĐỌC ===
+def _read_text(folder, i, dtype, rows):
+    with open(os.path.join(folder, f"{i}.txt"), "rb") as f:
+        values = f.read().decode("utf-8").split("\0") if rows else []
+    for row in np.flatnonzero(np.load(os.path.join(folder, f"{i}.missing.npy"))).tolist():
+        values[row] = None
+    return pd.Series(values, dtype=dtype)
+
+
+def read_snapshot(path):
+    """
+    Cột số được memory-map kiểu copy-on-write: các worker dùng chung trang nhớ khi chỉ đọc,
+    ghi vào DataFrame chỉ đổi bản riêng của tiến trình, không đụng file snapshot.
+    None nếu snapshot hỏng/khác phiên bản
+    """
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != SNAPSHOT_VERSION:
+            return None
+        data = {}
+        for i, column in enumerate(meta["columns"]):
+            if column["kind"] == "array":
+                # view ndarray: vẫn trỏ vào vùng map, nhưng DataFrame không mang lớp np.memmap
+                data[column["name"]] = np.load(os.path.join(path, f"{i}.npy"), mmap_mode="c").view(np.ndarray)
+            else:
+                data[column["name"]] = _read_text(path, i, column["dtype"], meta["rows"])
+        return pd.DataFrame(data, copy=False)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _remove_stale(path):
+    prefix = path.rsplit("-", 2)[0]  # <dir>/<stem>-<variant>
+    for other in glob.glob(f"{prefix}-*"):
+        if other != path and os.path.isdir(other):
+            shutil.rmtree(other, ignore_errors=True)
+
+
+def read_csv_utf8(csv_path):
+    """Cách parse mặc định (pandas tự nhận kiểu cột), dùng chung cho AI.py và chatbot"""
+    return pd.read_csv(csv_path, encoding="utf-8-sig")
+
+
+def load_csv(csv_path, parse=read_csv_utf8, variant="pandas", snapshot_dir=None):
+    """
+    Đọc CSV qua snapshot nhị phân khóa theo hash nội dung file.
+    parse(csv_path) -> DataFrame chỉ chạy khi CSV đổi (hoặc chưa có snapshot);
+    variant phân biệt các cách parse khác nhau của cùng một file.
+    """
+    path = snapshot_path(csv_path, variant, file_hash(csv_path), snapshot_dir)
+    df = read_snapshot(path) if os.path.isdir(path) else None
+    if df is not None:
+        return df
+
+    df = parse(csv_path)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_snapshot(df, path)
+        _remove_stale(path)
+    except (OSError, ValueError) as e:  # thư mục chỉ đọc...: vẫn dùng kết quả parse
+        print(f"⚠️ Không ghi được snapshot cho {csv_path}: {e}")
+    return df
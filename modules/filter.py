@@ -1,31 +1,51 @@
-import pandas as pd
+try:
+    from modules.filter_index import narrow, query_mask, row_ids
+    from modules.keyword_matcher import KeywordMatcher
+except ImportError:  # chạy trực tiếp trong thư mục modules (streamlit)
+    from filter_index import narrow, query_mask, row_ids
+    from keyword_matcher import KeywordMatcher
 
-def filter_by_location(df, location_city):
+# Các tính năng khách sạn - MỞ RỘNG THÊM
+FEATURE_KEYWORDS = {
+    'pool': ['hồ bơi', 'bể bơi', 'pool', 'bơi lội', 'swimming'],
+    'buffet': ['buffet', 'buffet sáng', 'ăn sáng', 'bữa sáng', 'breakfast'],
+    'gym': ['gym', 'phòng gym', 'thể hình', 'tập thể dục', 'fitness'],
+    'spa': ['spa', 'massage', 'xông hơi', 'thư giãn'],
+    'sea': ['biển', 'gần biển', 'view biển', 'bãi biển', 'biển đẹp', 'sea', 'beach'],
+    'view': ['view', 'cảnh đẹp', 'tầm nhìn', 'view thành phố', 'city view'],
+    'wifi': ['wifi', 'internet', 'mạng'],
+    'parking': ['bãi đỗ', 'đỗ xe', 'parking', 'garage'],
+    'breakfast': ['bữa sáng', 'ăn sáng', 'breakfast included'],
+    'restaurant': ['nhà hàng', 'restaurant', 'quán ăn']
+}
+
+FEATURE_TABLES = [('feature', FEATURE_KEYWORDS, False)]
+
+_matcher = KeywordMatcher(FEATURE_TABLES)
+
+# index: chỉ mục của DataFrame gốc (catalog.filter_index); df là DataFrame gốc hoặc bản lọc / .copy() của nó.
+# Không truyền index thì lọc thẳng trên các cột của df (query_mask), không dựng chỉ mục.
+
+def filter_by_location(df, location_city, index=None):
     """
     Lọc DataFrame dựa trên thành phố 
     """
     if not location_city: 
         return df
 
-    location_lower = str(location_city).lower().strip()
-    df_city_normalized = df['city'].str.lower().str.strip()
-    
-    filtered_df = df[df_city_normalized == location_lower]
-    return filtered_df
+    return narrow(df, index, city=location_city)
 
-def filter_by_budget(df, max_price):
+def filter_by_budget(df, max_price, index=None):
     """
     Lọc DataFrame dựa trên ngân sách tối đa 
     Chỉ giữ lại các khách sạn có giá <= max_price.
     """
-    if max_price <= 0: 
+    if not max_price or max_price <= 0: 
         return df
 
-    df_price = pd.to_numeric(df['price'], errors='coerce')
-    filtered_df = df[df_price <= max_price]
-    return filtered_df
+    return narrow(df, index, max_price=max_price)
 
-def filter_combined(df, min_stars, preferences):
+def filter_combined(df, min_stars, preferences, index=None):
     """
     Hàm lọc phức tạp, kết hợp nhiều tiêu chí.
     - Lọc theo số sao tối thiểu 
@@ -33,43 +53,22 @@ def filter_combined(df, min_stars, preferences):
     """
     print(f"[Filter] Đang lọc với {min_stars} sao và sở thích {preferences}...")
     
-   
-    filtered_df = df.copy()
-    
-   
-    if min_stars > 0:
-        filtered_df = filtered_df[filtered_df['stars'] >= min_stars]
-
+    amenities = []
     for key, value in preferences.items():
         if value: 
-            if key in filtered_df.columns:
-                filtered_df = filtered_df[filtered_df[key] == True]
+            if key in df.columns:
+                amenities.append(key)
             else:
                 print(f"Cảnh báo: Không tìm thấy cột '{key}' để lọc.")
-                
-    return filtered_df
 
-def parse_features_from_text(text):
+    query = dict(min_stars=min_stars if min_stars > 0 else None, amenities=amenities)
+    if index is None:
+        return df[query_mask(df, **query)]
+    return df[index.query(**query)[row_ids(df, index.size)]]
+
+def parse_features_from_text(text, hits=None):
     """Trích xuất các tính năng từ câu hỏi tự nhiên - MỞ RỘNG"""
-    text_lower = text.lower()
-    features = {}
-    
-    # Các tính năng khách sạn - MỞ RỘNG THÊM
-    feature_keywords = {
-        'pool': ['hồ bơi', 'bể bơi', 'pool', 'bơi lội', 'swimming'],
-        'buffet': ['buffet', 'buffet sáng', 'ăn sáng', 'bữa sáng', 'breakfast'],
-        'gym': ['gym', 'phòng gym', 'thể hình', 'tập thể dục', 'fitness'],
-        'spa': ['spa', 'massage', 'xông hơi', 'thư giãn'],
-        'sea': ['biển', 'gần biển', 'view biển', 'bãi biển', 'biển đẹp', 'sea', 'beach'],
-        'view': ['view', 'cảnh đẹp', 'tầm nhìn', 'view thành phố', 'city view'],
-        'wifi': ['wifi', 'internet', 'mạng'],
-        'parking': ['bãi đỗ', 'đỗ xe', 'parking', 'garage'],
-        'breakfast': ['bữa sáng', 'ăn sáng', 'breakfast included'],
-        'restaurant': ['nhà hàng', 'restaurant', 'quán ăn']
-    }
-    
-    for feature, keywords in feature_keywords.items():
-        if any(keyword in text_lower for keyword in keywords):
-            features[feature] = True
+    if hits is None:
+        hits = _matcher.scan(text)
     
-    return features
+    return {feature: True for feature in FEATURE_KEYWORDS if hits.has(('feature', feature))}
@@ -0,0 +1,197 @@
+# modules/filter_index.py
+import numpy as np
+import pandas as pd
+
+AMENITY_COLS = ('buffet', 'pool', 'sea', 'view', 'gym', 'spa')
+TRUE_VALUES = ('true', '1', '1.0', 'yes')
+
+
+def to_bool_array(series):
+    """Chuyển cột tiện ích (bool hoặc chuỗi 'TRUE'/'False') sang mảng bool"""
+    if series.dtype == bool:
+        return series.to_numpy()
+    return series.astype(str).str.strip().str.lower().isin(TRUE_VALUES).to_numpy()
+
+
+def _sorted_column(df, col):
+    """Trả về (giá trị, thứ tự tăng dần, giá trị đã sắp, số giá trị hợp lệ). NaN nằm cuối."""
+    if col in df.columns:
+        values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+    else:
+        values = np.full(len(df), np.nan)
+    order = np.argsort(values, kind='stable')
+    return values, order, values[order], int(np.count_nonzero(~np.isnan(values)))
+
+
+class HotelFilterIndex:
+    """
+    Chỉ mục lọc dựng sẵn cho một DataFrame khách sạn.
+    - city_bits / amenity bits: mảng bool theo row id, truy vấn = AND các mảng
+    - price / stars: thứ tự đã sắp xếp, lọc bằng tìm kiếm nhị phân
+    Không tạo bản sao DataFrame nào khi truy vấn.
+    Row id là vị trí dòng trong df (df có RangeIndex, ví dụ catalog.df).
+    """
+
+    def __init__(self, df):
+        self.size = len(df)
+        self.columns = set(df.columns)
+        self.df = df
+
+        self.city_bits = {}
+        if 'city' in df.columns:
+            cities = df['city'].astype(str).str.strip().str.lower()
+            for city, rows in cities.groupby(cities).indices.items():
+                bits = np.zeros(self.size, dtype=bool)
+                bits[rows] = True
+                self.city_bits[city] = bits
+
+        self.amenity_bits = {
+            col: to_bool_array(df[col]) for col in AMENITY_COLS if col in df.columns
+        }
+
+        (self.price, self.price_order,
+         self.sorted_price, self.price_valid) = _sorted_column(df, 'price')
+        (self.stars, self.stars_order,
+         self.sorted_stars, self.stars_valid) = _sorted_column(df, 'stars')
+
+        # Thứ tự ổn định cho sắp xếp / phân trang: giá -> rating cao trước -> tên -> row id.
+        # Giá thiếu luôn nằm cuối.
+        rating = pd.to_numeric(df['rating'], errors='coerce').to_numpy(dtype=float) \
+            if 'rating' in df.columns else np.full(self.size, np.nan)
+        names = df['name'].astype(str).to_numpy() if 'name' in df.columns else np.zeros(self.size)
+        name_rank = np.unique(names, return_inverse=True)[1].reshape(-1)
+        rows = np.arange(self.size)
+        rating_key = np.where(np.isnan(rating), np.inf, -rating)
+        missing_price = np.isnan(self.price)
+        self.sort_orders = {
+            '': rows,
+            'asc': np.lexsort((rows, name_rank, rating_key, self.price, missing_price)),
+            'desc': np.lexsort((rows, name_rank, rating_key, -self.price, missing_price)),
+        }
+
+    # --- Các mặt nạ cơ bản ---
+    def all_bits(self):
+        return np.ones(self.size, dtype=bool)
+
+    def empty_bits(self):
+        return np.zeros(self.size, dtype=bool)
+
+    def city_mask(self, city):
+        bits = self.city_bits.get(str(city).strip().lower())
+        return bits if bits is not None else np.zeros(self.size, dtype=bool)
+
+    def amenity_mask(self, col):
+        """Mặt nạ cho cột tiện ích; cột lạ được dựng lần đầu rồi giữ lại"""
+        bits = self.amenity_bits.get(col)
+        if bits is None:
+            if col not in self.columns:
+                return None
+            bits = self.amenity_bits[col] = to_bool_array(self.df[col])
+        return bits
+
+    def budget_mask(self, max_price):
+        k = np.searchsorted(self.sorted_price[:self.price_valid], max_price, side='right')
+        bits = np.zeros(self.size, dtype=bool)
+        bits[self.price_order[:k]] = True
+        return bits
+
+    def stars_mask(self, min_stars):
+        k = np.searchsorted(self.sorted_stars[:self.stars_valid], min_stars, side='left')
+        bits = np.zeros(self.size, dtype=bool)
+        bits[self.stars_order[k:self.stars_valid]] = True
+        return bits
+
+    # --- Truy vấn tổng hợp ---
+    def query(self, city=None, max_price=None, min_stars=None, amenities=(), base=None):
+        """Trả về mặt nạ bool của các dòng thỏa mọi điều kiện"""
+        bits = self.all_bits() if base is None else base.copy()
+        if city:
+            bits &= self.city_mask(city)
+        if max_price is not None:
+            bits &= self.budget_mask(max_price)
+        if min_stars is not None:
+            bits &= self.stars_mask(min_stars)
+        for col in amenities:
+            col_bits = self.amenity_mask(col)
+            if col_bits is None:
+                bits[:] = False
+            else:
+                bits &= col_bits
+        return bits
+
+    def order(self, sort=''):
+        return self.sort_orders.get(sort, self.sort_orders[''])
+
+    def rows(self, bits, sort=''):
+        """Danh sách row id theo thứ tự gốc hoặc theo giá ('asc' / 'desc')"""
+        if not sort:
+            return np.flatnonzero(bits)
+        order = self.order(sort)
+        return order[bits[order]]
+
+    def page(self, bits, sort='', offset=0, limit=None, after=None, order=None):
+        """
+        Một trang kết quả: (row id, tổng số kết quả, vị trí bắt đầu, cursor trang sau).
+        cursor = vị trí trong thứ tự sắp xếp của dòng cuối trang (after=cursor để lấy tiếp);
+        không có cursor thì dùng offset. order: thứ tự riêng (ví dụ theo độ liên quan) thay cho sort.
+        """
+        order = self.order(sort) if order is None else order
+        positions = np.flatnonzero(bits[order])
+        total = len(positions)
+        start = int(np.searchsorted(positions, after, side='right')) if after is not None else max(offset, 0)
+        end = total if limit is None else min(start + limit, total)
+        picked = positions[start:end]
+        next_cursor = int(picked[-1]) if end < total and len(picked) else None
+        return order[picked], total, start, next_cursor
+
+
+# === LỌC DATAFRAME BẰNG CHỈ MỤC CÓ SẴN ===
+def row_ids(df, size):
+    """
+    Row id (vị trí trong DataFrame gốc) của các dòng df.
+    DataFrame gốc có RangeIndex nên bản lọc / .copy() của nó vẫn giữ đúng nhãn dòng.
+    """
+    rows = df.index.to_numpy()
+    if rows.dtype.kind not in 'iu' or (len(rows) and (rows.min() < 0 or rows.max() >= size)):
+        raise ValueError("DataFrame không thuộc danh mục đã dựng chỉ mục (nhãn dòng phải là row id)")
+    return rows
+
+
+def query_mask(df, city=None, max_price=None, min_stars=None, amenities=()):
+    """
+    Cùng điều kiện với HotelFilterIndex.query nhưng so thẳng trên các cột của df, không dựng chỉ mục:
+    dùng cho lần lọc một lượt trên DataFrame chưa có chỉ mục (dựng chỉ mục cho một truy vấn tốn hơn lọc).
+    """
+    bits = np.ones(len(df), dtype=bool)
+    if city:
+        if 'city' not in df.columns:
+            return np.zeros(len(df), dtype=bool)
+        bits &= (df['city'].astype(str).str.strip().str.lower() == str(city).strip().lower()).to_numpy()
+    for col, limit, keep in (('price', max_price, np.less_equal), ('stars', min_stars, np.greater_equal)):
+        if limit is None:
+            continue
+        if col not in df.columns:
+            return np.zeros(len(df), dtype=bool)
+        values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+        bits &= keep(values, limit)  # NaN -> False
+    for col in amenities:
+        if col not in df.columns:
+            return np.zeros(len(df), dtype=bool)
+        bits &= to_bool_array(df[col])
+    return bits
+
+
+def narrow(df, index=None, **query):
+    """
+    Các dòng của df thỏa truy vấn (tham số như HotelFilterIndex.query).
+    index: chỉ mục của DataFrame gốc (ví dụ catalog.filter_index), df là DataFrame gốc
+    hoặc bản lọc / bản sao của nó; không truyền index thì lọc thẳng bằng query_mask.
+    """
+    if index is None:
+        return df[query_mask(df, **query)]
+    return df[index.query(**query)[row_ids(df, index.size)]]
+
+
+def select(base, bits):
+    """Cắt DataFrame gốc theo mặt nạ (nhãn dòng = row id, lọc tiếp được bằng cùng chỉ mục)"""
+    return base.iloc[np.flatnonzero(bits)]
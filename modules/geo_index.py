@@ -0,0 +1,111 @@
+# modules/geo_index.py
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Khoảng cách km từ một điểm tới mảng điểm"""
+    phi1 = math.radians(lat)
+    phi2 = np.radians(lats)
+    dphi = phi2 - phi1
+    dlambda = np.radians(lons) - math.radians(lon)
+    a = np.sin(dphi/2)**2 + math.cos(phi1)*np.cos(phi2)*np.sin(dlambda/2)**2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+
+class GeoGridIndex:
+    """
+    Lưới ô vuông lat/lon (kiểu geohash) để truy vấn bán kính và k điểm gần nhất.
+    Mỗi truy vấn chỉ xét các ô quanh điểm cần tìm thay vì toàn bộ danh sách.
+    Điểm thiếu tọa độ (NaN) không được đưa vào lưới.
+    """
+
+    def __init__(self, lat, lon, cell_km=5.0):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.size = len(self.lat)
+        self.cell_deg = cell_km / KM_PER_DEGREE
+
+        valid = ~(np.isnan(self.lat) | np.isnan(self.lon))
+        self.valid = valid
+        positions = np.flatnonzero(valid)
+        rows = np.floor(self.lat[positions] / self.cell_deg).astype(np.int64)
+        cols = np.floor(self.lon[positions] / self.cell_deg).astype(np.int64)
+
+        self.cells = {}
+        for pos, key in zip(positions.tolist(), zip(rows.tolist(), cols.tolist())):
+            self.cells.setdefault(key, []).append(pos)
+        self.cells = {key: np.array(ids) for key, ids in self.cells.items()}
+
+        if self.cells:
+            keys = np.array(list(self.cells))
+            self.row_range = (keys[:, 0].min(), keys[:, 0].max())
+            self.col_range = (keys[:, 1].min(), keys[:, 1].max())
+
+    def __len__(self):
+        return int(self.valid.sum())
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def _candidates(self, row0, row1, col0, col1):
+        ids = [
+            self.cells[(r, c)]
+            for r in range(max(row0, self.row_range[0]), min(row1, self.row_range[1]) + 1)
+            for c in range(max(col0, self.col_range[0]), min(col1, self.col_range[1]) + 1)
+            if (r, c) in self.cells
+        ]
+        return np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+
+    def _lon_cells(self, lat, km):
+        cos_lat = max(math.cos(math.radians(lat)), 0.01)
+        return int(math.ceil(km / (KM_PER_DEGREE * cos_lat * self.cell_deg)))
+
+    def within_radius(self, lat, lon, radius_km, allowed=None):
+        """(vị trí, khoảng cách) các điểm trong bán kính, sắp theo khoảng cách tăng dần"""
+        if not self.cells:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        row, col = self._cell(lat, lon)
+        dr = int(math.ceil(radius_km / (KM_PER_DEGREE * self.cell_deg)))
+        dc = self._lon_cells(lat, radius_km)
+
+        ids = self._candidates(row - dr, row + dr, col - dc, col + dc)
+        if allowed is not None:
+            ids = ids[allowed[ids]]
+        dist = haversine_km(lat, lon, self.lat[ids], self.lon[ids])
+        keep = dist <= radius_km
+        ids, dist = ids[keep], dist[keep]
+        order = np.argsort(dist, kind='stable')
+        return ids[order], dist[order]
+
+    def nearest(self, lat, lon, k=1, max_km=None, allowed=None):
+        """k điểm gần nhất: mở rộng dần từng vòng ô cho tới khi chắc chắn đủ k điểm"""
+        if not self.cells:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        row, col = self._cell(lat, lon)
+        cell_km = self.cell_deg * KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01)
+        max_ring = max(
+            abs(row - self.row_range[0]), abs(row - self.row_range[1]),
+            abs(col - self.col_range[0]), abs(col - self.col_range[1]),
+        )
+
+        ring = 0
+        while True:
+            ids = self._candidates(row - ring, row + ring, col - ring, col + ring)
+            if allowed is not None:
+                ids = ids[allowed[ids]]
+            dist = haversine_km(lat, lon, self.lat[ids], self.lon[ids])
+            # mọi điểm cách <= ring * cell_km chắc chắn đã nằm trong các ô đã xét
+            covered = ring * cell_km
+            done = ring >= max_ring or (max_km is not None and covered >= max_km)
+            if done or np.count_nonzero(dist <= covered) >= k:
+                if max_km is not None:
+                    keep = dist <= max_km
+                    ids, dist = ids[keep], dist[keep]
+                order = np.argsort(dist, kind='stable')[:k]
+                return ids[order], dist[order]
+            ring += 1
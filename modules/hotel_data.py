@@ -1 +1,114 @@
+# modules/hotel_data.py
+import re
 
+import pandas as pd
+
+from modules.filter_index import HotelFilterIndex
+from modules.geo_index import GeoGridIndex
+from modules.recommend import HotelScorer
+
+TAG_RE = re.compile(r'<[^>]*>')
+
+
+def map_hotel_row(row):
+    """Chuẩn hóa một dòng khách sạn thành dict dùng cho template"""
+    h = dict(row)
+    h["image"] = h.get("image_url", h.get("image", ""))
+    html_desc = h.get("review") or h.get("description") or ""
+    if not isinstance(html_desc, str):  # NaN từ CSV
+        html_desc = ""
+    h["full_desc"] = html_desc  # để dùng chi tiết
+    # tạo short_desc cho danh sách
+    clean = TAG_RE.sub('', html_desc)  # loại bỏ tag
+    h["short_desc"] = clean[:150] + ("..." if len(clean) > 150 else "")
+
+    h["gym"] = h.get("gym", False)
+    h["spa"] = h.get("spa", False)
+    h["sea_view"] = h.get("sea") if "sea" in h else h.get("sea_view", False)
+    return h
+
+
+# Các trường trả về trong API JSON
+SUMMARY_FIELDS = ('name', 'city', 'price', 'stars', 'rating', 'image')
+SUMMARY_FLAGS = ('buffet', 'pool', 'sea', 'view')
+HOTEL_FIELDS = SUMMARY_FIELDS + SUMMARY_FLAGS
+
+
+def _json_value(value):
+    if isinstance(value, float) and value != value:  # NaN
+        return None
+    return value
+
+
+def hotel_summary(h):
+    """Bản rút gọn của một khách sạn cho JSON (không kèm mô tả HTML)"""
+    summary = {field: _json_value(h.get(field)) for field in SUMMARY_FIELDS}
+    for flag in SUMMARY_FLAGS:
+        summary[flag] = str(h.get(flag)).strip().lower() in ('true', '1', '1.0', 'yes')
+    return summary
+
+
+def normalize_city(city):
+    return str(city or '').strip().lower()
+
+
+class HotelCatalog:
+    """
+    Danh mục khách sạn dựng một lần khi khởi động.
+    - records: dict khách sạn đã map sẵn (image, short_desc, sea_view...)
+    - by_name: tên -> dict, tra cứu O(1)
+    - city_postings: thành phố (chữ thường) -> danh sách row id
+    - name_postings: tên -> danh sách row id (kể cả bản trùng tên)
+    - filter_index: chỉ mục lọc (truyền vào modules/filter.py qua tham số index)
+    - scorer: dữ liệu tính điểm cho calculate_scores_and_explain (dựng khi dùng lần đầu)
+    - geo_index: lưới tọa độ (chỉ có khi CSV có cột lat/lon)
+    Các dict trả về được dùng chung giữa các request, không được sửa trực tiếp.
+    """
+
+    def __init__(self, df):
+        if not df.index.equals(pd.RangeIndex(len(df))):
+            df = df.reset_index(drop=True)  # row id = nhãn dòng, bản lọc của df vẫn tra được chỉ mục
+        self.df = df
+        self.records = [map_hotel_row(r) for r in df.to_dict(orient='records')]
+        self.by_name = {}
+        self.city_postings = {}
+        self.name_postings = {}
+
+        for row_id, h in enumerate(self.records):
+            # giữ bản ghi đầu tiên nếu trùng tên (giống iloc[0] trước đây)
+            self.by_name.setdefault(h.get('name'), h)
+            self.city_postings.setdefault(normalize_city(h.get('city')), []).append(row_id)
+            self.name_postings.setdefault(h.get('name'), []).append(row_id)
+
+        self.filter_index = HotelFilterIndex(df)
+        self._scorer = None
+        self.geo_index = None
+        if 'lat' in df.columns and 'lon' in df.columns:
+            self.geo_index = GeoGridIndex(
+                pd.to_numeric(df['lat'], errors='coerce').to_numpy(dtype=float),
+                pd.to_numeric(df['lon'], errors='coerce').to_numpy(dtype=float),
+            )
+        self.cities = sorted({
+            h['city'] for h in self.records
+            if isinstance(h.get('city'), str) and h['city']
+        })
+
+    @property
+    def scorer(self):
+        # ma trận từ khóa đánh giá chỉ cần cho gợi ý theo sở thích, không dựng khi nạp danh mục
+        if self._scorer is None:
+            self._scorer = HotelScorer(self.df)
+        return self._scorer
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, name):
+        """Trả về dict khách sạn theo tên hoặc None"""
+        return self.by_name.get(name)
+
+    def rows_in_city(self, city):
+        return self.city_postings.get(normalize_city(city), [])
+
+    def in_city(self, city):
+        return [self.records[i] for i in self.rows_in_city(city)]
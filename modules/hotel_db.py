@@ -0,0 +1,443 @@
+# modules/hotel_db.py
+import os
+import random
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from modules.availability import (
+    CALENDAR_SCHEMA, ROOM_TYPES, AvailabilityCalendar, booking_stay, hold_rooms, rebuild_calendar,
+    release_rooms, stay_nights, sync_capacity,
+)
+from modules.booking_metrics import (
+    CANCELLED_STATUSES, METRICS_SCHEMA, BookingMetrics, is_built, rebuild_metrics,
+    read_accounts, record_booking, record_hotel_cities, record_status_change,
+)
+
+DB_PATH = "hotel.db"
+# số phòng mỗi loại khi dữ liệu nguồn không có rooms_available (≈ trung bình của data/hotels.csv)
+DEFAULT_ROOMS_AVAILABLE = 3
+
+HOTEL_COLUMNS = [
+    "name", "city", "price", "stars", "rating", "image_url",
+    "buffet", "pool", "sea", "view", "review",
+    "status", "rooms_available", "event_image_url",
+]
+HOTEL_TYPES = {
+    "price": "REAL", "stars": "INTEGER", "rating": "REAL",
+    "buffet": "BOOLEAN", "pool": "BOOLEAN", "sea": "BOOLEAN", "view": "BOOLEAN",
+    "rooms_available": "INTEGER",
+}
+
+BOOKING_COLUMNS = [
+    "booking_code", "hotel_name", "room_type", "price", "user_name", "phone", "email",
+    "num_adults", "num_children", "checkin_date", "nights", "special_requests",
+    "booking_time", "status", "username", "user_email",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hotels (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    city TEXT,
+    price REAL,
+    stars INTEGER,
+    rating REAL,
+    image_url TEXT,
+    buffet BOOLEAN,
+    pool BOOLEAN,
+    sea BOOLEAN,
+    view BOOLEAN,
+    review TEXT,
+    status TEXT,
+    rooms_available INTEGER,
+    event_image_url TEXT
+);
+CREATE TABLE IF NOT EXISTS bookings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    booking_code TEXT UNIQUE,
+    hotel_name TEXT NOT NULL,
+    room_type TEXT,
+    price REAL,
+    user_name TEXT,
+    phone TEXT,
+    email TEXT,
+    num_adults INTEGER,
+    num_children INTEGER,
+    checkin_date TEXT,
+    nights INTEGER,
+    special_requests TEXT,
+    booking_time TEXT,
+    status TEXT,
+    username TEXT,
+    user_email TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_bookings_hotel ON bookings(hotel_name, checkin_date);
+CREATE INDEX IF NOT EXISTS idx_bookings_email ON bookings(email);
+CREATE INDEX IF NOT EXISTS idx_bookings_time ON bookings(booking_time);
+CREATE INDEX IF NOT EXISTS idx_bookings_email_lower ON bookings(lower(email), booking_time);
+CREATE INDEX IF NOT EXISTS idx_bookings_user_email ON bookings(lower(user_email), booking_time);
+CREATE INDEX IF NOT EXISTS idx_bookings_username ON bookings(username, booking_time);
+CREATE INDEX IF NOT EXISTS idx_bookings_phone ON bookings(phone, booking_time);
+"""
+
+DEFAULT_STATUS = "Chờ xác nhận"
+
+
+class RoomUnavailableError(Exception):
+    """Khách sạn không còn phòng trống (hoặc không có trong kho phòng)"""
+
+
+# === KẾT NỐI: MỖI LUỒNG / WORKER GIỮ MỘT KẾT NỐI ===
+_local = threading.local()
+
+
+def get_connection(db_path=DB_PATH):
+    """
+    Kết nối SQLite dùng lại trong cùng luồng của cùng worker.
+    Sau khi gunicorn fork, pid đổi nên worker mới tự mở kết nối riêng.
+    """
+    pool = getattr(_local, 'pool', None)
+    if pool is None or _local.pid != os.getpid():
+        pool = _local.pool = {}
+        _local.pid = os.getpid()
+
+    conn = pool.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        pool[db_path] = conn
+    return conn
+
+
+class transaction:
+    """Giao dịch ghi: BEGIN IMMEDIATE ... COMMIT / ROLLBACK"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def ensure_schema(conn):
+    """Tạo bảng/chỉ mục nếu chưa có, bổ sung cột mới cho bảng hotels cũ"""
+    conn.executescript(SCHEMA)
+    conn.executescript(METRICS_SCHEMA)
+    conn.executescript(CALENDAR_SCHEMA)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(hotels)")}
+    for col in HOTEL_COLUMNS:
+        if col not in existing:
+            try:
+                conn.execute(f"ALTER TABLE hotels ADD COLUMN {col} {HOTEL_TYPES.get(col, 'TEXT')}")
+            except sqlite3.OperationalError:
+                pass  # worker khác vừa thêm cột
+    _unique_hotel_names(conn)
+
+
+def _unique_hotel_names(conn):
+    """
+    Chỉ mục UNIQUE trên hotels(name) (cho upsert ON CONFLICT(name)). hotel.db cũ có thể có tên trùng:
+    giữ dòng mới nhất (id lớn nhất) của mỗi tên rồi mới tạo chỉ mục, trong cùng một giao dịch.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_hotels_name'").fetchone():
+        return
+    with transaction(conn):
+        removed = conn.execute(
+            "DELETE FROM hotels WHERE name IS NOT NULL AND id NOT IN "
+            "(SELECT MAX(id) FROM hotels WHERE name IS NOT NULL GROUP BY name)"
+        ).rowcount
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_hotels_name ON hotels(name)")
+    if removed:
+        print(f"⚠️ Đã xóa {removed} dòng hotels trùng tên (giữ dòng mới nhất) trước khi tạo chỉ mục UNIQUE")
+
+
+def _to_bool(series):
+    """Cột bool/chuỗi -> mảng bool; chỉ so khớp trên các giá trị khác nhau"""
+    if series.dtype == bool:
+        return series.to_numpy()
+    codes, uniques = pd.factorize(series)  # NaN -> -1
+    truthy = [str(u).strip().lower() in ('true', '1', '1.0', 'yes') for u in uniques]
+    return np.array(truthy + [False])[codes]
+
+
+def _to_number(series):
+    values = pd.to_numeric(series, errors='coerce')
+    bad = values.isna() & series.notna()
+    if bad.any():  # chuỗi kiểu "1,200,000"
+        values[bad] = pd.to_numeric(series[bad].astype(str).str.replace(',', ''), errors='coerce')
+    return values.to_numpy(dtype=float)
+
+
+def _nullable(values, missing):
+    out = np.empty(len(values), dtype=object)
+    ok = ~missing
+    out[ok] = values[ok].tolist()
+    out[missing] = None
+    return out.tolist()
+
+
+def hotel_values(df):
+    """Chuyển DataFrame khách sạn sang list tuple theo HOTEL_COLUMNS (thiếu cột -> NULL)"""
+    n = len(df)
+    columns = []
+    for col in HOTEL_COLUMNS:
+        if col not in df.columns:
+            columns.append([None] * n)
+            continue
+        series = df[col]
+        kind = HOTEL_TYPES.get(col)
+        if kind == "BOOLEAN":
+            columns.append(_to_bool(series).astype(int).tolist())
+        elif kind in ("REAL", "INTEGER"):
+            values = _to_number(series)
+            missing = np.isnan(values)
+            if kind == "INTEGER":
+                values = np.where(missing, 0, values).round().astype(np.int64)
+            columns.append(_nullable(values, missing))
+        else:
+            columns.append(_nullable(series.to_numpy(dtype=object), series.isna().to_numpy()))
+    return list(zip(*columns))
+
+
+# === ĐẶT PHÒNG ===
+class BookingEngine:
+    """
+    Đặt phòng trên hotel.db (WAL): mỗi lượt đặt là một giao dịch nhỏ
+    giữ phòng trên lịch theo đêm (self.calendar) rồi chèn một dòng bookings,
+    không phụ thuộc số booking đã có.
+    rooms_available là số phòng mỗi loại, đồng bộ từ CSV danh mục (thiếu thì DEFAULT_ROOMS_AVAILABLE).
+    Bộ đếm dashboard (self.metrics) được cập nhật trong cùng giao dịch;
+    Chi tiêu theo tài khoản (total_spent) là bộ đếm scope 'user' trong cùng bảng; users_csv chỉ
+    được đọc: làm mốc khi dựng lại bộ đếm và để tra tài khoản theo email đặt phòng (account_for).
+    """
+
+    def __init__(self, db_path=DB_PATH, legacy_csv=None, users_csv=None, default_rooms=DEFAULT_ROOMS_AVAILABLE):
+        self.db_path = db_path
+        self.default_rooms = default_rooms
+        self.users_csv = users_csv
+        self._accounts = (None, {})  # (mtime users_csv, email -> username)
+        conn = self.connection()
+        ensure_schema(conn)
+        if legacy_csv:
+            self._import_legacy_csv(legacy_csv)
+        self.metrics = BookingMetrics(self.connection)
+        self.calendar = AvailabilityCalendar(self.connection)
+        if not is_built(conn) or self.calendar.version() == 0:
+            with transaction(conn):
+                # kiểm tra lại trong giao dịch: worker khác có thể vừa dựng xong
+                if not is_built(conn):
+                    rebuild_metrics(conn, users_csv)
+                if self.calendar.version() == 0:
+                    rebuild_calendar(conn, CANCELLED_STATUSES)
+
+    def connection(self):
+        return get_connection(self.db_path)
+
+    def sync_hotels(self, df):
+        """
+        Thêm khách sạn còn thiếu vào bảng hotels và đồng bộ sức chứa: theo cột rooms_available
+        của df nếu có, khách sạn không có số liệu nhận default_rooms (luôn hữu hạn)
+        """
+        cols = ", ".join(HOTEL_COLUMNS)
+        marks = ", ".join("?" for _ in HOTEL_COLUMNS)
+        rooms_col = HOTEL_COLUMNS.index("rooms_available")
+        with transaction(self.connection()) as conn:
+            known = {row[0] for row in conn.execute("SELECT name FROM hotels")}
+            values = hotel_values(df)
+            conn.executemany(f"INSERT OR IGNORE INTO hotels ({cols}) VALUES ({marks})", values)
+            capacities = [(v[0], v[rooms_col]) for v in values if v[0] is not None and v[rooms_col] is not None]
+            sync_capacity(conn, capacities, self.default_rooms)
+            # booking cũ của khách sạn mới thêm giờ mới biết thành phố
+            record_hotel_cities(conn, {v[0] for v in values if v[0] is not None and v[0] not in known})
+
+    def _import_legacy_csv(self, csv_path):
+        """Chuyển bookings.csv cũ vào SQLite một lần (khi bảng bookings còn trống)"""
+        conn = self.connection()
+        if not os.path.exists(csv_path):
+            return
+        if conn.execute("SELECT 1 FROM bookings LIMIT 1").fetchone():
+            return
+
+        df = pd.read_csv(csv_path, encoding="utf-8-sig", dtype=str)
+        if df.empty:
+            return
+        df = df.astype(object).where(df.notna(), None)
+        cols = [c for c in BOOKING_COLUMNS if c in df.columns and c != "booking_code"]
+        with transaction(conn):
+            if conn.execute("SELECT 1 FROM bookings LIMIT 1").fetchone():
+                return  # worker khác đã chuyển xong
+            for row in df.to_dict(orient='records'):
+                values = {c: row.get(c) for c in cols}
+                values["booking_code"] = row.get("booking_code") or self._new_code(conn)
+                values["status"] = values.get("status") or DEFAULT_STATUS
+                self._insert(conn, values)
+
+    @staticmethod
+    def _new_code(conn):
+        while True:
+            code = str(random.randint(10_000_000, 99_999_999))
+            if not conn.execute("SELECT 1 FROM bookings WHERE booking_code = ?", (code,)).fetchone():
+                return code
+
+    @staticmethod
+    def _insert(conn, values):
+        cols = [c for c in BOOKING_COLUMNS if c in values]
+        conn.execute(
+            f"INSERT INTO bookings ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+            [values[c] for c in cols]
+        )
+
+    def reserve_room(self, info):
+        """
+        Giữ phòng cho mọi đêm [checkin_date, checkin_date + nights) và ghi booking
+        trong cùng giao dịch. Trả về info kèm booking_code; ném RoomUnavailableError
+        nếu có đêm đã kín phòng, ValueError nếu ngày / số đêm không hợp lệ.
+        """
+        booking = dict(info)
+        booking["room_type"] = booking.get("room_type") or ROOM_TYPES[0]
+        booking["nights"] = int(booking.get("nights") or 1)
+        stay_nights(booking.get("checkin_date"), booking["nights"])  # kiểm tra trước khi mở giao dịch
+        with transaction(self.connection()) as conn:
+            if not hold_rooms(conn, booking["hotel_name"], booking["room_type"],
+                              booking["checkin_date"], booking["nights"]):
+                raise RoomUnavailableError(booking["hotel_name"])
+
+            booking["status"] = booking.get("status") or DEFAULT_STATUS
+            booking["booking_code"] = self._new_code(conn)
+            self._insert(conn, booking)
+            record_booking(conn, booking)
+        return booking
+
+    def get_booking(self, booking_code):
+        row = self.connection().execute(
+            "SELECT * FROM bookings WHERE booking_code = ?", (str(booking_code),)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def find_bookings(self, email=None, username=None, phone=None, limit=500):
+        """
+        Booking của một khách theo email (email đặt phòng hoặc email tài khoản, không phân biệt
+        hoa thường), username và/hoặc số điện thoại; mới nhất trước.
+        Mỗi điều kiện đi thẳng vào chỉ mục (khóa, booking_time) nên chỉ đọc đúng các dòng khớp,
+        không quét bảng bookings.
+        """
+        parts, params = [], []
+        if email:
+            email = email.strip().lower()
+            parts += ["SELECT * FROM bookings WHERE lower(email) = ?",
+                      "SELECT * FROM bookings WHERE lower(user_email) = ?"]
+            params += [email, email]
+        if username:
+            parts.append("SELECT * FROM bookings WHERE username = ?")
+            params.append(username.strip())
+        if phone:
+            parts.append("SELECT * FROM bookings WHERE phone = ?")
+            params.append(phone.strip())
+        if not parts:
+            return []
+        rows = self.connection().execute(
+            " UNION ".join(parts) + " ORDER BY booking_time DESC LIMIT ?", params + [limit]
+        )
+        return [dict(row) for row in rows]
+
+    def list_bookings(self, status=None, limit=500):
+        """Booking mới nhất trước; lọc theo trạng thái nếu có"""
+        sql, params = "SELECT * FROM bookings", []
+        if status:
+            sql, params = sql + " WHERE status = ?", [status]
+        rows = self.connection().execute(sql + " ORDER BY booking_time DESC LIMIT ?", params + [limit])
+        return [dict(row) for row in rows]
+
+    def set_status(self, booking_code, status):
+        """Đổi trạng thái booking; trả về booking đã cập nhật hoặc None nếu không có"""
+        with transaction(self.connection()) as conn:
+            row = conn.execute("SELECT * FROM bookings WHERE booking_code = ?", (str(booking_code),)).fetchone()
+            if row is None:
+                return None
+            booking = dict(row)
+            was_active = booking["status"] not in CANCELLED_STATUSES
+            if was_active and status in CANCELLED_STATUSES:
+                self._release(conn, booking)
+            elif not was_active and status not in CANCELLED_STATUSES:
+                stay = booking_stay(booking)
+                if stay and not hold_rooms(conn, booking["hotel_name"], *stay):
+                    raise RoomUnavailableError(booking["hotel_name"])
+            conn.execute("UPDATE bookings SET status = ? WHERE id = ?", (status, booking["id"]))
+            record_status_change(conn, booking, booking["status"], status)
+            booking["status"] = status
+        return booking
+
+    def delete_booking(self, booking_code):
+        """Xóa booking, trả lại phòng cho khách sạn; trả về booking đã xóa hoặc None"""
+        with transaction(self.connection()) as conn:
+            row = conn.execute("SELECT * FROM bookings WHERE booking_code = ?", (str(booking_code),)).fetchone()
+            if row is None:
+                return None
+            booking = dict(row)
+            conn.execute("DELETE FROM bookings WHERE id = ?", (booking["id"],))
+            if booking["status"] not in CANCELLED_STATUSES:
+                self._release(conn, booking)
+            record_booking(conn, booking, sign=-1)
+        return booking
+
+    def rebuild_metrics(self):
+        """Đối soát: tính lại toàn bộ bộ đếm và lịch phòng từ bảng bookings"""
+        with transaction(self.connection()) as conn:
+            rebuild_metrics(conn, self.users_csv)
+            rebuild_calendar(conn, CANCELLED_STATUSES)
+
+    @staticmethod
+    def _release(conn, booking):
+        stay = booking_stay(booking)
+        if stay:
+            release_rooms(conn, booking["hotel_name"], *stay)
+
+    def account_for(self, email):
+        """
+        username của tài khoản có email này (None nếu không có).
+        users.csv chỉ được đọc lại khi mtime đổi: mỗi lượt đặt phòng tốn một lần stat.
+        """
+        if not email or not self.users_csv:
+            return None
+        try:
+            mtime = os.stat(self.users_csv).st_mtime_ns
+        except OSError:
+            return None
+        if self._accounts[0] != mtime:
+            self._accounts = (mtime, read_accounts(self.users_csv))
+        return self._accounts[1].get(email.strip().lower())
+
+    def rooms_available(self, hotel_name):
+        row = self.connection().execute(
+            "SELECT rooms_available FROM hotels WHERE name = ?", (hotel_name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def hotel_inventory(self):
+        """tên -> (rooms_available, status) của mọi khách sạn trong kho phòng"""
+        return {
+            row[0]: (row[1], row[2])
+            for row in self.connection().execute("SELECT name, rooms_available, status FROM hotels")
+        }
+
+    def set_rooms_available(self, hotel_name, rooms):
+        with transaction(self.connection()) as conn:
+            return conn.execute(
+                "UPDATE hotels SET rooms_available = ? WHERE name = ?", (rooms, hotel_name)
+            ).rowcount > 0
+
+    def set_hotel_status(self, hotel_name, status):
+        with transaction(self.connection()) as conn:
+            return conn.execute(
+                "UPDATE hotels SET status = ? WHERE name = ?", (status, hotel_name)
+            ).rowcount > 0
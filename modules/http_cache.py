@@ -0,0 +1,86 @@
+# modules/http_cache.py
+import gzip
+import hashlib
+
+from flask import Response, request
+
+from modules.render_cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # không cài brotli: chỉ dùng gzip
+    brotli = None
+
+HTML_TYPE = 'text/html; charset=utf-8'
+COMPRESS_MIN_BYTES = 1024  # body nhỏ hơn thì nén không đáng
+
+
+def make_etag(*parts):
+    """ETag từ các thành phần quyết định nội dung (chữ ký file nguồn, tham số truy vấn...)"""
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def signature_mtime(signature):
+    """Thời điểm sửa mới nhất (giây) trong chữ ký [(mtime_ns, size) | None, ...]"""
+    times = [entry[0] for entry in signature if entry]
+    return max(times) / 1e9 if times else None
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+class ConditionalResponder:
+    """
+    Trả HTML kèm ETag (weak, dùng chung mọi kiểu nén) và Last-Modified.
+    - If-None-Match / If-Modified-Since khớp -> 304, không render lại
+    - body >= threshold byte được nén br/gzip theo Accept-Encoding; bản nén được giữ
+      trong LRU theo (etag, encoding) để lượt sau không phải nén lại
+    """
+
+    def __init__(self, threshold=COMPRESS_MIN_BYTES, cache=None):
+        self.threshold = threshold
+        self.cache = cache if cache is not None else LRUCache(max_entries=1024)
+
+    def _encoding(self):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def _not_modified(self, etag, last_modified):
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(etag)
+        since = request.if_modified_since
+        return bool(last_modified and since and int(last_modified) <= since.timestamp())
+
+    def respond(self, etag, render, last_modified=None, content_type=HTML_TYPE):
+        """render() -> str chỉ được gọi khi client chưa có bản mới nhất"""
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        if last_modified:
+            response.last_modified = int(last_modified)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'  # luôn hỏi lại, nhưng chỉ tốn 304
+        if self._not_modified(etag, last_modified):
+            return response
+
+        accepted = self._encoding()
+        cached = self.cache.get((etag, accepted))
+        if cached is None:
+            body, encoding = render().encode('utf-8'), None
+            if accepted and len(body) >= self.threshold:
+                body, encoding = _compress(body, accepted), accepted
+            cached = self.cache.put((etag, accepted), (body, encoding), size=len(body))
+        body, encoding = cached
+
+        response.status_code = 200
+        response.content_type = content_type
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.set_data(body)
+        return response
@@ -0,0 +1,115 @@
+# modules/keyword_matcher.py
+import re
+from collections import Counter
+
+
+class KeywordHits:
+    """Kết quả một lượt quét: nhãn -> {từ khóa: số lần xuất hiện}"""
+
+    def __init__(self, counts=None):
+        self.counts = counts or {}
+
+    def has(self, label):
+        return label in self.counts
+
+    def keywords(self, label):
+        return set(self.counts.get(label, ()))
+
+    def distinct(self, label):
+        """Số từ khóa khác nhau của nhãn có trong văn bản"""
+        return len(self.counts.get(label, ()))
+
+    def count(self, label):
+        """Tổng số lần xuất hiện các từ khóa của nhãn"""
+        return sum(self.counts.get(label, {}).values())
+
+    def first(self, prefix, table):
+        """Khóa đầu tiên (theo thứ tự trong bảng) có từ khóa khớp, hoặc None"""
+        for key in table:
+            if (prefix, key) in self.counts:
+                return key
+        return None
+
+
+_WORD_CHAR = re.compile(r'\w')
+
+
+def _trie_pattern(keywords):
+    """Regex dạng trie: rẽ nhánh theo từng ký tự, ưu tiên từ khóa dài nhất"""
+    root = {}
+    for keyword in keywords:
+        node = root
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def emit(node):
+        branches = [re.escape(ch) + emit(child) for ch, child in node.items() if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return emit(root)
+
+
+class KeywordMatcher:
+    """
+    Bộ khớp nhiều bảng từ khóa cùng lúc (thay cho các vòng `keyword in text`).
+    tables: list (prefix, {khóa: [từ khóa...]}, whole_word)
+    Từ khóa được biên dịch thành regex dạng trie (một cho từ khóa thường, một cho
+    từ khóa nguyên từ); scan() duyệt văn bản trong re (C), tại mỗi vị trí lấy từ khóa dài nhất rồi suy ra các
+    từ khóa là tiền tố của nó, nên vẫn bắt được các từ khóa chồng nhau ('lo', 'lo lắng').
+    Mỗi từ khóa khớp được gắn nhãn (prefix, khóa); whole_word=True chỉ nhận
+    khi hai đầu là ranh giới từ.
+    """
+
+    def __init__(self, tables=()):
+        self._labels = {}  # từ khóa -> [nhãn] khớp ở mọi vị trí
+        self._whole = {}   # từ khóa -> [nhãn] chỉ khớp nguyên từ
+        for prefix, table, whole_word in tables:
+            target = self._whole if whole_word else self._labels
+            for key, keywords in table.items():
+                for keyword in keywords:
+                    target.setdefault(keyword.lower(), []).append((prefix, key))
+
+        self._any = self._compile(self._labels, '')
+        self._word = self._compile(self._whole, r'(?<!\w)')
+
+    def _compile(self, labels, boundary):
+        """Regex trie (lookahead để không bỏ sót từ khóa chồng nhau) + bảng tiền tố"""
+        keywords = sorted(labels)
+        if not keywords:
+            return None
+        prefixes = {k: [p for p in keywords if k.startswith(p)] for k in keywords}
+        return re.compile(boundary + '(?=(' + _trie_pattern(keywords) + '))'), prefixes
+
+    def scan(self, text):
+        text = str(text or '').lower()
+        counts = {}
+
+        if self._any is not None:
+            regex, prefixes = self._any
+            found = Counter()
+            for longest, n in Counter(regex.findall(text)).items():
+                for keyword in prefixes[longest]:
+                    found[keyword] += n
+            self._collect(counts, self._labels, found)
+
+        if self._word is not None:
+            regex, prefixes = self._word
+            found = Counter()
+            for match in regex.finditer(text):
+                start = match.start()
+                for keyword in prefixes[match.group(1)]:
+                    if not _WORD_CHAR.match(text, start + len(keyword)):
+                        found[keyword] += 1
+            self._collect(counts, self._whole, found)
+
+        return KeywordHits(counts)
+
+    @staticmethod
+    def _collect(counts, labels, found):
+        for keyword, n in found.items():
+            for label in labels[keyword]:
+                counts.setdefault(label, {})[keyword] = n
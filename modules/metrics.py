@@ -0,0 +1,230 @@
+# modules/metrics.py
+import bisect
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# giây; đủ mịn cho bước dưới 1ms (tra chỉ mục) lẫn request chậm vài giây
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BACKGROUND = "background"  # nhãn route cho span chạy ngoài request (dựng lại danh mục...)
+
+_NAME_RE = re.compile(r'[^a-zA-Z0-9_]')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in items) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Số lần quan sát theo bucket cố định (kiểu Prometheus: bucket cộng dồn khi xuất)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # phần tử cuối: > bucket lớn nhất
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            total += n
+            yield bound, total
+
+
+class RequestTrace:
+    """Các span của request đang chạy: [(stage, giây)] theo thứ tự kết thúc"""
+
+    __slots__ = ('route', 'started', 'elapsed', 'spans')
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.spans = []
+
+    def server_timing(self):
+        """Giá trị header Server-Timing (xem được trong tab Network của trình duyệt)"""
+        return ', '.join(f'{_NAME_RE.sub("_", stage)};dur={seconds * 1000:.2f}' for stage, seconds in self.spans)
+
+
+class MetricsRegistry:
+    """
+    Bộ đếm + histogram trong bộ nhớ của một tiến trình, xuất dạng text Prometheus.
+    - span(stage): đo một bước trong request, ghi vào histogram theo (route, stage)
+    - route của request hiện tại giữ trong ContextVar nên mỗi luồng / task có trace riêng
+    - add_collector(fn): số liệu đọc lúc scrape (thống kê cache...), không tốn gì trên đường nóng
+    Chạy nhiều worker gunicorn thì mỗi worker có bộ số liệu riêng (Prometheus cộng theo instance).
+    """
+
+    def __init__(self, prefix='hotel', buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._counters = {}    # (tên, nhãn) -> giá trị
+        self._histograms = {}  # (tên, nhãn) -> Histogram
+        self._help = {}        # tên -> (kiểu, mô tả)
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._trace = ContextVar(f'{prefix}_request_trace', default=None)
+
+    def describe(self, name, kind, text):
+        self._help[name] = (kind, text)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(self.buckets)
+            hist.observe(value)
+
+    def add_collector(self, collect):
+        """collect() -> [(tên, kiểu, mô tả, [(dict nhãn, giá trị)])]"""
+        self._collectors.append(collect)
+
+    # --- Trace theo request ---
+    def begin_request(self, route):
+        trace = RequestTrace(route)
+        self._trace.set(trace)
+        return trace
+
+    def end_request(self, method, status):
+        """Ghi thời gian cả request; trả về trace (None nếu chưa begin)"""
+        trace = self._trace.get()
+        if trace is None:
+            return None
+        self._trace.set(None)
+        trace.elapsed = time.perf_counter() - trace.started
+        self.observe('request_seconds', trace.elapsed, route=trace.route, method=method, status=str(status))
+        return trace
+
+    def current(self):
+        return self._trace.get()
+
+    @contextmanager
+    def span(self, stage):
+        trace = self._trace.get()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe('stage_seconds', elapsed, route=trace.route if trace else BACKGROUND, stage=stage)
+            if trace is not None:
+                trace.spans.append((stage, elapsed))
+
+    # --- Xuất ---
+    def render(self):
+        """Toàn bộ số liệu dạng text exposition format 0.0.4 của Prometheus"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = [
+                (key, list(hist.cumulative()), hist.sum, hist.count)
+                for key, hist in sorted(self._histograms.items(), key=lambda item: item[0])
+            ]
+
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            full = f'{self.prefix}_{name}'
+            if name not in seen:
+                seen.add(name)
+                kind, text = self._help.get(name, (kind, ''))
+                if text:
+                    lines.append(f'# HELP {full} {text}')
+                lines.append(f'# TYPE {full} {kind}')
+            return full
+
+        for (name, labels), value in counters:
+            full = header(name, 'counter')
+            lines.append(f'{full}{_labels(labels)} {_number(value)}')
+
+        for (name, labels), buckets, total, count in histograms:
+            full = header(name, 'histogram')
+            for bound, n in buckets:
+                lines.append(f'{full}_bucket{_labels(labels, [("le", _number(bound))])} {n}')
+            lines.append(f'{full}_sum{_labels(labels)} {total!r}')
+            lines.append(f'{full}_count{_labels(labels)} {count}')
+
+        for collect in self._collectors:
+            for name, kind, text, samples in collect():
+                self._help.setdefault(name, (kind, text))
+                full = header(name, kind)
+                for labels, value in samples:
+                    lines.append(f'{full}{_labels(sorted(labels.items()))} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+class RequestProfiler:
+    """
+    cProfile cho từng request, chỉ bật khi header `X-Profile` khớp token (biến môi trường PROFILE_TOKEN).
+    Mỗi lần chỉ một request được profile (cProfile không chạy lồng nhau được);
+    kết quả ghi ra out_dir dạng .prof (mở bằng pstats / snakeviz) kèm bản tóm tắt .txt.
+    """
+
+    HEADER = 'X-Profile'
+
+    def __init__(self, token=None, out_dir='.profiles', top=30):
+        self.token = token
+        self.out_dir = out_dir
+        self.top = top
+        self._lock = threading.Lock()
+
+    def wanted(self, headers):
+        return bool(self.token) and headers.get(self.HEADER) == self.token
+
+    def start(self):
+        """Profile đã bật, hoặc None nếu đang có request khác được profile"""
+        if not self._lock.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # công cụ profile khác đang chạy
+            self._lock.release()
+            return None
+        return profile
+
+    def stop(self, profile, label):
+        """Tắt profile, ghi file; trả về đường dẫn file .prof"""
+        try:
+            profile.disable()
+        finally:
+            self._lock.release()
+        os.makedirs(self.out_dir, exist_ok=True)
+        stem = os.path.join(self.out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{_NAME_RE.sub('_', label)[:60]}")
+        profile.dump_stats(f'{stem}.prof')
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(self.top)
+        with open(f'{stem}.txt', 'w', encoding='utf-8') as f:
+            f.write(summary.getvalue())
+        return f'{stem}.prof'
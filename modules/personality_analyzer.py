@@ -2,26 +2,35 @@
 import re
 from collections import Counter
 
+from modules.keyword_matcher import KeywordMatcher
+
+PERSONALITY_TRAITS = {
+    'extroverted': ['party', 'social', 'people', 'friends', 'fun', 'giao lưu', 'sôi động'],
+    'introverted': ['quiet', 'alone', 'peaceful', 'reading', 'nature', 'yên tĩnh', 'một mình'],
+    'adventurous': ['adventure', 'explore', 'new', 'challenge', 'risk', 'khám phá', 'mạo hiểm'],
+    'luxury_seeker': ['luxury', 'premium', 'exclusive', 'VIP', 'designer', 'sang trọng', 'cao cấp'],
+    'budget_conscious': ['budget', 'save', 'cheap', 'affordable', 'value', 'tiết kiệm', 'giá rẻ'],
+    'wellness_focused': ['wellness', 'yoga', 'meditation', 'health', 'detox', 'sức khỏe', 'thiền']
+}
+
+# khớp nguyên từ/cụm từ, đếm số lần xuất hiện
+PERSONALITY_TABLES = [('personality', PERSONALITY_TRAITS, True)]
+
+_matcher = KeywordMatcher(PERSONALITY_TABLES)
+
+
 class PersonalityAnalyzer:
     def __init__(self):
-        self.personality_traits = {
-            'extroverted': ['party', 'social', 'people', 'friends', 'fun', 'giao lưu', 'sôi động'],
-            'introverted': ['quiet', 'alone', 'peaceful', 'reading', 'nature', 'yên tĩnh', 'một mình'],
-            'adventurous': ['adventure', 'explore', 'new', 'challenge', 'risk', 'khám phá', 'mạo hiểm'],
-            'luxury_seeker': ['luxury', 'premium', 'exclusive', 'VIP', 'designer', 'sang trọng', 'cao cấp'],
-            'budget_conscious': ['budget', 'save', 'cheap', 'affordable', 'value', 'tiết kiệm', 'giá rẻ'],
-            'wellness_focused': ['wellness', 'yoga', 'meditation', 'health', 'detox', 'sức khỏe', 'thiền']
-        }
+        self.personality_traits = PERSONALITY_TRAITS
     
-    def analyze_personality_from_text(self, text):
+    def analyze_personality_from_text(self, text, hits=None):
         """Phân tích tính cách từ văn bản"""
-        words = re.findall(r'\w+', text.lower())
-        word_freq = Counter(words)
+        if hits is None:
+            hits = _matcher.scan(text)
         
-        trait_scores = {}
-        for trait, keywords in self.personality_traits.items():
-            score = sum(word_freq.get(keyword, 0) for keyword in keywords)
-            trait_scores[trait] = score
+        trait_scores = {
+            trait: hits.count(('personality', trait)) for trait in self.personality_traits
+        }
         
         # Normalize scores
         total = sum(trait_scores.values())
@@ -0,0 +1,155 @@
+# modules/pricing.py
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from AI import city_key, month_to_season
+from modules.availability import ROOM_TYPES, stay_nights
+from modules.render_cache import LRUCache
+
+# Hệ số giá theo loại phòng (cùng thứ tự ROOM_TYPES) — nguồn duy nhất cho mọi trang
+ROOM_MULTIPLIERS = np.array([1.0, 1.5, 3.0])
+
+SEASON_FACTORS = {'spring': 1.0, 'summer': 1.2, 'autumn': 0.95, 'winter': 1.05}
+EVENT_FACTOR = 1.25        # đêm có sự kiện trong cùng thành phố
+EVENT_LEAD_DAYS = 1        # tính cả đêm trước ngày khai mạc
+OCCUPANCY_SURCHARGE = 0.3  # kín 100% phòng -> +30%
+HORIZON_DAYS = 365         # số ngày dựng sẵn hệ số theo thành phố, ngoài khoảng thì tính ngay
+PRICE_STEP = 1000          # làm tròn giá tới 1.000đ
+
+
+def _day(value):
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip()[:10])
+
+
+class PriceTable:
+    """
+    Bảng giá dựng một lần cho một bản danh mục:
+    - base_room[h, t] = giá gốc x hệ số loại phòng
+    - city_day[c, d] = hệ số mùa (month_to_season) x hệ số sự kiện của thành phố c ở ngày start + d
+    Giá một đêm = base_room[h, t] x city_day[city[h], d] x hệ số lấp đầy,
+    nên giá cả trang kết quả là một phép lấy chỉ số trên mảng.
+    """
+
+    def __init__(self, hotels_df, events_df, start=None, horizon=HORIZON_DAYS):
+        n = len(hotels_df)
+        price = pd.to_numeric(hotels_df['price'], errors='coerce') if 'price' in hotels_df.columns \
+            else pd.Series(np.zeros(n))
+        self.base_room = price.fillna(0).to_numpy(dtype=float)[:, None] * ROOM_MULTIPLIERS[None, :]
+
+        cities = hotels_df['city'] if 'city' in hotels_df.columns else pd.Series([''] * n)
+        self.city, city_names = pd.factorize(pd.Series([city_key(c) for c in cities], dtype=object))
+        self.city_ids = {c: i for i, c in enumerate(city_names)}
+        self.events = self._event_windows(events_df)
+
+        self.start = _day(start or date.today())
+        self.horizon = horizon
+        self.city_day = self._city_factors(np.arange(horizon))
+
+    def _event_windows(self, events_df):
+        """(city id, ngày đầu, ngày cuối) của các sự kiện ở thành phố có khách sạn"""
+        windows = []
+        if events_df is None or events_df.empty:
+            return windows
+        end_col = 'end_date' if 'end_date' in events_df.columns else 'start_date'
+        for e in events_df.to_dict(orient='records'):
+            city = self.city_ids.get(city_key(e.get('city')))
+            try:
+                first = _day(e['start_date']) - timedelta(days=EVENT_LEAD_DAYS)
+                last = _day(e.get(end_col) or e['start_date'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if city is not None:
+                windows.append((city, first, last))
+        return windows
+
+    def _city_factors(self, offsets):
+        """Ma trận (số thành phố, len(offsets)) hệ số mùa x sự kiện cho các ngày start + offset"""
+        days = [self.start + timedelta(days=int(o)) for o in offsets]
+        season = np.array([SEASON_FACTORS.get(month_to_season(d.month), 1.0) for d in days])
+        factors = np.tile(season, (max(len(self.city_ids), 1), 1))
+        if days:
+            ordinals = np.array([d.toordinal() for d in days])
+            for city, first, last in self.events:
+                hit = (ordinals >= first.toordinal()) & (ordinals <= last.toordinal())
+                factors[city, hit] = season[hit] * EVENT_FACTOR
+        return factors
+
+    def day_factors(self, nights):
+        """Hệ số (số thành phố, số đêm) cho danh sách ngày ISO; ngày ngoài bảng dựng sẵn thì tính ngay"""
+        offsets = np.array([(_day(n) - self.start).days for n in nights])
+        inside = (offsets >= 0) & (offsets < self.horizon)
+        if inside.all():
+            return self.city_day[:, offsets]
+        out = np.empty((self.city_day.shape[0], len(offsets)))
+        out[:, inside] = self.city_day[:, offsets[inside]]
+        out[:, ~inside] = self._city_factors(offsets[~inside])
+        return out
+
+    def nightly(self, rows, nights, occupancy=None):
+        """Giá từng đêm: mảng (len(rows), số loại phòng, số đêm), đã làm tròn"""
+        rows = np.asarray(rows, dtype=np.int64)
+        prices = self.base_room[rows][:, :, None] * self.day_factors(nights)[self.city[rows]][:, None, :]
+        if occupancy is not None:
+            prices = prices * (1.0 + OCCUPANCY_SURCHARGE * occupancy)
+        return np.round(prices / PRICE_STEP) * PRICE_STEP
+
+
+class DynamicPricer:
+    """
+    Giá động cho danh mục hiện hành:
+    - PriceTable dựng lại khi danh mục đổi phiên bản hoặc sang ngày mới
+    - tỷ lệ lấp đầy lấy từ lịch phòng, cache theo phiên bản lịch (đặt / hủy phòng -> bỏ cache)
+    """
+
+    def __init__(self, calendar, events_df, horizon=HORIZON_DAYS):
+        self.calendar = calendar
+        self.events_df = events_df
+        self.horizon = horizon
+        self._cached = (None, None)  # (khóa, PriceTable) gán cùng lúc
+        self.occupancy_cache = LRUCache(max_entries=2048)
+
+    def version(self):
+        """Thay đổi khi giá có thể đổi: sang ngày mới hoặc lịch phòng đổi"""
+        return date.today().isoformat(), self.calendar.version()
+
+    def table(self, catalog):
+        key = (catalog.version, date.today())
+        cached_key, table = self._cached
+        if cached_key != key:
+            table = PriceTable(catalog.df, self.events_df, start=key[1], horizon=self.horizon)
+            self._cached = (key, table)
+        return table
+
+    def _occupancy(self, names, checkin, nights):
+        self.occupancy_cache.bind(self.calendar.version())
+        key = (tuple(names), checkin, nights)
+        occupancy = self.occupancy_cache.get(key)
+        if occupancy is None:
+            occupancy = self.occupancy_cache.put(
+                key, self.calendar.occupancy(names, checkin, nights), size=1
+            )
+        return occupancy
+
+    def quote(self, catalog, rows, checkin=None, nights=1):
+        """Giá từng đêm cho các row id: (len(rows), số loại phòng, số đêm)"""
+        stay = stay_nights(checkin or date.today(), nights)
+        rows = list(rows)
+        names = [catalog.records[i].get('name') for i in rows]
+        occupancy = self._occupancy(names, stay[0], len(stay))
+        return self.table(catalog).nightly(rows, stay, occupancy)
+
+    def stay_totals(self, catalog, rows, checkin=None, nights=1):
+        """Tổng tiền cả kỳ lưu trú: (len(rows), số loại phòng)"""
+        return self.quote(catalog, rows, checkin, nights).sum(axis=2)
+
+    def room_prices(self, catalog, name, checkin=None, nights=1):
+        """loại phòng -> giá trung bình mỗi đêm của kỳ lưu trú (mặc định: đêm nay)"""
+        rows = catalog.name_postings.get(name)
+        if not rows:
+            return {}
+        nightly = self.quote(catalog, rows[:1], checkin, nights)[0].mean(axis=1)
+        return {room_type: int(round(p)) for room_type, p in zip(ROOM_TYPES, nightly)}
@@ -1,101 +1,208 @@
+import re
+
+import numpy as np
 import pandas as pd
 
-def calculate_scores_and_explain(df, all_prefs):
+try:
+    from modules.filter_index import row_ids, to_bool_array
+except ImportError:  # chạy trực tiếp trong thư mục modules (streamlit)
+    from filter_index import row_ids, to_bool_array
+
+TAG_RE = re.compile(r'<[^>]*>')
+
+# Điểm cộng khi người dùng chọn tiện ích (không có thì -2)
+FEATURE_SCORES = {
+    'pool': 8,
+    'buffet': 5,
+    'gym': 4,
+    'spa': 4,
+    'sea': 6,
+    'view': 3
+}
+MISSING_FEATURE_SCORE = -2
+
+# Khía cạnh -> các từ khóa tìm trong đánh giá (mỗi từ khóa khớp +6)
+REVIEW_KEYWORDS = {
+    'biển đẹp': ['biển đẹp', 'view biển tuyệt', 'bãi biển đẹp'],
+    'dịch vụ tốt': ['dịch vụ tốt', 'nhân viên thân thiện', 'phục vụ chu đáo'],
+    'yên tĩnh': ['yên tĩnh', 'thanh bình', 'tĩnh lặng'],
+    'view đẹp': ['view đẹp', 'cảnh đẹp', 'tầm nhìn đẹp']
+}
+REVIEW_KEYWORD_SCORE = 6
+
+# Từ khóa trong câu của người dùng -> (từ khóa đánh giá, điểm nếu khớp ít nhất một)
+QUIET_KEYWORDS = ('yên tĩnh', 'thoải mái')
+SERVICE_KEYWORDS = ('dịch vụ', 'thân thiện')
+
+ALL_REVIEW_KEYWORDS = list(dict.fromkeys(
+    [k for keywords in REVIEW_KEYWORDS.values() for k in keywords] + list(QUIET_KEYWORDS + SERVICE_KEYWORDS)
+))
+
+# Mọi cụm từ trong câu người dùng mà calculate_scores_and_explain có xét tới
+TEXT_PHRASES = tuple(dict.fromkeys(
+    ['bao nhiêu sao cũng được', 'sao nào cũng được', 'giá rẻ', 'rẻ', 'giá thấp',
+     'nhiều đánh giá tích cực', 'đánh giá tốt', 'biển', 'yên tĩnh', 'dịch vụ', 'thân thiện']
+    + [k for keywords in REVIEW_KEYWORDS.values() for k in keywords]
+))
+PHRASE_SEPARATOR = ' | '  # không cụm từ nào chứa '|' nên ghép lại không sinh cụm từ mới
+
+
+def text_keywords(text):
+    """
+    Các cụm từ có tác dụng trong câu (sắp xếp): hai câu có cùng cụm từ cho cùng điểm,
+    và PHRASE_SEPARATOR.join(kết quả) được chấm điểm giống hệt câu gốc
+    """
+    text = str(text or '').lower()
+    return tuple(sorted(p for p in TEXT_PHRASES if p in text))
+
+
+class HotelScorer:
+    """
+    Dữ liệu tính điểm dựng một lần cho một DataFrame khách sạn:
+    - rating / price / stars dạng mảng số, tiện ích dạng mảng bool (dựng khi cần)
+    - review đã bỏ thẻ HTML và viết thường, ma trận khớp (khách sạn x từ khóa)
+    Mỗi lượt tính điểm chỉ còn phép toán NumPy trên các mảng này.
+    Danh mục giữ sẵn một bản (catalog.scorer) và truyền vào calculate_scores_and_explain.
+    """
+
+    def __init__(self, df):
+        self.size = len(df)
+        self.df = df
+        self.rating = self._numbers(df, 'rating')
+        self.price = self._numbers(df, 'price')
+        self.stars = self._numbers(df, 'stars')
+        self._features = {}
+
+        if 'review' in df.columns:
+            corpus = df['review'].fillna('').astype(str).str.replace(TAG_RE, '', regex=True).str.lower()
+        else:
+            corpus = pd.Series([''] * self.size)
+        self.keyword_col = {k: i for i, k in enumerate(ALL_REVIEW_KEYWORDS)}
+        self.review_hits = np.column_stack([
+            corpus.str.contains(k, regex=False).to_numpy(dtype=bool) for k in ALL_REVIEW_KEYWORDS
+        ]) if self.size else np.zeros((0, len(ALL_REVIEW_KEYWORDS)), dtype=bool)
+
+    @staticmethod
+    def _numbers(df, col):
+        if col not in df.columns:
+            return np.full(len(df), np.nan)
+        return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+
+    def feature(self, col):
+        bits = self._features.get(col)
+        if bits is None:
+            if col not in self.df.columns:
+                raise KeyError(col)
+            bits = self._features[col] = to_bool_array(self.df[col])
+        return bits
+
+    def any_hit(self, keywords, rows):
+        cols = [self.keyword_col[k] for k in keywords]
+        return self.review_hits[np.ix_(rows, cols)].any(axis=1)
+
+
+def top_rows(scores, top_k=None):
+    """
+    Vị trí các điểm cao nhất, giảm dần (NaN cuối); điểm bằng nhau giữ thứ tự gốc.
+    Có top_k: argpartition lấy ngưỡng điểm thứ k trong O(n), rồi chỉ sắp xếp ổn định các ứng viên
+    có điểm >= ngưỡng (gồm mọi dòng bằng điểm thứ k, nên kết quả giống hệt sắp xếp toàn bộ)
+    """
+    neg = -np.asarray(scores, dtype=float)
+    if top_k is None or top_k >= len(neg):
+        return np.argsort(neg, kind='stable')
+    if top_k <= 0:
+        return np.empty(0, dtype=np.intp)
+    kth = neg[np.argpartition(neg, top_k - 1)[top_k - 1]]
+    if np.isnan(kth):  # chưa đủ k điểm hợp lệ
+        return np.argsort(neg, kind='stable')[:top_k]
+    candidates = np.flatnonzero(neg <= kth)  # vị trí tăng dần
+    return candidates[np.argsort(neg[candidates], kind='stable')][:top_k]
+
+
+def calculate_scores_and_explain(df, all_prefs, top_k=None, scorer=None):
     """
-    Hàm tính điểm, sắp xếp và giải thích 
+    Hàm tính điểm, sắp xếp và giải thích
     Trả về 2 giá trị: (dataframe_sorted, explanation_string)
+    top_k: chỉ lấy k khách sạn điểm cao nhất (None = sắp xếp toàn bộ)
+    scorer: HotelScorer dựng sẵn của DataFrame gốc (catalog.scorer) khi df là DataFrame gốc
+    hoặc bản lọc / .copy() của nó; không truyền thì dựng tạm cho df
     """
     print(f"[AI] Bắt đầu tính điểm. Sở thích: {all_prefs}")
-    
+
     # Một danh sách để lưu lại các lý do giải thích
     explanation_log = ["Bắt đầu quá trình xếp hạng:"]
-    
-    # Tạo bản sao để tính toán
-    df_scored = df.copy()
-    
+
+    # rows: vị trí trong dữ liệu của scorer, positions: vị trí tương ứng trong df
+    if scorer is None:
+        scorer = HotelScorer(df)
+        rows = np.arange(scorer.size)
+    else:
+        rows = row_ids(df, scorer.size)
+    positions = np.arange(len(rows))
+
     # LỌC CỨNG (Hard Filter) ---
     min_stars = all_prefs.get('min_stars', 0)
     if min_stars > 0:
-        df_scored = df_scored[df_scored['stars'] >= min_stars].copy()
+        keep = scorer.stars[rows] >= min_stars
+        rows, positions = rows[keep], positions[keep]
         explanation_log.append(f"Loại bỏ các khách sạn dưới {min_stars} sao.")
-    
-    if df_scored.empty:
-        return df_scored, "Không tìm thấy khách sạn nào sau khi lọc theo số sao."
+
+    if len(rows) == 0:
+        return df.iloc[positions].assign(recommend_score=[]), "Không tìm thấy khách sạn nào sau khi lọc theo số sao."
 
     # TÍNH ĐIỂM (Scoring Logic) ---
-    # 
-    df_scored['recommend_score'] = df_scored['rating'] * 3
-
-    # 1. Tính điểm sở thích 
-    feature_scores = {
-        'pool': 8,
-        'buffet': 5, 
-        'gym': 4,
-        'spa': 4,
-        'sea': 6,
-        'view': 3
-    }
-
-    for feature, score in feature_scores.items():
+    scores = scorer.rating[rows] * 3
+
+    # 1. Tính điểm sở thích
+    for feature, score in FEATURE_SCORES.items():
         if all_prefs.get(feature, False):
-            df_scored['recommend_score'] += df_scored[feature].apply(
-                lambda has_feature: score if has_feature else -2
-            )
+            scores += np.where(scorer.feature(feature)[rows], score, MISSING_FEATURE_SCORE)
             explanation_log.append(f"Ưu tiên khách sạn có {feature}.")
 
-    # 2. Tính điểm Text 
+    # 2. Tính điểm Text
     user_text = all_prefs.get('text', '').lower()
-    user_query = all_prefs.get('text_query', '').lower()  # THÊM DÒNG NÀY
+    user_query = all_prefs.get('text_query', '').lower()
     combined_text = user_text + " " + user_query
 
-    text_score = 0
-
     # Xử lý "bao nhiêu sao cũng được"
     if 'bao nhiêu sao cũng được' in combined_text or 'sao nào cũng được' in combined_text:
         explanation_log.append("Không yêu cầu số sao cụ thể.")
-    
+
     # Xử lý "giá rẻ"
     if 'giá rẻ' in combined_text or 'rẻ' in combined_text or 'giá thấp' in combined_text:
-        df_scored['recommend_score'] += (1 / df_scored['price']) * 1000000
+        scores += (1 / scorer.price[rows]) * 1000000
         explanation_log.append("Ưu tiên khách sạn giá rẻ.")
-    
+
     # Xử lý "nhiều đánh giá tích cực"
     if 'nhiều đánh giá tích cực' in combined_text or 'đánh giá tốt' in combined_text:
-        df_scored['recommend_score'] += df_scored['rating'] * 2
+        scores += scorer.rating[rows] * 2
         explanation_log.append("Ưu tiên khách sạn có đánh giá cao.")
-    
-    # Xử lý các từ khóa trong đánh giá
-    review_keywords = {
-        'biển đẹp': ['biển đẹp', 'view biển tuyệt', 'bãi biển đẹp'],
-        'dịch vụ tốt': ['dịch vụ tốt', 'nhân viên thân thiện', 'phục vụ chu đáo'],
-        'yên tĩnh': ['yên tĩnh', 'thanh bình', 'tĩnh lặng'],
-        'view đẹp': ['view đẹp', 'cảnh đẹp', 'tầm nhìn đẹp']
-    }
-    
-    for aspect, keywords in review_keywords.items():
+
+    # Xử lý các từ khóa trong đánh giá: vector trọng số nhân với ma trận khớp
+    weights = np.zeros(len(ALL_REVIEW_KEYWORDS))
+    for aspect, keywords in REVIEW_KEYWORDS.items():
         if any(keyword in combined_text for keyword in keywords):
             for keyword in keywords:
-                mask = df_scored['review'].str.contains(keyword, case=False, na=False)
-                text_score += mask * 6
+                weights[scorer.keyword_col[keyword]] += REVIEW_KEYWORD_SCORE
             explanation_log.append(f"Tìm kiếm khách sạn có '{aspect}' trong đánh giá.")
-    
+    if weights.any():
+        scores += scorer.review_hits[rows] @ weights
+
     if 'biển' in user_text:
-        text_score += df_scored['sea'].apply(lambda has_sea: 10 if has_sea else -3)
+        scores += np.where(scorer.feature('sea')[rows], 10, -3)
         explanation_log.append("Tìm kiếm từ khóa 'biển', ưu tiên khách sạn gần biển.")
-    
+
     if 'yên tĩnh' in user_text:
-        text_score += df_scored['review'].str.contains('yên tĩnh|thoải mái', case=False).apply(lambda x: 5 if x else 0)
+        scores += np.where(scorer.any_hit(QUIET_KEYWORDS, rows), 5, 0)
         explanation_log.append("Tìm kiếm từ khóa 'yên tĩnh' trong đánh giá.")
 
     if 'dịch vụ' in user_text or 'thân thiện' in user_text:
-         text_score += df_scored['review'].str.contains('dịch vụ|thân thiện', case=False).apply(lambda x: 4 if x else 0)
-         explanation_log.append("Tìm kiếm từ khóa 'dịch vụ', 'thân thiện' trong đánh giá.")
-
-    df_scored['recommend_score'] += text_score
+        scores += np.where(scorer.any_hit(SERVICE_KEYWORDS, rows), 4, 0)
+        explanation_log.append("Tìm kiếm từ khóa 'dịch vụ', 'thân thiện' trong đánh giá.")
 
     # SẮP XẾP (Sorting) ---
-    # Sắp xếp theo yêu cầu mới
-    final_results_sorted = df_scored.sort_values(by="recommend_score", ascending=False)
+    order = top_rows(scores, top_k)
+    final_results_sorted = df.iloc[positions[order]].assign(recommend_score=scores[order])
     explanation_log.append("Hoàn tất! Đã sắp xếp kết quả.")
 
     # TRẢ VỀ KẾT QUẢ ---
@@ -103,6 +210,5 @@ def calculate_scores_and_explain(df, all_prefs):
 
     num_results = min(3, len(final_results_sorted))
     print(f"[AI] Trả về {num_results} khách sạn")
-    
-    return final_results_sorted, final_explanation
 
+    return final_results_sorted, final_explanation
@@ -0,0 +1,81 @@
+# modules/recommendation_service.py
+from AI import city_key
+from modules.filter_index import select
+from modules.recommend import FEATURE_SCORES, PHRASE_SEPARATOR, calculate_scores_and_explain, text_keywords
+from modules.render_cache import LRUCache
+
+
+def _positive(value, cast):
+    try:
+        value = cast(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def normalize_prefs(prefs):
+    """
+    Sở thích -> tuple chuẩn hóa, dùng làm khóa cache:
+    (thành phố, ngân sách, số sao tối thiểu, tiện ích, cụm từ trong text, cụm từ trong text_query).
+    Hai cuộc hội thoại khác chữ nhưng cùng tuple thì cho cùng kết quả.
+    """
+    return (
+        city_key(prefs.get('location')),
+        _positive(prefs.get('budget'), float),
+        _positive(prefs.get('min_stars'), int) or 0,
+        tuple(sorted(f for f in FEATURE_SCORES if prefs.get(f))),
+        text_keywords(prefs.get('text')),
+        text_keywords(prefs.get('text_query')),
+    )
+
+
+class RecommendationService:
+    """
+    Gợi ý theo sở thích (thành phố, ngân sách, số sao, tiện ích, mô tả) trên danh mục hiện hành,
+    dùng chung cho Flask và chatbot Streamlit (mọi phiên chat trong cùng tiến trình).
+    - lọc bằng chỉ mục dựng sẵn của danh mục, chấm điểm bằng calculate_scores_and_explain
+    - kết quả nhớ theo (tuple chuẩn hóa, top_k) trong LRU, bỏ hết khi danh mục đổi phiên bản:
+      hội thoại giống nhau giữa các người dùng chỉ tốn một lần tra dict
+    Kết quả trả về dùng chung giữa các lượt gọi, không được sửa trực tiếp.
+    """
+
+    def __init__(self, catalog_source, max_entries=1024):
+        self.catalog_source = catalog_source  # hàm trả về HotelCatalog hiện hành
+        self.cache = LRUCache(max_entries=max_entries)
+
+    def recommend(self, prefs, top_k=3):
+        """(tuple dict khách sạn kèm recommend_score, điểm cao trước; lời giải thích)"""
+        catalog = self.catalog_source()
+        self.cache.bind(catalog.version)
+        key = (normalize_prefs(prefs), top_k)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.cache.put(key, self._compute(catalog, *key), size=1)
+        return result
+
+    @staticmethod
+    def _compute(catalog, query, top_k):
+        location, budget, min_stars, features, text, text_query = query
+        index = catalog.filter_index
+        bits = index.query(max_price=budget)
+        if location:
+            # 'Ho Chi Minh City' và 'Ho Chi Minh' là một thành phố
+            city = index.empty_bits()
+            for name, city_bits in index.city_bits.items():
+                if city_key(name) == location:
+                    city |= city_bits
+            bits &= city
+
+        prefs = dict.fromkeys(features, True)
+        prefs.update(
+            min_stars=min_stars,
+            text=PHRASE_SEPARATOR.join(text),
+            text_query=PHRASE_SEPARATOR.join(text_query),
+        )
+        ranked, explanation = calculate_scores_and_explain(
+            select(catalog.df, bits), prefs, top_k=top_k, scorer=catalog.scorer
+        )
+        return tuple(ranked.to_dict(orient='records')), explanation
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,77 @@
+# modules/render_cache.py
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Cache LRU cho HTML đã render, giới hạn theo số mục và tổng số ký tự.
+    Khóa nên chứa phiên bản dữ liệu nguồn (danh mục, đánh giá) để request còn dùng
+    bản cũ không ghi đè bản mới; bind(version) dọn các mục cũ khi phiên bản đổi.
+    """
+
+    def __init__(self, max_entries=1024, max_chars=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.version = None
+        self.chars = 0
+        self.hits = self.misses = self.evictions = 0
+        self._items = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def bind(self, version):
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self._items.clear()
+                    self.chars = 0
+                    self.version = version
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value, size=None):
+        size = len(value) if size is None else size
+        if size > self.max_chars:
+            return value
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.chars -= old[1]
+            self._items[key] = (value, size)
+            self.chars += size
+            while len(self._items) > self.max_entries or self.chars > self.max_chars:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.chars -= evicted
+                self.evictions += 1
+        return value
+
+    def get_or_render(self, key, render):
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, render())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.chars = 0
+
+    def stats(self):
+        return {
+            "entries": len(self._items),
+            "chars": self.chars,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,183 @@
+# modules/review_store.py
+import csv
+import io
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: chỉ khóa trong tiến trình
+    fcntl = None
+
+REVIEW_FIELDS = ["hotel_name", "user", "rating", "comment"]
+
+
+def _parse_rating(value):
+    """Điểm đánh giá dạng số; điểm nguyên giữ kiểu int (trang chi tiết hiện 5/5, không phải 5.0/5)"""
+    try:
+        rating = float(str(value).replace(',', ''))
+    except (TypeError, ValueError):
+        return None
+    if rating != rating:  # ô trống / NaN
+        return None
+    return int(rating) if rating.is_integer() else rating
+
+
+class _FileLock:
+    """Khóa file giữa các worker gunicorn (flock); không làm gì trên Windows"""
+
+    def __init__(self, f, exclusive):
+        self.f = f
+        self.mode = None
+        if fcntl is not None:
+            self.mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+
+    def __enter__(self):
+        if self.mode is not None:
+            fcntl.flock(self.f.fileno(), self.mode)
+        return self.f
+
+    def __exit__(self, *exc):
+        if self.mode is not None:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_UN)
+
+
+class ReviewStore:
+    """
+    Kho đánh giá dạng append-only trên reviews.csv.
+    - add(): ghi thêm đúng một dòng vào cuối file (O(1)), không ghi lại cả file
+    - giữ chỉ mục theo khách sạn cùng tổng điểm / số lượt để tính trung bình ngay
+    - refresh(): chỉ đọc phần mới ghi thêm khi file thay đổi (mtime, size)
+    - reviews_since(n): các đánh giá nạp sau n đánh giá đầu (cho chỉ mục tăng dần);
+      generation tăng khi file bị thay thế và phải nạp lại từ đầu
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fields = list(REVIEW_FIELDS)
+        self.version = 0
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._reset()
+
+        if not os.path.exists(path):
+            with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+                csv.writer(f).writerow(self.fields)
+        self.refresh()
+
+    def _reset(self):
+        self.generation += 1
+        self._log = []  # mọi đánh giá theo thứ tự nạp
+        self._by_hotel = {}
+        self._stats = {}  # hotel_name -> [tổng điểm, số lượt có điểm]
+        self._offset = 0
+        self._signature = None
+
+    # --- Đọc ---
+    def refresh(self):
+        """Nạp phần mới của file nếu mtime/size thay đổi; trả về True nếu có nạp"""
+        st = os.stat(self.path)
+        signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if signature == self._signature:
+            return False
+
+        with self._lock:
+            if signature == self._signature:
+                return False
+            if self._signature is None or st.st_ino != self._signature[0] or st.st_size < self._offset:
+                # file bị thay thế hoặc cắt ngắn -> nạp lại từ đầu
+                self._reset()
+            self._load_tail()
+            self._signature = signature
+            self.version += 1
+        return True
+
+    def _load_tail(self):
+        with open(self.path, 'rb') as f, _FileLock(f, exclusive=False):
+            f.seek(self._offset)
+            data = f.read()
+
+        # chỉ nhận tới dòng hoàn chỉnh cuối cùng
+        last_newline = data.rfind(b'\n')
+        if last_newline < 0:
+            return
+        data = data[:last_newline + 1]
+        text = data.decode('utf-8-sig' if self._offset == 0 else 'utf-8', errors='replace')
+
+        reader = csv.reader(io.StringIO(text))
+        if self._offset == 0:
+            header = next(reader, None)
+            if header:
+                self.fields = [c.strip() for c in header]
+            if 'hotel_name' not in self.fields:
+                raise KeyError(f"❌ {self.path} không có cột 'hotel_name'.")
+
+        for values in reader:
+            if values:
+                self._index(dict(zip(self.fields, values)))
+        self._offset += len(data)
+
+    def _index(self, review):
+        review['rating'] = _parse_rating(review.get('rating'))
+        name = review.get('hotel_name')
+        self._log.append(review)
+        self._by_hotel.setdefault(name, []).append(review)
+        if review['rating'] is not None:
+            stats = self._stats.setdefault(name, [0.0, 0])
+            stats[0] += review['rating']
+            stats[1] += 1
+
+    @property
+    def signature(self):
+        """(inode, mtime_ns, size) của file ở lần nạp gần nhất"""
+        return self._signature
+
+    @property
+    def last_modified(self):
+        return self._signature[1] / 1e9 if self._signature else None
+
+    def for_hotel(self, hotel_name):
+        """Danh sách đánh giá của một khách sạn (dùng chung, không sửa trực tiếp)"""
+        return self._by_hotel.get(hotel_name, [])
+
+    def avg_rating(self, hotel_name):
+        stats = self._stats.get(hotel_name)
+        if not stats or not stats[1]:
+            return None
+        return round(stats[0] / stats[1], 1)
+
+    def count(self, hotel_name):
+        return len(self._by_hotel.get(hotel_name, []))
+
+    @property
+    def total(self):
+        return len(self._log)
+
+    def reviews_since(self, n):
+        return self._log[n:]
+
+    # --- Ghi ---
+    def add(self, hotel_name, user, rating, comment):
+        """Ghi thêm một đánh giá vào cuối file dưới khóa độc quyền"""
+        row = {"hotel_name": hotel_name, "user": user, "rating": rating, "comment": comment}
+        buf = io.StringIO()
+        csv.writer(buf).writerow([row.get(col, '') for col in self.fields])
+        line = buf.getvalue().encode('utf-8')
+
+        with open(self.path, 'ab') as f, _FileLock(f, exclusive=True):
+            size = f.seek(0, os.SEEK_END)
+            if not size:
+                header = io.StringIO()
+                csv.writer(header).writerow(self.fields)
+                line = header.getvalue().encode('utf-8-sig') + line
+            else:
+                # đảm bảo dòng cuối cũ đã kết thúc bằng xuống dòng
+                with open(self.path, 'rb') as rf:
+                    rf.seek(size - 1)
+                    if rf.read(1) != b'\n':
+                        line = b'\r\n' + line
+            f.write(line)
+            f.flush()
+
+        # nạp phần mới (gồm cả dòng của worker khác nếu có)
+        self.refresh()
@@ -0,0 +1,32 @@
+# modules/secret_key.py
+import os
+import secrets
+import time
+
+SECRET_KEY_FILE = ".secret_key"
+
+
+def load_secret_key(path=SECRET_KEY_FILE):
+    """
+    Khóa ký session (Flask) và token chat (chat_asgi.py), dùng chung giữa các tiến trình.
+    Ưu tiên biến môi trường SECRET_KEY; chưa đặt thì đọc file `path`, chưa có file thì sinh
+    khóa ngẫu nhiên và ghi vào đó (quyền 600, O_EXCL: worker tạo sau đọc lại khóa của worker đầu).
+    Không bao giờ rơi về một khóa cố định trong mã nguồn.
+    """
+    key = os.environ.get("SECRET_KEY")
+    if key:
+        return key
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        for _ in range(50):  # worker khác vừa tạo file, có thể chưa ghi xong
+            with open(path, encoding="utf-8") as f:
+                key = f.read().strip()
+            if key:
+                return key
+            time.sleep(0.01)
+        raise RuntimeError(f"File khóa bí mật {path} rỗng: hãy xóa file hoặc đặt SECRET_KEY")
+    key = secrets.token_hex(32)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(key)
+    return key
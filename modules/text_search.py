@@ -0,0 +1,151 @@
+# modules/text_search.py
+import html
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+from modules.hotel_data import TAG_RE
+
+TOKEN_RE = re.compile(r'\w+')
+MARK_RE = re.compile(r'[\u0300-\u036f]')  # dấu thanh / dấu mũ sau khi tách NFD
+
+# tham số BM25 chuẩn
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def fold(text):
+    """Chữ thường, bỏ dấu tiếng Việt: 'Yên Tĩnh, Đẹp' -> 'yen tinh, dep'"""
+    text = unicodedata.normalize('NFD', str(text or '').lower())
+    return MARK_RE.sub('', text).replace('đ', 'd')
+
+
+def tokenize(text):
+    """
+    Từ đơn đã bỏ dấu + cặp từ liền kề ('yen_tinh'): tiếng Việt ghép từ bằng nhiều âm tiết,
+    nên cặp âm tiết giúp "yên tĩnh" xếp trên văn bản chỉ có "yên" và "tĩnh" rời nhau.
+    """
+    words = TOKEN_RE.findall(fold(text))
+    return words + [f'{a}_{b}' for a, b in zip(words, words[1:])]
+
+
+def query_words(text):
+    return TOKEN_RE.findall(fold(text))
+
+
+def strip_html(text):
+    return html.unescape(TAG_RE.sub(' ', text)) if isinstance(text, str) else ''
+
+
+class FullTextIndex:
+    """
+    Chỉ mục ngược: term -> {doc id: tần suất}, độ dài từng tài liệu, BM25.
+    add() cộng thêm văn bản vào một tài liệu có sẵn (hoặc tạo mới) nên cập nhật tăng dần được.
+    """
+
+    def __init__(self):
+        self.keys = []       # doc id -> khóa (tên khách sạn)
+        self.doc_ids = {}
+        self.lengths = []
+        self.total_length = 0
+        self.postings = {}
+
+    def add(self, key, text):
+        tokens = tokenize(text)
+        if not tokens:
+            return
+        doc = self.doc_ids.get(key)
+        if doc is None:
+            doc = self.doc_ids[key] = len(self.keys)
+            self.keys.append(key)
+            self.lengths.append(0)
+        for term, n in Counter(tokens).items():
+            plist = self.postings.get(term)
+            if plist is None:
+                plist = self.postings[term] = {}
+            plist[doc] = plist.get(doc, 0) + n
+        self.lengths[doc] += len(tokens)
+        self.total_length += len(tokens)
+
+    def search(self, query):
+        """
+        [(khóa, điểm BM25)] của các tài liệu chứa mọi từ trong truy vấn, điểm cao trước.
+        Cặp từ của truy vấn chỉ cộng điểm, không bắt buộc.
+        """
+        words = query_words(query)
+        if not words or not self.keys:
+            return []
+        plists = [self.postings.get(w) for w in dict.fromkeys(words)]
+        if not all(plists):
+            return []
+        # giao các danh sách, bắt đầu từ danh sách ngắn nhất
+        plists.sort(key=len)
+        matched = set(plists[0])
+        for plist in plists[1:]:
+            matched.intersection_update(plist)
+            if not matched:
+                return []
+
+        docs = np.fromiter(matched, dtype=np.int64, count=len(matched))
+        lengths = np.asarray(self.lengths, dtype=float)[docs]
+        avgdl = self.total_length / len(self.keys)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avgdl)
+        scores = np.zeros(len(docs))
+        n_docs = len(self.keys)
+        bigrams = [f'{a}_{b}' for a, b in zip(words, words[1:])]
+        for term in dict.fromkeys(words + bigrams):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = math.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            tf = np.fromiter((plist.get(d, 0) for d in docs.tolist()), dtype=float, count=len(docs))
+            scores += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        order = np.argsort(-scores, kind='stable')
+        return [(self.keys[docs[i]], float(scores[i])) for i in order.tolist()]
+
+
+class HotelTextSearch:
+    """
+    Tìm kiếm toàn văn trên mô tả khách sạn (bỏ HTML) + bình luận trong reviews.csv.
+    - Dựng lại khi danh mục đổi phiên bản
+    - Đánh giá mới (add_review, hoặc worker khác ghi thêm) chỉ được cộng thêm vào tài liệu
+      của khách sạn tương ứng, không dựng lại cả chỉ mục
+    """
+
+    def __init__(self, review_store):
+        self.review_store = review_store
+        self.index = FullTextIndex()
+        self._catalog_version = None
+        self._review_key = None  # (generation, số đánh giá đã nạp)
+        self._lock = threading.Lock()
+
+    def _sync(self, catalog):
+        store = self.review_store
+        generation, indexed = self._review_key or (None, 0)
+        generation_now = store.generation
+        if self._catalog_version != catalog.version or generation != generation_now:
+            index = FullTextIndex()
+            for h in catalog.records:
+                index.add(h.get('name'), f"{h.get('name') or ''} {strip_html(h.get('full_desc'))}")
+            indexed = 0
+            self.index = index
+            self._catalog_version = catalog.version
+        fresh = store.reviews_since(indexed)
+        for review in fresh:
+            self.index.add(review.get('hotel_name'), review.get('comment') or '')
+        self._review_key = (generation_now, indexed + len(fresh))
+
+    def search(self, catalog, query):
+        """Row id trong danh mục theo độ liên quan giảm dần (mảng NumPy)"""
+        with self._lock:
+            self._sync(catalog)
+            hits = self.index.search(query)
+        rows = []
+        for name, _ in hits:
+            rows.extend(catalog.name_postings.get(name, ()))
+        return np.asarray(rows, dtype=np.int64)
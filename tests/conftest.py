@@ -0,0 +1,39 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# app.py đọc / ghi theo đường dẫn tương đối: chạy trên bản sao dữ liệu, không đụng file thật
+DATA_FILES = ["hotels.csv", "reviews.csv", "events.csv", "bookings.csv"]
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp("hotel")
+    for name in DATA_FILES:
+        if os.path.exists(os.path.join(ROOT, name)):
+            shutil.copy(os.path.join(ROOT, name), workdir / name)
+    shutil.copytree(os.path.join(ROOT, "data"), workdir / "data")
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import app
+        app.app.config["TESTING"] = True
+        yield app
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def catalog(app_module):
+    return app_module.catalog_manager.current
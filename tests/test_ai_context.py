@@ -0,0 +1,36 @@
+import pandas as pd
+
+import AI
+
+EVENTS = pd.DataFrame({
+    "event_id": [1, 2, 3],
+    "city": ["Hanoi", "Da Nang", "Da Nang"],
+    "lat": [21.03, 16.06, 16.07],
+    "lon": [105.85, 108.23, 108.22],
+    "start_date": ["2031-03-12", "2031-07-10", "2031-06-01"],
+})
+HOTELS = pd.DataFrame({
+    "name": ["A", "B", "C", "D"],
+    "city": ["Hanoi", "Da Nang", "Da Nang City", "Hue"],
+    "lat": [21.0, None, 16.05, None],
+    "lon": [105.8, None, 108.2, None],
+    "pool": [True, False, True, False],
+})
+
+
+def test_score_event_reuses_prebuilt_table():
+    table = AI.ContextScorer(HOTELS, EVENTS).event_table
+    for hotel in HOTELS.to_dict(orient="records"):
+        for radius_km in (None, 50):
+            expected = AI.score_event(hotel, EVENTS, "2031-05-30", radius_km)
+            assert AI.score_event(hotel, table, "2031-05-30", radius_km) == expected
+
+    hue = HOTELS.to_dict(orient="records")[3]
+    assert AI.score_event(hue, table, "2031-05-30") == AI.NO_EVENT_SCORE
+
+
+def test_next_event_per_city():
+    table = AI.EventTable(EVENTS)
+    row = table.next_event("da nang", "2031-05-30")
+    assert table.events.loc[row, "event_id"] == 3
+    assert table.next_event("hanoi", "2031-04-01") is None
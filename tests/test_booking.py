@@ -0,0 +1,42 @@
+from modules.hotel_db import DEFAULT_ROOMS_AVAILABLE
+
+FORM = {
+    "fullname": "Nguyễn Văn A",
+    "phone": "0900000001",
+    "email": "a@example.com",
+    "checkin": "2031-03-10",
+    "nights": "2",
+}
+
+
+def test_catalog_sync_gives_finite_capacity(app_module, catalog):
+    # hotels.csv gốc không có cột rooms_available: kho phòng lấy từ lần đồng bộ khi dựng danh mục
+    assert "rooms_available" not in catalog.df.columns
+    inventory = app_module.booking_engine.hotel_inventory()
+    assert {rooms for rooms, _ in inventory.values()} == {DEFAULT_ROOMS_AVAILABLE}
+
+
+def test_sync_takes_capacity_from_csv_column(app_module, catalog):
+    engine = app_module.booking_engine
+    name = catalog.records[5]["name"]
+    version = engine.calendar.version()
+    engine.sync_hotels(catalog.df.iloc[[5]].assign(rooms_available=7))
+    assert engine.rooms_available(name) == 7
+    assert engine.calendar.version() > version  # trang lọc theo ngày không dùng lại cache cũ
+    engine.sync_hotels(catalog.df.iloc[[5]].assign(rooms_available=DEFAULT_ROOMS_AVAILABLE))
+
+
+def test_overbooking_returns_409(client, catalog):
+    # không chỉnh sức chứa bằng tay: dùng đúng giá trị app đồng bộ lúc khởi động
+    url = f"/booking/{catalog.records[0]['name']}/Phòng đôi"
+    for i in range(DEFAULT_ROOMS_AVAILABLE):
+        assert client.post(url, data=dict(FORM, phone=f"09000000{i:02d}")).status_code == 200
+
+    full = client.post(url, data=dict(FORM, phone="0900000099", email="b@example.com"))
+    assert full.status_code == 409
+    assert "hết phòng" in full.get_data(as_text=True)
+
+    # kỳ lưu trú không trùng đêm nào, hoặc loại phòng khác, vẫn đặt được
+    assert client.post(url, data=dict(FORM, checkin="2031-03-12")).status_code == 200
+    other = f"/booking/{catalog.records[0]['name']}/Phòng nhỏ"
+    assert client.post(other, data=FORM).status_code == 200
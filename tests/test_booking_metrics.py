@@ -0,0 +1,52 @@
+import os
+
+FORM = {
+    "fullname": "Do Khac Thanh Cong",
+    "phone": "0348400827",
+    "checkin": "2031-08-01",
+    "nights": "2",
+}
+
+
+def test_booking_route_feeds_account_total_spent(app_module, client, catalog):
+    engine = app_module.booking_engine
+    username = engine.account_for("IshoutoKara@gmail.com")
+    assert username == "IshoutoKara"
+    users_csv = open(app_module.USERS_CSV, "rb").read()
+    spent = engine.metrics.total_spent(username)
+    totals = engine.metrics.totals()
+
+    name = catalog.records[10]["name"]
+    response = client.post(f"/booking/{name}/Phòng nhỏ", data=dict(FORM, email="ishoutokara@gmail.com"))
+    assert response.status_code == 200
+    booking = engine.find_bookings(email="ishoutokara@gmail.com")[0]
+    amount = booking["price"] * booking["nights"]
+
+    assert booking["username"] == username
+    assert engine.metrics.total_spent(username) == spent + amount
+    assert engine.metrics.totals() == {"bookings": totals["bookings"] + 1, "revenue": totals["revenue"] + amount}
+    assert open(app_module.USERS_CSV, "rb").read() == users_csv  # không ghi lại users.csv
+
+    engine.set_status(booking["booking_code"], "Đã hủy")
+    assert engine.metrics.total_spent(username) == spent
+
+
+def test_guest_booking_has_no_account(app_module, client, catalog):
+    name = catalog.records[11]["name"]
+    client.post(f"/booking/{name}/Phòng nhỏ", data=dict(FORM, email="guest@example.com"))
+    booking = app_module.booking_engine.find_bookings(email="guest@example.com")[0]
+    assert booking["username"] is None
+
+
+def test_account_lookup_follows_users_csv(app_module, tmp_path):
+    from modules.hotel_db import BookingEngine
+
+    users = tmp_path / "users.csv"
+    users.write_text("username,email,total_spent\nan,an@x.vn,100\n", encoding="utf-8")
+    engine = BookingEngine(str(tmp_path / "h.db"), users_csv=str(users))
+    assert engine.account_for("AN@x.vn") == "an"
+    assert engine.metrics.total_spent("an") == 100  # mốc lấy từ users.csv
+
+    users.write_text("username,email,total_spent\nan,an@x.vn,100\nbinh,binh@x.vn,0\n", encoding="utf-8")
+    os.utime(users, ns=(1, 2))
+    assert engine.account_for("binh@x.vn") == "binh"
@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def chat_app():
+    import chat_asgi
+    yield chat_asgi
+    chat_asgi.chat.close()
+
+
+def call(chat_app, path, body):
+    sent = []
+    requests = [{"type": "http.request", "body": json.dumps(body).encode()}]
+
+    async def receive():
+        return requests.pop(0)
+
+    async def send(event):
+        sent.append(event)
+
+    scope = {"type": "http", "path": path, "method": "POST", "client": ("127.0.0.1", 5000)}
+    asyncio.run(chat_app.app(scope, receive, send))
+    return dict(sent[0]["headers"]), b"".join(e.get("body", b"") for e in sent[1:])
+
+
+def parse_sse(body):
+    events = []
+    for block in body.decode("utf-8").strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_sends_insights_parts_done(chat_app):
+    headers, body = call(chat_app, "/api/chat/stream", {"message": "Tìm khách sạn gần biển ở Đà Nẵng"})
+    assert headers[b"content-type"].startswith(b"text/event-stream")
+    events = parse_sse(body)
+    names = [name for name, _ in events]
+    assert names[0] == "insights" and names[-1] == "done"
+    parts = [data["text"] for name, data in events if name == "part"]
+    assert parts and events[-1][1] == {"parts": len(parts)}
+
+
+def test_user_token_is_signed_by_server(chat_app):
+    headers, body = call(chat_app, "/api/chat", {"message": "xin chào", "user_id": "victim"})
+    token = json.loads(body)["user_token"]
+    assert headers[b"x-chat-token"].decode() == token
+    assert chat_app.verify_user_token(token) == token.rsplit(".", 1)[0]
+    assert "victim" not in chat_app.engine.conversation_memory
+
+    forged = "victim." + "0" * 64
+    _, body = call(chat_app, "/api/chat", {"message": "xin chào", "user_token": forged})
+    assert not json.loads(body)["user_token"].startswith("victim.")
+
+
+def test_chatbot_page_uses_stream_endpoint(client):
+    html = client.get("/chatbot").get_data(as_text=True)
+    assert "/api/chat/stream" in html
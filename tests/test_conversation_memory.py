@@ -0,0 +1,75 @@
+import pytest
+
+from modules.conversation_memory import ConversationMemory, SQLiteConversationMemory
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_memory(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "memory":
+            return ConversationMemory(**kwargs)
+        return SQLiteConversationMemory(str(tmp_path / "chat.db"), **kwargs)
+    return make
+
+
+def test_ring_buffer_keeps_last_turns(make_memory):
+    memory = make_memory(max_turns=3, clock=Clock())
+    for i in range(5):
+        memory.append("u", {"i": i})
+    assert [turn["i"] for turn in memory.history("u")] == [2, 3, 4]
+    assert memory.stats()["turns_dropped"] == 2
+
+
+def test_least_recently_used_user_is_evicted(make_memory):
+    clock = Clock()
+    memory = make_memory(max_users=2, clock=clock)
+    memory.append("a", {"i": 1})
+    clock.now += 1
+    memory.append("b", {"i": 1})
+    clock.now += 1
+    memory.append("a", {"i": 2})  # a mới dùng lại -> b cũ nhất
+    clock.now += 1
+    memory.append("c", {"i": 1})
+
+    assert "b" not in memory
+    assert "a" in memory and "c" in memory
+    assert len(memory) == 2
+    assert memory.stats()["users_evicted"] == 1
+
+
+def test_silent_user_expires_after_ttl(make_memory):
+    clock = Clock()
+    memory = make_memory(ttl_seconds=60, clock=clock)
+    memory.append("old", {"i": 1})
+    clock.now += 30
+    memory.append("new", {"i": 1})
+    clock.now += 31
+
+    assert memory.history("old") == []
+    memory.append("new", {"i": 2})
+    assert "old" not in memory
+    assert [turn["i"] for turn in memory.history("new")] == [1, 2]
+    assert memory.stats()["users_expired"] == 1
+
+
+def test_byte_budget_evicts_and_bytes_are_released(make_memory):
+    clock = Clock()
+    memory = make_memory(max_bytes=200, clock=clock)
+    for user in "abcdef":
+        memory.append(user, {"text": "x" * 50})
+        clock.now += 1
+    stats = memory.stats()
+    assert stats["bytes_in_use"] <= 200
+    assert "f" in memory and "a" not in memory
+
+    memory.clear()
+    assert len(memory) == 0
+    assert memory.stats()["bytes_in_use"] == 0
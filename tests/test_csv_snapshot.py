@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from modules.csv_snapshot import load_csv, read_snapshot, write_snapshot
+
+
+def sample():
+    return pd.DataFrame({
+        "name": ["Khách sạn A", "B", None, "Đà Lạt\nView"],
+        "price": np.array([950000, 1200000, 0, 3500000], dtype=np.int64),
+        "rating": [4.5, np.nan, 3.0, 5.0],
+        "pool": [True, False, True, False],
+    })
+
+
+def test_round_trip_equal(tmp_path):
+    df = sample()
+    path = str(tmp_path / "snap")
+    write_snapshot(df, path)
+    assert_frame_equal(read_snapshot(path), df)
+
+
+def test_snapshot_columns_copy_on_write(tmp_path):
+    df = sample()
+    path = str(tmp_path / "snap")
+    write_snapshot(df, path)
+
+    loaded = read_snapshot(path)
+    loaded.loc[0, "price"] = 1
+    loaded.loc[1, "rating"] = 2.5
+    assert loaded.loc[0, "price"] == 1
+    assert_frame_equal(read_snapshot(path), df)  # file snapshot không đổi
+
+
+def test_load_csv_reuses_snapshot(tmp_path):
+    csv = tmp_path / "hotels.csv"
+    sample().to_csv(csv, index=False, encoding="utf-8-sig")
+    first = load_csv(str(csv))
+    assert os.listdir(tmp_path / ".snapshots")
+    assert_frame_equal(load_csv(str(csv)), first)
@@ -0,0 +1,65 @@
+import itertools
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from modules.filter import filter_by_budget, filter_by_location, filter_combined
+from modules.filter_index import to_bool_array
+
+
+# Bản trước khi có chỉ mục lọc (quét cột trực tiếp), làm chuẩn so sánh
+def old_filter_by_location(df, location_city):
+    if not location_city:
+        return df
+    return df[df['city'].str.lower().str.strip() == str(location_city).lower().strip()]
+
+
+def old_filter_by_budget(df, max_price):
+    if max_price <= 0:
+        return df
+    return df[pd.to_numeric(df['price'], errors='coerce') <= max_price]
+
+
+def old_filter_combined(df, min_stars, preferences):
+    filtered_df = df.copy()
+    if min_stars > 0:
+        filtered_df = filtered_df[filtered_df['stars'] >= min_stars]
+    for key, value in preferences.items():
+        if value and key in filtered_df.columns:
+            filtered_df = filtered_df[filtered_df[key] == True]  # noqa: E712
+    return filtered_df
+
+
+CITIES = ["Hanoi", " da nang ", "Ho Chi Minh City", "Atlantis"]
+BUDGETS = [0, 500_000, 1_200_000, 5_000_000]
+PREFS = [{}, {"pool": True}, {"pool": True, "sea": True}, {"buffet": True, "view": False}, {"gym": True}]
+
+
+def test_index_and_plain_paths_match_old_filters(catalog):
+    index = catalog.filter_index
+    # bản cũ so `== True`, chỉ đúng khi cột tiện ích là bool thật
+    df = catalog.df.assign(**{c: to_bool_array(catalog.df[c]) for c in ("buffet", "pool", "sea", "view")})
+    subset = df[df['stars'] >= 3].copy()  # bản lọc / .copy() vẫn dùng được chỉ mục của bản gốc
+    for frame in (df, subset):
+        for city in CITIES:
+            expected = old_filter_by_location(frame, city)
+            assert_frame_equal(filter_by_location(frame, city, index), expected)
+            assert_frame_equal(filter_by_location(frame, city), expected)
+        for budget in BUDGETS:
+            expected = old_filter_by_budget(frame, budget)
+            assert_frame_equal(filter_by_budget(frame, budget, index), expected)
+            assert_frame_equal(filter_by_budget(frame, budget), expected)
+        for stars, prefs in itertools.product([0, 3, 5], PREFS):
+            expected = old_filter_combined(frame, stars, prefs)
+            assert_frame_equal(filter_combined(frame, stars, prefs, index), expected)
+            assert_frame_equal(filter_combined(frame, stars, prefs), expected)
+
+
+def test_text_amenity_columns_count_as_true(catalog):
+    # hotels.csv đọc qua read_csv_safe giữ 'TRUE'/'FALSE' dạng chuỗi; bản cũ bỏ sót mọi dòng này
+    df = catalog.df
+    assert df["pool"].dtype != bool
+    expected = df[df["pool"].str.strip().str.upper() == "TRUE"]
+    assert len(expected)
+    assert_frame_equal(filter_combined(df, 0, {"pool": True}, catalog.filter_index), expected)
+    assert_frame_equal(filter_combined(df, 0, {"pool": True}), expected)
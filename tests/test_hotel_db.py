@@ -0,0 +1,21 @@
+import sqlite3
+
+from modules.hotel_db import BookingEngine, ensure_schema
+
+
+def test_schema_upgrade_dedupes_hotel_names(tmp_path):
+    path = str(tmp_path / "old.db")
+    old = sqlite3.connect(path)
+    old.executescript("""
+        CREATE TABLE hotels (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, city TEXT, price REAL);
+        INSERT INTO hotels (name, city, price) VALUES ('A', 'Hanoi', 1), ('B', 'Hue', 2), ('A', 'Hanoi', 3);
+    """)
+    old.commit()
+    old.close()
+
+    engine = BookingEngine(path)
+    conn = engine.connection()
+    rows = conn.execute("SELECT name, price FROM hotels ORDER BY name").fetchall()
+    assert [tuple(r) for r in rows] == [("A", 3.0), ("B", 2.0)]
+    ensure_schema(conn)  # lần sau: chỉ mục đã có, không xóa gì thêm
+    assert conn.execute("SELECT COUNT(*) FROM hotels").fetchone()[0] == 2
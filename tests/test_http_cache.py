@@ -0,0 +1,26 @@
+def test_search_etag_304_until_new_review(client, catalog):
+    url = "/api/search?q=khach+san&per_page=5"
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag
+
+    again = client.get(url, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+
+    name = catalog.records[1]["name"]
+    client.post(f"/review/{name}", data={"user": "Test", "rating": "5", "comment": "khách sạn yên tĩnh"})
+
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_hotel_detail_etag_changes_with_review(client, catalog):
+    name = catalog.records[2]["name"]
+    url = f"/hotel/{name}"
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    client.post(f"/review/{name}", data={"user": "Test", "rating": "4", "comment": "sạch sẽ"})
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
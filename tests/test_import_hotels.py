@@ -0,0 +1,65 @@
+import sqlite3
+
+import pandas as pd
+
+from import_hotels import import_hotels
+from modules.hotel_db import DEFAULT_ROOMS_AVAILABLE
+
+HOTELS = pd.DataFrame({
+    "name": ["A", "B", "C"],
+    "city": ["Đà Nẵng", "Huế", "Đà Lạt"],
+    "price": [500000, 800000, 650000],
+    "stars": [3, 4, 5],
+    "pool": [True, False, True],
+})
+
+
+def _rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT name, city, price, stars, pool, image_url, rooms_available FROM hotels ORDER BY name"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def test_second_import_changes_nothing(tmp_path):
+    csv_file, db_path = tmp_path / "hotels.csv", str(tmp_path / "hotel.db")
+    HOTELS.to_csv(csv_file, index=False, encoding="utf-8-sig")
+
+    first = import_hotels(str(csv_file), db_path, chunk_size=2)
+    assert (first["rows"], first["inserted"], first["updated"]) == (3, 3, 0)
+    before = _rows(db_path)
+
+    second = import_hotels(str(csv_file), db_path, chunk_size=2)
+    assert (second["inserted"], second["updated"], second["unchanged"]) == (0, 0, 3)
+    assert _rows(db_path) == before
+    assert {row[-1] for row in before} == {DEFAULT_ROOMS_AVAILABLE}
+
+
+def test_changed_row_updates_and_missing_columns_are_kept(tmp_path):
+    csv_file, db_path = tmp_path / "hotels.csv", str(tmp_path / "hotel.db")
+    HOTELS.assign(image_url="a.jpg", rooms_available=7).to_csv(csv_file, index=False, encoding="utf-8-sig")
+    import_hotels(str(csv_file), db_path)
+
+    # CSV mới thiếu cột image_url / rooms_available và đổi giá của B
+    HOTELS.assign(price=[500000, 900000, 650000]).to_csv(csv_file, index=False, encoding="utf-8-sig")
+    stats = import_hotels(str(csv_file), db_path)
+
+    assert (stats["inserted"], stats["updated"], stats["unchanged"]) == (0, 1, 2)
+    rows = {row[0]: row for row in _rows(db_path)}
+    assert rows["B"][2] == 900000
+    assert {row[5] for row in rows.values()} == {"a.jpg"}
+    assert {row[6] for row in rows.values()} == {7}
+
+
+def test_prune_removes_hotels_missing_from_csv(tmp_path):
+    csv_file, db_path = tmp_path / "hotels.csv", str(tmp_path / "hotel.db")
+    HOTELS.to_csv(csv_file, index=False, encoding="utf-8-sig")
+    import_hotels(str(csv_file), db_path)
+
+    HOTELS.iloc[:2].to_csv(csv_file, index=False, encoding="utf-8-sig")
+    stats = import_hotels(str(csv_file), db_path, prune=True)
+    assert (stats["pruned"], stats["inserted"], stats["unchanged"]) == (1, 0, 2)
+    assert [row[0] for row in _rows(db_path)] == ["A", "B"]
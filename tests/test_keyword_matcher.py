@@ -0,0 +1,51 @@
+import random
+import re
+
+from modules.filter import FEATURE_KEYWORDS, parse_features_from_text
+from modules.keyword_matcher import KeywordMatcher
+
+TABLE = {"a": ["lo", "lo lắng", "lắng"], "b": ["biển", "view biển", "bi"], "c": ["spa"]}
+WORDS = {"w": ["gym", "gym tốt", "ok"]}
+
+
+def occurrences(text, keyword):
+    return sum(text.startswith(keyword, i) for i in range(len(text)))
+
+
+def whole_word(text, keyword):
+    return len(re.findall(r"(?<!\w)(?=" + re.escape(keyword) + r"(?!\w))", text))
+
+
+def test_scan_matches_substring_and_whole_word_counts():
+    matcher = KeywordMatcher([("t", TABLE, False), ("w", WORDS, True)])
+    pieces = ["lo", " lắng", "view biển", "bi", "spa", "gym", "gym tốt", "okay", " ", "x", "Lo Lắng"]
+    rng = random.Random(0)
+    for _ in range(300):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+        hits = matcher.scan(text)
+        lower = text.lower()
+        for key, keywords in TABLE.items():
+            expected = {k: occurrences(lower, k) for k in keywords if k in lower}
+            assert hits.keywords(("t", key)) == set(expected)
+            assert hits.count(("t", key)) == sum(expected.values())
+        for key, keywords in WORDS.items():
+            expected = {k: whole_word(lower, k) for k in keywords if whole_word(lower, k)}
+            assert hits.keywords(("w", key)) == set(expected)
+            assert hits.count(("w", key)) == sum(expected.values())
+
+
+def old_parse_features_from_text(text):
+    text_lower = text.lower()
+    return {f: True for f, keywords in FEATURE_KEYWORDS.items() if any(k in text_lower for k in keywords)}
+
+
+def test_feature_parsing_matches_substring_scan():
+    texts = [
+        "Tìm khách sạn ở Đà Nẵng giá rẻ",
+        "Khách sạn 5 sao có HỒ BƠI và view biển",
+        "cần wifi mạnh, bãi đỗ xe, breakfast included",
+        "phòng gym + spa thư giãn, gần nhà hàng",
+        "",
+    ]
+    for text in texts:
+        assert parse_features_from_text(text) == old_parse_features_from_text(text)
@@ -0,0 +1,89 @@
+import os
+
+from modules.metrics import MetricsRegistry, RequestProfiler
+
+
+def test_render_counters_histograms_and_collectors():
+    registry = MetricsRegistry(prefix="t", buckets=(0.1, 1.0))
+    registry.describe("hits_total", "counter", "Số lần trúng")
+    registry.inc("hits_total", stage="a")
+    registry.inc("hits_total", 2, stage="a")
+    registry.inc("hits_total", stage='say "hi"\n')
+    for value in (0.05, 0.5, 0.5, 3.0):
+        registry.observe("seconds", value, route="/x")
+    registry.add_collector(lambda: [("rows", "gauge", "Số dòng", [({}, 7)])])
+
+    lines = registry.render().splitlines()
+    assert lines[:4] == [
+        "# HELP t_hits_total Số lần trúng",
+        "# TYPE t_hits_total counter",
+        't_hits_total{stage="a"} 3',
+        't_hits_total{stage="say \\"hi\\"\\n"} 1',
+    ]
+    assert "# TYPE t_seconds histogram" in lines
+    assert 't_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{route="/x",le="1.0"} 3' in lines
+    assert 't_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 't_seconds_sum{route="/x"} 4.05' in lines
+    assert 't_seconds_count{route="/x"} 4' in lines
+    assert lines[-3:] == ["# HELP t_rows Số dòng", "# TYPE t_rows gauge", "t_rows 7"]
+
+
+def test_spans_follow_the_current_request():
+    registry = MetricsRegistry(prefix="t")
+    with registry.span("boot"):
+        pass
+    trace = registry.begin_request("/hotel/<name>")
+    with registry.span("render"):
+        pass
+    with registry.span("db write"):
+        pass
+    assert registry.end_request("GET", 200) is trace
+    assert registry.current() is None
+    assert [stage for stage, _ in trace.spans] == ["render", "db write"]
+    assert trace.server_timing().startswith("render;dur=")
+    assert ", db_write;dur=" in trace.server_timing()
+
+    text = registry.render()
+    assert 't_stage_seconds_count{route="background",stage="boot"} 1' in text
+    assert 't_stage_seconds_count{route="/hotel/<name>",stage="render"} 1' in text
+    assert 't_request_seconds_count{method="GET",route="/hotel/<name>",status="200"} 1' in text
+
+
+def test_profiler_needs_token_and_writes_files(tmp_path):
+    assert not RequestProfiler(None).wanted({"X-Profile": ""})
+    profiler = RequestProfiler("secret", out_dir=str(tmp_path))
+    assert not profiler.wanted({"X-Profile": "wrong"})
+    assert profiler.wanted({"X-Profile": "secret"})
+
+    profile = profiler.start()
+    assert profile is not None
+    assert profiler.start() is None  # một request mỗi lần
+    sum(range(1000))
+    path = profiler.stop(profile, "/hotel/A B")
+    assert path.endswith(".prof") and os.path.exists(path)
+    with open(path[:-5] + ".txt", encoding="utf-8") as f:
+        assert "function calls" in f.read()
+    profile = profiler.start()
+    assert profile is not None
+    profiler.stop(profile, "again")
+
+
+def test_metrics_endpoint_and_server_timing(client):
+    response = client.get("/recommend?location=Hanoi&per_page=5")
+    assert response.status_code == 200
+    assert "filter;dur=" in response.headers.get("Server-Timing", "")
+
+    text = client.get("/metrics").get_data(as_text=True)
+    assert 'hotel_request_seconds_count{method="GET",route="/recommend",status="200"}' in text
+    assert 'hotel_stage_seconds_bucket{route="/recommend",stage="filter",le="+Inf"}' in text
+    assert 'hotel_cache_entries{cache="recommend"}' in text
+    assert "# TYPE hotel_catalog_rows gauge" in text
+
+
+def test_profile_header_attaches_profile_file(app_module, client, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module.profiler, "token", "secret")
+    monkeypatch.setattr(app_module.profiler, "out_dir", str(tmp_path))
+    assert "X-Profile-File" not in client.get("/recommend?location=Hanoi").headers
+    response = client.get("/recommend?location=Hanoi", headers={"X-Profile": "secret"})
+    assert os.path.exists(response.headers["X-Profile-File"])
@@ -0,0 +1,34 @@
+def walk(client, query, per_page):
+    rows, cursor = [], None
+    while True:
+        url = f"/api/search?{query}&per_page={per_page}&fields=name"
+        if cursor is not None:
+            url += f"&cursor={cursor}"
+        page = client.get(url).get_json()
+        rows += [h["name"] for h in page["hotels"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return rows, page["total"]
+
+
+def test_cursor_pages_cover_results_once(client):
+    full = client.get("/api/search?sort=asc&per_page=200&fields=name").get_json()
+    names = [h["name"] for h in full["hotels"]]
+
+    rows, total = walk(client, "sort=asc", 7)
+    assert total == full["total"]
+    assert rows == names
+    assert len(set(rows)) == len(rows)
+
+
+def test_same_cursor_same_page(client, catalog):
+    first = client.get("/api/search?sort=desc&per_page=5&fields=name").get_json()
+    cursor = first["next_cursor"]
+    url = f"/api/search?sort=desc&per_page=5&fields=name&cursor={cursor}"
+    before = client.get(url).get_json()
+
+    # đánh giá mới không làm xê dịch trang theo cursor khi không tìm theo q
+    client.post(f"/review/{catalog.records[3]['name']}", data={"user": "T", "rating": "3", "comment": "ok"})
+    after = client.get(url).get_json()
+    assert after == before
+    assert not {h["name"] for h in first["hotels"]} & {h["name"] for h in after["hotels"]}
@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from AI import month_to_season
+from modules.availability import ROOM_TYPES, stay_nights
+from modules.pricing import (
+    EVENT_FACTOR, EVENT_LEAD_DAYS, OCCUPANCY_SURCHARGE, PRICE_STEP, ROOM_MULTIPLIERS, SEASON_FACTORS,
+    DynamicPricer, PriceTable,
+)
+
+START = date(2026, 5, 28)
+HOTELS = pd.DataFrame({
+    "name": ["A", "B", "C"],
+    "city": ["Da Nang", "Ho Chi Minh City", "Hue"],
+    "price": [500000, 1200000, None],
+})
+EVENTS = pd.DataFrame({
+    "city": ["Ho Chi Minh", "Hue"],
+    "start_date": ["2026-06-02", "2027-01-10"],
+    "end_date": ["2026-06-03", "2027-01-10"],
+})
+
+
+def reference_price(hotel, room, night, occupancy=0.0):
+    """Giá một đêm tính thẳng theo định nghĩa, không qua bảng"""
+    day = date.fromisoformat(night)
+    factor = SEASON_FACTORS[month_to_season(day.month)]
+    for e in EVENTS.itertuples():
+        first = date.fromisoformat(e.start_date) - timedelta(days=EVENT_LEAD_DAYS)
+        if e.city.lower() in hotel.city.lower() and first <= day <= date.fromisoformat(e.end_date):
+            factor *= EVENT_FACTOR
+    price = (hotel.price if hotel.price == hotel.price else 0) * ROOM_MULTIPLIERS[room] * factor
+    return round(price * (1 + OCCUPANCY_SURCHARGE * occupancy) / PRICE_STEP) * PRICE_STEP
+
+
+def test_nightly_matches_reference_inside_and_outside_horizon():
+    table = PriceTable(HOTELS, EVENTS, start=START, horizon=30)
+    nights = stay_nights(START, 10) + stay_nights(date(2027, 1, 8), 4)  # mùa hè, sự kiện, ngoài bảng
+    prices = table.nightly([0, 1, 2], nights)
+    assert prices.shape == (3, len(ROOM_TYPES), len(nights))
+    for h, hotel in enumerate(HOTELS.itertuples()):
+        for t in range(len(ROOM_TYPES)):
+            assert prices[h, t].tolist() == [reference_price(hotel, t, n) for n in nights]
+
+
+def test_occupancy_surcharge():
+    table = PriceTable(HOTELS, EVENTS, start=START)
+    nights = stay_nights(START, 2)
+    occupancy = np.full((1, len(ROOM_TYPES), 2), 0.5)
+    prices = table.nightly([1], nights, occupancy)
+    hotel = next(HOTELS.iloc[[1]].itertuples())
+    assert prices[0, 2].tolist() == [reference_price(hotel, 2, n, 0.5) for n in nights]
+
+
+class FakeCalendar:
+    def __init__(self):
+        self.calls = 0
+        self.ver = 1
+        self.booked = 0.0
+
+    def version(self):
+        return self.ver
+
+    def occupancy(self, names, checkin, nights=1):
+        self.calls += 1
+        return np.full((len(names), len(ROOM_TYPES), nights), self.booked)
+
+
+def test_pricer_caches_occupancy_per_calendar_version():
+    calendar = FakeCalendar()
+    pricer = DynamicPricer(calendar, EVENTS)
+    catalog = SimpleNamespace(
+        version=1, df=HOTELS, records=HOTELS.to_dict(orient="records"),
+        name_postings={"A": [0], "B": [1], "C": [2]},
+    )
+    checkin = date.today().isoformat()
+    first = pricer.stay_totals(catalog, [0, 1], checkin, 2)
+    pricer.stay_totals(catalog, [0, 1], checkin, 2)
+    assert calendar.calls == 1
+
+    calendar.ver, calendar.booked = 2, 1.0  # có người đặt phòng -> lịch đổi phiên bản
+    second = pricer.stay_totals(catalog, [0, 1], checkin, 2)
+    assert calendar.calls == 2
+    assert (second >= first).all() and (second > first).any()
+
+    prices = pricer.room_prices(catalog, "B", checkin, 2)
+    assert list(prices) == list(ROOM_TYPES)
+    assert prices[ROOM_TYPES[0]] * 3 == prices[ROOM_TYPES[2]]
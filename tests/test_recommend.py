@@ -0,0 +1,21 @@
+import numpy as np
+
+from modules.recommend import top_rows
+
+
+def test_top_rows_matches_stable_full_sort():
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        scores = rng.integers(0, 4, rng.integers(1, 40)).astype(float)
+        if rng.random() < 0.3:
+            scores[rng.integers(0, len(scores))] = np.nan
+        full = np.argsort(-scores, kind="stable")
+        for top_k in (0, 1, 3, len(scores) - 1, len(scores) + 5):
+            assert np.array_equal(top_rows(scores, top_k), full[:top_k])
+        assert np.array_equal(top_rows(scores), full)
+
+
+def test_top_rows_ties_keep_catalog_order_at_cut():
+    scores = np.array([1.0, 5.0, 3.0, 5.0, 3.0, 3.0])
+    assert top_rows(scores, 3).tolist() == [1, 3, 2]
+    assert top_rows(scores, 4).tolist() == [1, 3, 2, 4]
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from modules.recommend import PHRASE_SEPARATOR, calculate_scores_and_explain, text_keywords
+from modules.recommendation_service import RecommendationService, normalize_prefs
+
+TEXTS = [
+    "Mình muốn khách sạn giá rẻ, gần biển, yên tĩnh",
+    "yên tĩnh và GẦN BIỂN nhé, giá rẻ thôi",
+    "nhân viên thân thiện, dịch vụ tốt, nhiều đánh giá tích cực",
+    "sao nào cũng được",
+]
+
+
+def test_equivalent_prefs_share_a_key():
+    a = {"location": "Ho Chi Minh City", "budget": "1500000", "min_stars": 4, "pool": True,
+         "sea": 1, "gym": False, "text": TEXTS[0]}
+    b = {"location": " ho chi minh ", "budget": 1500000.0, "min_stars": "4", "sea": True,
+         "pool": "yes", "text": TEXTS[1], "ignored": "x"}
+    assert normalize_prefs(a) == normalize_prefs(b)
+    assert normalize_prefs({"budget": "-5", "min_stars": "abc"}) == normalize_prefs({})
+    assert normalize_prefs(dict(a, min_stars=5)) != normalize_prefs(a)
+    assert normalize_prefs(dict(a, text=TEXTS[2])) != normalize_prefs(a)
+
+
+def test_text_keywords_score_like_the_original_text(catalog):
+    for text in TEXTS:
+        prefs = {"text": text, "min_stars": 0}
+        reduced = {"text": PHRASE_SEPARATOR.join(text_keywords(text)), "min_stars": 0}
+        full, _ = calculate_scores_and_explain(catalog.df, prefs, top_k=10, scorer=catalog.scorer)
+        short, _ = calculate_scores_and_explain(catalog.df, reduced, top_k=10, scorer=catalog.scorer)
+        assert full["name"].tolist() == short["name"].tolist()
+        assert full["recommend_score"].tolist() == short["recommend_score"].tolist()
+
+
+def test_cache_keyed_by_prefs_top_k_and_catalog_version(catalog):
+    current = SimpleNamespace(catalog=catalog)
+    service = RecommendationService(lambda: current.catalog)
+
+    first = service.recommend({"location": "Hanoi", "text": TEXTS[0]}, top_k=3)
+    again = service.recommend({"location": "hanoi", "text": TEXTS[1]}, top_k=3)
+    assert first[0] and again is first
+    assert service.stats()["entries"] == 1 and service.stats()["hits"] == 1
+
+    service.recommend({"location": "Hanoi", "text": TEXTS[0]}, top_k=5)
+    assert service.stats()["entries"] == 2
+
+    # danh mục mới (phiên bản khác) -> bỏ hết kết quả cũ
+    current.catalog = SimpleNamespace(
+        version=catalog.version + 1, df=catalog.df, filter_index=catalog.filter_index, scorer=catalog.scorer
+    )
+    fresh = service.recommend({"location": "Hanoi", "text": TEXTS[0]}, top_k=3)
+    assert fresh is not first and fresh == first
+    assert service.stats()["entries"] == 1
@@ -0,0 +1,51 @@
+from modules.render_cache import LRUCache
+
+
+def test_lru_evicts_oldest_by_entries_and_chars():
+    cache = LRUCache(max_entries=2, max_chars=10)
+    cache.put("a", "1111")
+    cache.put("b", "2222")
+    assert cache.get("a") == "1111"  # a mới dùng -> b cũ nhất
+    cache.put("c", "3333")
+    assert cache.get("b") is None and cache.get("a") == "1111"
+
+    cache.put("d", "44444444")  # vượt max_chars -> bỏ tới khi vừa
+    assert cache.get("d") == "44444444" and len(cache) == 1
+    assert cache.chars == 8
+
+    cache.put("huge", "x" * 11)  # lớn hơn cả cache: không lưu
+    assert cache.get("huge") is None and cache.get("d") is not None
+
+
+def test_bind_drops_entries_of_old_version():
+    cache = LRUCache()
+    cache.bind(1)
+    cache.put("k", "v1")
+    cache.bind(1)
+    assert cache.get("k") == "v1"
+    cache.bind(2)
+    assert cache.get("k") is None and cache.chars == 0
+
+
+def test_recommend_page_cached_under_normalized_query(app_module, client):
+    cache = app_module.recommend_cache
+    cache.clear()
+    first = client.get("/recommend?location=Hanoi&budget=2000000&pool=1")
+    assert first.status_code == 200
+    entries = len(cache)
+
+    # cùng truy vấn sau chuẩn hóa: hoa/thường, khoảng trắng, tham số thừa
+    same = client.get("/recommend?location=%20hanoi%20&budget=2000000.0&pool=on&junk=1")
+    assert same.get_data() == first.get_data()
+    assert len(cache) == entries
+
+    other = client.get("/recommend?location=Hanoi&budget=2000000&pool=1&sort=asc")
+    assert other.status_code == 200
+    assert len(cache) == entries + 1
+
+
+def test_recommend_cache_keyed_by_catalog_version(app_module, client):
+    cache = app_module.recommend_cache
+    client.get("/recommend?location=Hanoi")
+    catalog = app_module.catalog_manager.current
+    assert all(key[0] == catalog.version for key in cache._items)
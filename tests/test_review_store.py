@@ -0,0 +1,25 @@
+from modules.review_store import ReviewStore
+
+
+def test_ratings_keep_integers_and_average(tmp_path):
+    store = ReviewStore(str(tmp_path / "reviews.csv"))
+    for rating in (5, "4.5", "", "abc", 4):
+        store.add("A", "u", rating, "ok")
+
+    ratings = [r["rating"] for r in store.for_hotel("A")]
+    assert ratings == [5, 4.5, None, None, 4]
+    assert isinstance(ratings[0], int) and isinstance(ratings[-1], int)
+    assert store.avg_rating("A") == 4.5
+    assert store.count("A") == 5
+
+    # nạp lại từ file cho cùng kết quả
+    reloaded = ReviewStore(store.path)
+    assert [r["rating"] for r in reloaded.for_hotel("A")] == ratings
+
+
+def test_detail_page_shows_integer_rating(client, catalog):
+    name = catalog.records[3]["name"]
+    client.post(f"/review/{name}", data={"user": "Điểm nguyên", "rating": "5", "comment": "tuyệt"})
+    html = client.get(f"/hotel/{name}").get_data(as_text=True)
+    assert "— ⭐ 5/5" in html
+    assert "— ⭐ 5.0/5" not in html
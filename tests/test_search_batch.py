@@ -0,0 +1,33 @@
+from urllib.parse import urlencode
+
+QUERIES = [
+    {"location": "Hanoi", "sort": "asc", "per_page": "5"},
+    {"budget": "1500000", "pool": "1", "fields": "name,price"},
+    {"stars": "4", "sort": "desc", "page": "2", "per_page": "3"},
+    {"location": "Hanoi", "sort": "asc", "per_page": "5"},
+]
+
+
+def test_batch_matches_single_queries(client):
+    response = client.post("/api/search/batch", json={"queries": QUERIES})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert len(results) == len(QUERIES)
+    for query, result in zip(QUERIES, results):
+        assert result == client.get("/api/search?" + urlencode(query)).get_json()
+    assert results[0] == results[3]
+
+
+def test_batch_accepts_plain_list_and_revalidates(client):
+    first = client.post("/api/search/batch", json=QUERIES[:2])
+    assert first.status_code == 200 and first.headers.get("ETag")
+    again = client.post("/api/search/batch", json=QUERIES[:2],
+                        headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_batch_rejects_bad_bodies(app_module, client):
+    assert client.post("/api/search/batch", json={"queries": "Hanoi"}).status_code == 400
+    assert client.post("/api/search/batch", json=[{"location": "Hanoi"}, 1]).status_code == 400
+    too_many = [{"location": "Hanoi"}] * (app_module.MAX_BATCH + 1)
+    assert client.post("/api/search/batch", json=too_many).status_code == 400
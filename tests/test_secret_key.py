@@ -0,0 +1,31 @@
+from modules.secret_key import load_secret_key
+
+
+def test_env_key_wins(tmp_path, monkeypatch):
+    monkeypatch.setenv("SECRET_KEY", "from-env")
+    assert load_secret_key(str(tmp_path / "key")) == "from-env"
+    assert not (tmp_path / "key").exists()
+
+
+def test_generated_key_is_random_and_shared(tmp_path, monkeypatch):
+    monkeypatch.delenv("SECRET_KEY", raising=False)
+    path = str(tmp_path / "key")
+    key = load_secret_key(path)
+    assert len(key) == 64 and key != "hotel-pinder-dev"
+    assert load_secret_key(path) == key  # tiến trình thứ hai (chat_asgi.py, worker khác) đọc cùng khóa
+    assert (tmp_path / "key").stat().st_mode & 0o077 == 0
+    assert load_secret_key(str(tmp_path / "other")) != key
+
+
+def test_forged_dev_key_cookie_is_ignored(app_module):
+    from flask import Flask
+    from flask.sessions import SecureCookieSessionInterface
+
+    forger = Flask("forger")
+    forger.secret_key = "hotel-pinder-dev"  # khóa mặc định cũ, công khai trong mã nguồn
+    forged = SecureCookieSessionInterface().get_signing_serializer(forger).dumps({"admin": True})
+
+    app = app_module.app
+    with app.test_request_context(headers={"Cookie": f"session={forged}"}):
+        session = app.session_interface.open_session(app, app_module.request)
+        assert not session.get("admin")
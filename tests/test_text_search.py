@@ -0,0 +1,45 @@
+from modules.text_search import FullTextIndex, fold
+
+
+def build(docs):
+    index = FullTextIndex()
+    for key, text in docs.items():
+        index.add(key, text)
+    return index
+
+
+def test_fold_removes_accents():
+    assert fold("Yên Tĩnh, Đẹp") == "yen tinh, dep"
+
+
+def test_bm25_ranks_phrase_and_frequency():
+    index = build({
+        "phrase": "phòng yên tĩnh gần biển",
+        "split": "yên vui, không gian tĩnh lặng gần biển",
+        "noise": "gần chợ đêm, ồn ào",
+    })
+    ranked = [key for key, _ in index.search("yen tinh")]
+    assert ranked == ["phrase", "split"]  # cặp từ liền kề xếp trên, văn bản thiếu từ bị loại
+
+    index = build({
+        "once": "hồ bơi " + "phòng rộng " * 5,
+        "twice": "hồ bơi hồ bơi " + "phòng rộng " * 4,
+    })
+    scores = dict(index.search("hồ bơi"))
+    assert scores["twice"] > scores["once"] > 0
+
+
+def test_bm25_shorter_document_wins_on_equal_tf():
+    index = build({
+        "long": "buffet sáng " + "khách sạn trung tâm thành phố " * 10,
+        "short": "buffet sáng ngon",
+    })
+    assert [key for key, _ in index.search("buffet")] == ["short", "long"]
+
+
+def test_incremental_add_extends_document():
+    index = build({"a": "view đẹp", "b": "bể bơi"})
+    assert [key for key, _ in index.search("view")] == ["a"]
+    index.add("b", "view thành phố")
+    assert sorted(key for key, _ in index.search("view")) == ["a", "b"]
+    assert [key for key, _ in index.search("be boi view")] == ["b"]  # từ của cả hai lần add